@@ -19,6 +19,7 @@
 import re
 import bpy
 import time
+import hashlib
 import bmesh
 import shutil
 import threading
@@ -138,10 +139,10 @@ class MaterialCreator:
             material_to_slot[i] = slot_index
 
         if len(self.mesh.polygons) == len(self.mesh["ios_material_ids"]):
-            material_index = [
-                (material_to_slot[mat_id] if mat_id != -1 else 0) for mat_id in self.mesh["ios_material_ids"]
-            ]
-            self.mesh.polygons.foreach_set("material_index", material_index)
+            # The trailing slot maps faces without a material (-1) to the first slot
+            slots = np.array([material_to_slot[i] for i in range(len(material_to_slot))] + [0], dtype=np.int32)
+            material_ids = np.array(self.mesh["ios_material_ids"], dtype=np.int32)
+            self.mesh.polygons.foreach_set("material_index", slots[material_ids])
 
     def resolve_mapped_representation_items(self, representation):
         items = []
@@ -172,8 +173,12 @@ class IfcImporter:
         self.type_products = {}
         self.openings = {}
         self.meshes = {}
+        self.mesh_hashes = {}
+        self.total_identical_meshes = 0
         self.mesh_shapes = {}
         self.time = 0
+        self.mesh_time = 0
+        self.total_meshes = 0
         self.unit_scale = 1
         self.added_data = {}
         self.native_elements = set()
@@ -253,6 +258,8 @@ class IfcImporter:
             self.profile_code("Mesh cleaning")
         self.set_default_context()
         self.profile_code("Setting default context")
+        if self.ifc_import_settings.should_share_identical_meshes:
+            print("{} identical meshes shared between representations".format(self.total_identical_meshes))
         self.update_progress(100)
         bpy.context.window_manager.progress_end()
 
@@ -594,6 +601,13 @@ class IfcImporter:
         bm.free()
         print("Done creating geometry")
 
+    def get_mesh_cost(self):
+        # The average time in milliseconds to create each mesh since last called
+        cost = (self.mesh_time / self.total_meshes * 1000) if self.total_meshes else 0
+        self.mesh_time = 0
+        self.total_meshes = 0
+        return cost
+
     def create_spatial_elements(self):
         self.create_generic_elements(self.spatial_elements)
 
@@ -641,8 +655,8 @@ class IfcImporter:
             total += 1
             if total % 250 == 0:
                 print(
-                    "{} ({}%) elements processed in {:.2f}s ...".format(
-                        total, iterator.progress(), time.time() - checkpoint
+                    "{} ({}%) elements processed in {:.2f}s ({:.2f}ms per mesh) ...".format(
+                        total, iterator.progress(), time.time() - checkpoint, self.get_mesh_cost()
                     )
                 )
                 checkpoint = time.time()
@@ -813,12 +827,7 @@ class IfcImporter:
             mesh = self.create_curve(element, shape)
             self.link_mesh(shape, mesh)
         elif shape:
-            mesh_name = self.get_mesh_name(shape.geometry)
-            mesh = self.meshes.get(mesh_name)
-            if mesh is None:
-                mesh = self.create_mesh(element, shape)
-                self.link_mesh(shape, mesh)
-                self.meshes[mesh_name] = mesh
+            mesh = self.get_shape_mesh(element, shape)
         else:
             mesh = None
 
@@ -1480,22 +1489,69 @@ class IfcImporter:
         curve.dimensions = "3D"
         curve.resolution_u = 2
 
-        e = geometry.edges
-        v = geometry.verts
-        vertices = [[v[i], v[i + 1], v[i + 2], 1] for i in range(0, len(v), 3)]
-        edges = [[e[i], e[i + 1]] for i in range(0, len(e), 2)]
-        v2 = None
-        for edge in edges:
-            v1 = vertices[edge[0]]
-            if v1 != v2:
-                polyline = curve.splines.new("POLY")
-                polyline.points[-1].co = mathutils.Vector(v1)
-            v2 = vertices[edge[1]]
-            polyline.points.add(1)
-            polyline.points[-1].co = mathutils.Vector(v2)
+        vertices = self.get_geometry_array(geometry, "verts", np.float64).reshape((-1, 3))
+        edges = self.get_geometry_array(geometry, "edges", np.int32).reshape((-1, 2))
+        if not len(edges):
+            return curve
+
+        # A new polyline starts wherever an edge does not continue from the end of the previous edge
+        points = np.ones((len(edges) * 2, 4), dtype=np.float32)
+        is_continued = np.all(vertices[edges[1:, 0]] == vertices[edges[:-1, 1]], axis=1)
+        breaks = np.flatnonzero(~is_continued) + 1
+        for edge_indices in np.split(np.arange(len(edges)), breaks):
+            point_indices = np.append(edges[edge_indices[0], 0], edges[edge_indices, 1])
+            polyline = curve.splines.new("POLY")
+            polyline.points.add(len(point_indices) - 1)
+            co = points[: len(point_indices)]
+            co[:, :3] = vertices[point_indices]
+            polyline.points.foreach_set("co", co.ravel())
         return curve
 
+    def get_shape_mesh(self, element, shape):
+        # Meshes are shared between occurrences of the same representation,
+        # and optionally between representations with identical geometry.
+        mesh_name = self.get_mesh_name(shape.geometry)
+        mesh = self.meshes.get(mesh_name)
+        if mesh is not None:
+            return mesh
+        geometry_hash = None
+        if self.ifc_import_settings.should_share_identical_meshes:
+            geometry_hash = self.get_geometry_hash(shape.geometry)
+            mesh = self.mesh_hashes.get(geometry_hash)
+            if mesh is not None:
+                self.meshes[mesh_name] = mesh
+                self.total_identical_meshes += 1
+                return mesh
+        mesh = self.create_mesh(element, shape)
+        self.link_mesh(shape, mesh)
+        self.meshes[mesh_name] = mesh
+        if geometry_hash is not None:
+            self.mesh_hashes[geometry_hash] = mesh
+        return mesh
+
+    def get_geometry_hash(self, geometry):
+        geometry_hash = hashlib.blake2b(digest_size=16)
+        for name, dtype in (
+            ("verts", np.float64),
+            ("faces", np.int32),
+            ("edges", np.int32),
+            ("material_ids", np.int32),
+        ):
+            array = self.get_geometry_array(geometry, name, dtype)
+            geometry_hash.update(np.int64(len(array)).tobytes())
+            geometry_hash.update(array)
+        geometry_hash.update("|".join(m.name for m in geometry.materials).encode())
+        return geometry_hash.digest()
+
+    def get_geometry_array(self, geometry, name, dtype):
+        # Use the zero copy numpy views of the geometry if they are available
+        array = getattr(geometry, name + "_array", None)
+        if array is None:
+            array = np.array(getattr(geometry, name), dtype=dtype)
+        return array
+
     def create_mesh(self, element, shape):
+        start = time.time()
         try:
             if hasattr(shape, "geometry"):
                 geometry = shape.geometry
@@ -1504,49 +1560,38 @@ class IfcImporter:
 
             mesh = bpy.data.meshes.new(self.get_mesh_name(geometry))
 
+            verts = self.get_geometry_array(geometry, "verts", np.float64)
             props = bpy.context.scene.BIMGeoreferenceProperties
-            if (
-                props.has_blender_offset
-                and geometry.verts
-                and self.is_point_far_away((geometry.verts[0], geometry.verts[1], geometry.verts[2]))
-            ):
-                ordinate_index = 0
-                verts = [None] * len(geometry.verts)
-                offset_point = (
-                    float(props.blender_eastings) * self.unit_scale,
-                    float(props.blender_northings) * self.unit_scale,
-                    float(props.blender_orthogonal_height) * self.unit_scale,
+            if props.has_blender_offset and len(verts) and self.is_point_far_away(verts[0:3]):
+                offset_point = np.array(
+                    (
+                        float(props.blender_eastings) * self.unit_scale,
+                        float(props.blender_northings) * self.unit_scale,
+                        float(props.blender_orthogonal_height) * self.unit_scale,
+                    )
                 )
-                for i, vert in enumerate(geometry.verts):
-                    if ordinate_index > 2:
-                        ordinate_index = 0
-                    verts[i] = vert - offset_point[ordinate_index]
-                    ordinate_index += 1
-            else:
-                verts = geometry.verts
-
-            if geometry.faces:
-                num_vertices = len(verts) // 3
-                total_faces = len(geometry.faces)
-                loop_start = range(0, total_faces, 3)
-                num_loops = total_faces // 3
-                loop_total = [3] * num_loops
-                num_vertex_indices = len(geometry.faces)
-
-                mesh.vertices.add(num_vertices)
-                mesh.vertices.foreach_set("co", verts)
-                mesh.loops.add(num_vertex_indices)
-                mesh.loops.foreach_set("vertex_index", geometry.faces)
+                verts = (verts.reshape((-1, 3)) - offset_point).ravel()
+
+            # The offset is applied in double precision before converting to
+            # the single precision coordinates that Blender stores.
+            verts = verts.astype(np.float32)
+            num_vertices = len(verts) // 3
+            mesh.vertices.add(num_vertices)
+            mesh.vertices.foreach_set("co", verts)
+
+            faces = self.get_geometry_array(geometry, "faces", np.int32)
+            if len(faces):
+                num_loops = len(faces) // 3
+                mesh.loops.add(len(faces))
+                mesh.loops.foreach_set("vertex_index", faces)
                 mesh.polygons.add(num_loops)
-                mesh.polygons.foreach_set("loop_start", loop_start)
-                mesh.polygons.foreach_set("loop_total", loop_total)
-                mesh.update()
+                mesh.polygons.foreach_set("loop_start", np.arange(0, len(faces), 3, dtype=np.int32))
+                mesh.polygons.foreach_set("loop_total", np.full(num_loops, 3, dtype=np.int32))
             else:
-                e = geometry.edges
-                v = verts
-                vertices = [[v[i], v[i + 1], v[i + 2]] for i in range(0, len(v), 3)]
-                edges = [[e[i], e[i + 1]] for i in range(0, len(e), 2)]
-                mesh.from_pydata(vertices, edges, [])
+                edges = self.get_geometry_array(geometry, "edges", np.int32)
+                mesh.edges.add(len(edges) // 2)
+                mesh.edges.foreach_set("vertices", edges)
+            mesh.update()
 
             mesh["ios_materials"] = [int(m.name.split("-")[2]) for m in geometry.materials]
             mesh["ios_material_ids"] = geometry.material_ids
@@ -1556,6 +1601,9 @@ class IfcImporter:
             import traceback
 
             print(traceback.format_exc())
+        finally:
+            self.mesh_time += time.time() - start
+            self.total_meshes += 1
 
     def a2p(self, o, z, x):
         y = z.cross(x)
@@ -1628,6 +1676,7 @@ class IfcImportSettings:
         self.should_merge_by_material = False
         self.should_merge_materials_by_colour = False
         self.should_clean_mesh = True
+        self.should_share_identical_meshes = False
         self.deflection_tolerance = 0.001
         self.angular_tolerance = 0.5
         self.should_offset_model = False
@@ -1651,6 +1700,7 @@ class IfcImportSettings:
         settings.should_merge_by_material = props.should_merge_by_material
         settings.should_merge_materials_by_colour = props.should_merge_materials_by_colour
         settings.should_clean_mesh = props.should_clean_mesh
+        settings.should_share_identical_meshes = props.should_share_identical_meshes
         settings.deflection_tolerance = props.deflection_tolerance
         settings.angular_tolerance = props.angular_tolerance
         settings.should_offset_model = props.should_offset_model
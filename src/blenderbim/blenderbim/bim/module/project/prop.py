@@ -125,6 +125,7 @@ class BIMProjectProperties(PropertyGroup):
     should_merge_by_material: BoolProperty(name="Import and Merge by Material", default=False)
     should_merge_materials_by_colour: BoolProperty(name="Import and Merge Materials by Colour", default=False)
     should_clean_mesh: BoolProperty(name="Import and Clean Mesh", default=True)
+    should_share_identical_meshes: BoolProperty(name="Import and Share Identical Meshes", default=False)
     deflection_tolerance: FloatProperty(name="Import Deflection Tolerance", default=0.001)
     angular_tolerance: FloatProperty(name="Import Angular Tolerance", default=0.5)
     should_offset_model: BoolProperty(name="Import and Offset Model", default=False)
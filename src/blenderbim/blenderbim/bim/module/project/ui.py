@@ -78,6 +78,8 @@ class BIM_PT_project(Panel):
         row = self.layout.row()
         row.prop(pprops, "should_clean_mesh")
         row = self.layout.row()
+        row.prop(pprops, "should_share_identical_meshes")
+        row = self.layout.row()
         row.prop(pprops, "deflection_tolerance")
         row = self.layout.row()
         row.prop(pprops, "angular_tolerance")
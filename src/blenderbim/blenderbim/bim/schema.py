@@ -50,7 +50,7 @@ class IfcSchema:
         # TODO: add IFC2X3 PsetQto template support
         self.psetqto = ifcopenshell.util.pset.get_template("IFC4")
         for path in property_paths:
-            self.psetqto.templates.append(ifcopenshell.open(path))
+            self.psetqto.add_templates(path)
 
         self.classification_files = {}
         self.classifications = {}
@@ -22,6 +22,7 @@ import sys
 import json
 import logging
 import argparse
+import multiprocessing
 from .ifcclash import Clasher, ClashSettings
 
 parser = argparse.ArgumentParser(description="Clashes geometry between two IFC files")
@@ -29,10 +30,22 @@ parser.add_argument("input", type=str, help="A JSON dataset describing a series
 parser.add_argument(
     "-o", "--output", type=str, help="The JSON diff file to output. Defaults to output.json", default="output.json"
 )
+parser.add_argument(
+    "-p",
+    "--processes",
+    type=int,
+    help="The number of processes to use for the narrowphase. Defaults to the number of CPUs",
+    default=multiprocessing.cpu_count(),
+)
+parser.add_argument(
+    "-c", "--chunk-size", type=int, help="The number of candidate pairs sent to each process at once", default=10000
+)
 args = parser.parse_args()
 
 settings = ClashSettings()
 settings.output = args.output
+settings.processes = args.processes
+settings.chunk_size = args.chunk_size
 settings.logger = logging.getLogger("Clash")
 settings.logger.setLevel(logging.DEBUG)
 handler = logging.StreamHandler(sys.stdout)
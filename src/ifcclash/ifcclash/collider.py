@@ -16,44 +16,62 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with IfcClash.  If not, see <http://www.gnu.org/licenses/>.
 
+import time
 import hppfcl
 import numpy as np
+import multiprocessing
 import ifcopenshell
 
+# Narrowphase state inherited by forked worker processes, since hppfcl
+# collision objects cannot be pickled.
+_worker_state = None
+
+
+def collide_pairs(pairs):
+    objects1, objects2 = _worker_state
+    results = []
+    for i, j in pairs:
+        result = hppfcl.CollisionResult()
+        hppfcl.collide(objects1[i], objects2[j], hppfcl.CollisionRequest(), result)
+        if result.isCollision():
+            contact = result.getContacts()[0]
+            results.append((int(i), int(j), list(contact.normal), list(contact.pos), contact.penetration_depth))
+    return results
+
 
 class Collider:
-    def __init__(self, logger):
+    def __init__(self, logger, processes=1, chunk_size=10000):
         self.logger = logger
+        self.processes = processes
+        self.chunk_size = chunk_size
         self.groups = {}
-        self.tree = ifcopenshell.geom.tree()
+        self.bvhs = {}
+        self.bounds = {}
 
     def create_group(self, name):
         self.logger.info(f"Creating group {name}")
-        self.groups[name] = {"elements": {}, "objects": {}}
+        self.groups[name] = {"elements": {}, "objects": {}, "aabbs": {}}
 
     def create_objects(self, name, ifc_file, iterator, elements):
-        import time
-
         start = time.time()
         self.logger.info(f"Adding objects {name}")
         assert iterator.initialize()
         while True:
-            self.tree.add_element(iterator.get_native())
             shape = iterator.get()
-            self.create_object(name, shape.guid, shape)
+            self.create_object(name, shape.guid, shape, ifc_file)
             if not iterator.next():
                 break
-        self.logger.info(f"Tree finished {time.time() - start}")
+        self.logger.info(f"Objects finished {time.time() - start}")
         start = time.time()
         self.groups[name]["elements"].update({e.GlobalId: e for e in elements})
         self.logger.info(f"Element metadata finished {time.time() - start}")
-        start = time.time()
 
-    def create_object(self, group_name, id, shape):
-        obj = hppfcl.CollisionObject(
-            self.create_bvh(shape.geometry), self.create_transform(shape.transformation.matrix.data)
-        )
+    def create_object(self, group_name, id, shape, ifc_file=None):
+        m = shape.transformation.matrix.data
+        key = (ifc_file, shape.geometry.id)
+        obj = hppfcl.CollisionObject(self.get_bvh(shape.geometry, key), self.create_transform(m))
         self.groups[group_name]["objects"][id] = obj
+        self.groups[group_name]["aabbs"][id] = self.create_aabb(self.bounds[key], m)
 
     def collide_internal(self, name):
         return self.collide_narrowphase(name, name, self.collide_broadphase(name, name))
@@ -62,60 +80,153 @@ class Collider:
         return self.collide_narrowphase(name1, name2, self.collide_broadphase(name1, name2))
 
     def collide_broadphase(self, name1, name2):
-        import time
+        """Finds pairs of objects with overlapping world axis aligned bounding boxes
+
+        The boxes of both groups are swept along the axis in which they are
+        most spread out in one vectorised pass, and the candidates are then
+        filtered by their extents in the other two axes. Each unordered pair is
+        only returned once.
 
+        :return: An (N, 2) array of indices into the objects of each group,
+            sorted by the first then second index.
+        """
         start = time.time()
         self.logger.info("Starting broadphase")
-        potential_collisions = []
-        checked_collisions = set()
-        for id, element in self.groups[name1]["elements"].items():
-            checked_collisions.add(id)
-            box_filter = self.tree.select_box(element)
-            pairs = [
-                {"id1": id, "id2": e.GlobalId}
-                for e in box_filter
-                if e.GlobalId not in checked_collisions and e.GlobalId in self.groups[name2]["elements"]
-            ]
-            potential_collisions.extend(pairs)
-        self.logger.info(f"Finished broadphase {time.time() - start}")
+        ids1, mins1, maxs1 = self.get_aabbs(name1)
+        ids2, mins2, maxs2 = self.get_aabbs(name2)
+
+        centres = np.concatenate((mins1 + maxs1, mins2 + maxs2))
+        axis = int(np.argmax(centres.var(axis=0))) if len(centres) else 0
+        others = [a for a in range(3) if a != axis]
+
+        order1 = np.argsort(mins1[:, axis], kind="stable")
+        order2 = np.argsort(mins2[:, axis], kind="stable")
+        sorted_mins1 = mins1[order1, axis]
+        sorted_mins2 = mins2[order2, axis]
+
+        # Boxes in group 2 which start within the swept extent of a box in group 1
+        starts = np.searchsorted(sorted_mins2, mins1[:, axis], side="left")
+        ends = np.searchsorted(sorted_mins2, maxs1[:, axis], side="right")
+        a1, a2 = self.expand_ranges(starts, ends)
+        a2 = order2[a2]
+
+        # Boxes in group 1 which start strictly within the swept extent of a box in group 2
+        starts = np.searchsorted(sorted_mins1, mins2[:, axis], side="right")
+        ends = np.searchsorted(sorted_mins1, maxs2[:, axis], side="right")
+        b2, b1 = self.expand_ranges(starts, ends)
+        b1 = order1[b1]
+
+        i = np.concatenate((a1, b1))
+        j = np.concatenate((a2, b2))
+        overlaps = np.all(
+            (mins1[i][:, others] <= maxs2[j][:, others]) & (mins2[j][:, others] <= maxs1[i][:, others]), axis=1
+        )
+        i, j = i[overlaps], j[overlaps]
+
+        # An object is never clashed against itself, and if an object belongs
+        # to both groups its pairs are only checked from its first occurrence.
+        index1 = {id: n for n, id in enumerate(ids1)}
+        positions = np.array([index1.get(id, len(ids1)) for id in ids2], dtype=np.int64)
+        is_unchecked = positions[j] > i
+        i, j = i[is_unchecked], j[is_unchecked]
+
+        order = np.lexsort((j, i))
+        potential_collisions = np.stack((i[order], j[order]), axis=1)
+        elapsed = time.time() - start
+        self.logger.info(f"Finished broadphase {elapsed} ({len(potential_collisions)} candidate pairs)")
         return potential_collisions
 
     def collide_narrowphase(self, name1, name2, potential_collisions):
-        import time
+        global _worker_state
 
         start = time.time()
         self.logger.info("Starting narrowphase")
+        ids1 = list(self.groups[name1]["objects"].keys())
+        ids2 = list(self.groups[name2]["objects"].keys())
+        _worker_state = (list(self.groups[name1]["objects"].values()), list(self.groups[name2]["objects"].values()))
+        chunks = [
+            potential_collisions[i : i + self.chunk_size] for i in range(0, len(potential_collisions), self.chunk_size)
+        ]
+        try:
+            if self.processes != 1 and len(chunks) > 1 and "fork" in multiprocessing.get_all_start_methods():
+                with multiprocessing.get_context("fork").Pool(self.processes) as pool:
+                    results = pool.map(collide_pairs, chunks)
+            else:
+                results = [collide_pairs(chunk) for chunk in chunks]
+        finally:
+            _worker_state = None
+
         collisions = []
-        for data in potential_collisions:
-            result = hppfcl.CollisionResult()
-            hppfcl.collide(
-                self.groups[name1]["objects"][data["id1"]],
-                self.groups[name2]["objects"][data["id2"]],
-                hppfcl.CollisionRequest(),
-                result,
-            )
-            if result.isCollision():
-                collisions.append({"id1": data["id1"], "id2": data["id2"], "collision": result})
-        self.logger.info(f"Finished narrowphase {time.time() - start}")
+        for chunk in results:
+            for i, j, normal, position, penetration_depth in chunk:
+                collisions.append(
+                    {
+                        "id1": ids1[i],
+                        "id2": ids2[j],
+                        "normal": normal,
+                        "position": position,
+                        "penetration_depth": penetration_depth,
+                    }
+                )
+        elapsed = time.time() - start
+        rate = len(potential_collisions) / elapsed if elapsed else 0
+        self.logger.info(
+            f"Finished narrowphase {elapsed} ({len(potential_collisions)} pairs, {rate:.0f} pairs/s, {len(collisions)} collisions)"
+        )
         return collisions
 
+    def get_aabbs(self, name):
+        aabbs = self.groups[name]["aabbs"]
+        if not aabbs:
+            return [], np.empty((0, 3)), np.empty((0, 3))
+        boxes = np.array(list(aabbs.values()))
+        return list(aabbs.keys()), boxes[:, 0], boxes[:, 1]
+
+    def expand_ranges(self, starts, ends):
+        counts = np.maximum(ends - starts, 0)
+        rows = np.repeat(np.arange(len(starts)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return rows, np.repeat(starts, counts) + offsets
+
+    def create_aabb(self, bounds, m):
+        if bounds is None:
+            return np.full(3, np.inf), np.full(3, -np.inf)
+        rotation = np.array([[m[0], m[3], m[6]], [m[1], m[4], m[7]], [m[2], m[5], m[8]]])
+        corners = np.array(np.meshgrid(*zip(*bounds), indexing="ij")).reshape(3, -1).T
+        corners = corners @ rotation.T + np.array([m[9], m[10], m[11]])
+        return corners.min(axis=0), corners.max(axis=0)
+
     def create_transform(self, m):
         mat = np.array([[m[0], m[3], m[6], m[9]], [m[1], m[4], m[7], m[10]], [m[2], m[5], m[8], m[11]], [0, 0, 0, 1]])
         mat.transpose()
         return hppfcl.Transform3f(mat[:3, :3], mat[:3, 3])
 
-    def create_bvh(self, mesh):
-        v = mesh.verts
-        f = mesh.faces
-        mesh_verts = np.array([[v[i], v[i + 1], v[i + 2]] for i in range(0, len(v), 3)])
-        mesh_faces = [(int(f[i]), int(f[i + 1]), int(f[i + 2])) for i in range(0, len(f), 3)]
+    def get_bvh(self, mesh, key=None):
+        # Mapped items and typed elements share representations, so the same
+        # BVH can be reused by multiple collision objects. Representation ids
+        # are only unique within a file, so BVHs are keyed by file and id.
+        if key is None:
+            key = (None, mesh.id)
+        bvh = self.bvhs.get(key)
+        if bvh is None:
+            mesh_verts, mesh_faces = self.get_mesh_arrays(mesh)
+            bvh = self.bvhs[key] = self.create_bvh(mesh_verts, mesh_faces)
+            self.bounds[key] = (mesh_verts.min(axis=0), mesh_verts.max(axis=0)) if len(mesh_verts) else None
+        return bvh
 
+    def create_bvh(self, mesh_verts, mesh_faces):
         bvh = hppfcl.BVHModelOBB()
         bvh.beginModel(len(mesh_faces), len(mesh_verts))
-        vertices = hppfcl.StdVec_Vec3f()
-        [vertices.append(v) for v in mesh_verts]
-        triangles = hppfcl.StdVec_Triangle()
-        [triangles.append(hppfcl.Triangle(f[0], f[1], f[2])) for f in mesh_faces]
-        bvh.addSubModel(vertices, triangles)
+        bvh.addVertices(mesh_verts)
+        bvh.addTriangles(mesh_faces)
         bvh.endModel()
         return bvh
+
+    def get_mesh_arrays(self, mesh):
+        if hasattr(mesh, "verts_buffer"):
+            verts = np.frombuffer(mesh.verts_buffer, dtype=np.float64)
+            faces = np.frombuffer(mesh.faces_buffer, dtype=np.intc)
+        else:
+            verts = np.array(mesh.verts, dtype=np.float64)
+            faces = np.array(mesh.faces, dtype=np.intc)
+        return verts.reshape((-1, 3)), faces.reshape((-1, 3)).astype(np.int64)
@@ -36,7 +36,9 @@ class Clasher:
         self.settings = settings
         self.geom_settings = ifcopenshell.geom.settings()
         self.clash_sets = []
-        self.collider = collider.Collider(self.settings.logger)
+        self.collider = collider.Collider(
+            self.settings.logger, processes=self.settings.processes, chunk_size=self.settings.chunk_size
+        )
         self.selector = ifcopenshell.util.selector.Selector()
         self.ifcs = {}
 
@@ -68,7 +70,6 @@ class Clasher:
             else:
                 element2 = self.get_element(clash_set["a"], result["id2"])
 
-            contact = result["collision"].getContacts()[0]
             processed_results[f"{result['id1']}-{result['id2']}"] = {
                 "a_global_id": result["id1"],
                 "b_global_id": result["id2"],
@@ -76,9 +77,9 @@ class Clasher:
                 "b_ifc_class": element2.is_a(),
                 "a_name": element1.Name,
                 "b_name": element2.Name,
-                "normal": list(contact.normal),
-                "position": list(contact.pos),
-                "penetration_depth": contact.penetration_depth,
+                "normal": result["normal"],
+                "position": result["position"],
+                "penetration_depth": result["penetration_depth"],
             }
         clash_set["clashes"] = processed_results
 
@@ -296,3 +297,5 @@ class ClashSettings:
     def __init__(self):
         self.logger = None
         self.output = "clashes.json"
+        self.processes = 1
+        self.chunk_size = 10000
@@ -24,8 +24,10 @@ import ifcopenshell
 from deepdiff import DeepDiff
 import time
 import json
+import hashlib
 import argparse
 import decimal
+import multiprocessing
 
 
 class IfcDiff:
@@ -34,7 +36,7 @@ class IfcDiff:
         self.new_file = new_file
         self.output_file = output_file
         self.change_register = {}
-        self.representation_ids = []
+        self.representation_ids = set()
         self.inverse_classes = inverse_classes
         self.precision = 2
 
@@ -62,15 +64,15 @@ class IfcDiff:
         for global_id in same_elements:
             total_diffed += 1
             print("{}/{} diffed ...".format(total_diffed, total_same_elements), end="\r", flush=True)
-            old_element = self.old.by_id(global_id)
-            new_element = self.new.by_id(global_id)
+            old_element = self.old.by_guid(global_id)
+            new_element = self.new.by_guid(global_id)
             self.diff_element(old_element, new_element)
             self.diff_element_inverse_relationships(old_element, new_element)
 
             representation_id = self.get_representation_id(new_element)
             if representation_id in self.representation_ids:
                 continue
-            self.representation_ids.append(representation_id)
+            self.representation_ids.add(representation_id)
             self.diff_element_geometry(old_element, new_element)
 
         print(" - {} item(s) were changed either geometrically or with data".format(len(self.change_register.keys())))
@@ -213,6 +215,213 @@ class IfcDiff:
                 return representation.Items[0].MappingSource.MappedRepresentation.id()
 
 
+class ContentHasher:
+    """Computes canonical content hashes of an element's attribute subgraph
+
+    STEP ids are ignored and numbers are rounded to the diff precision, so
+    two elements hash equally if DeepDiff would consider them the same. Each
+    referenced instance is only hashed once and then reused by every element
+    that references it. Data, placement, geometry and relationships are
+    hashed separately so that only the relevant comparison is made.
+    """
+
+    # Mirrors the paths excluded from the DeepDiff of an element's data
+    data_exclusions = ("OwnerHistory", "ObjectPlacement")
+    relationship_exclusions = (
+        "GlobalId",
+        "OwnerHistory",
+        "RelatedObjects",
+        "RelatingObject",
+        "RelatingDefinitions",
+        "RelatedObjectsType",
+    )
+
+    def __init__(self, precision=2, inverse_classes=None):
+        self.precision = precision
+        self.inverse_classes = inverse_classes
+        self.data_hashes = {}
+        self.full_hashes = {}
+        self.relationship_hashes = {}
+
+    def hash_element(self, element):
+        return (
+            self.hash_instance(element, self.data_hashes, self.is_data_attribute),
+            self.hash_value(element.ObjectPlacement, self.full_hashes, None),
+            self.hash_geometry(element),
+            self.hash_relationships(element),
+        )
+
+    def hash_geometry(self, element):
+        features = []
+        for inverse, attribute in (
+            ("HasOpenings", "RelatedOpeningElement"),
+            ("HasProjections", "RelatedFeatureElement"),
+        ):
+            for rel in getattr(element, inverse, None) or []:
+                feature = getattr(rel, attribute)
+                features.append(self.hash_value(feature.ObjectPlacement, self.full_hashes, None))
+                features.append(self.hash_value(feature.Representation, self.full_hashes, None))
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.hash_value(element.Representation, self.full_hashes, None).encode())
+        for feature in sorted(features):
+            digest.update(feature.encode())
+        return digest.hexdigest()
+
+    def hash_relationships(self, element):
+        if not self.inverse_classes:
+            return None
+        relationships = element.wrapped_data.file.get_inverse(element)
+        if self.inverse_classes[0] != "all":
+            relationships = [r for r in relationships if r.is_a() in self.inverse_classes]
+        hashes = sorted(
+            self.hash_instance(r, self.relationship_hashes, self.is_relationship_attribute) for r in relationships
+        )
+        return hashlib.blake2b("".join(hashes).encode(), digest_size=16).hexdigest()
+
+    def is_data_attribute(self, name):
+        return name not in self.data_exclusions and "Representation" not in name
+
+    def is_relationship_attribute(self, name):
+        return name not in self.relationship_exclusions
+
+    def hash_instance(self, instance, hashes, is_included):
+        step_id = instance.id()
+        result = hashes.get(step_id)
+        if result is not None:
+            return result
+        digest = hashlib.blake2b(instance.is_a().encode(), digest_size=16)
+        for i in range(len(instance)):
+            if is_included and not is_included(instance.attribute_name(i)):
+                continue
+            digest.update(b"|")
+            digest.update(self.hash_value(instance[i], hashes, is_included).encode())
+        result = hashes[step_id] = digest.hexdigest()
+        return result
+
+    def hash_value(self, value, hashes, is_included):
+        if value is None:
+            return "$"
+        elif isinstance(value, ifcopenshell.entity_instance):
+            if value.id():
+                return self.hash_instance(value, hashes, is_included)
+            return value.is_a() + "(" + self.hash_value(value.wrappedValue, hashes, is_included) + ")"
+        elif isinstance(value, (tuple, list)):
+            return "(" + ",".join(self.hash_value(v, hashes, is_included) for v in value) + ")"
+        elif isinstance(value, bool):
+            return str(value)
+        elif isinstance(value, (int, float)):
+            return format(round(value, self.precision) + 0.0, ".{}f".format(self.precision))
+        return repr(str(value))
+
+
+# Files are shared with forked worker processes, otherwise each worker opens them once
+_worker_files = {}
+_worker_hashers = {}
+
+
+def hash_elements(path, global_ids, precision, inverse_classes):
+    ifc_file = _worker_files.get(path)
+    if ifc_file is None:
+        ifc_file = _worker_files[path] = ifcopenshell.open(path)
+    hasher = _worker_hashers.get(path)
+    if hasher is None:
+        hasher = _worker_hashers[path] = ContentHasher(precision, inverse_classes)
+    return {global_id: hasher.hash_element(ifc_file.by_guid(global_id)) for global_id in global_ids}
+
+
+class IfcHashDiff(IfcDiff):
+    """A diff engine which compares content hashes before falling back to DeepDiff
+
+    Hashes of each retained element are computed in a pool of worker
+    processes. Only elements with differing data or relationship hashes
+    are diffed with DeepDiff, and differing placement or geometry hashes
+    are reported as a geometry change. Results are streamed to the output
+    file as JSON Lines as they are found, instead of being kept in memory.
+    """
+
+    def __init__(self, old_file, new_file, output_file, inverse_classes=None, processes=None, chunk_size=1000):
+        super().__init__(old_file, new_file, output_file, inverse_classes)
+        self.processes = processes or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self.total_changed = 0
+
+    def diff(self):
+        print("# IFC Diff")
+        self.load()
+
+        self.precision = self.get_precision()
+
+        old_elements = set(e.GlobalId for e in self.old.by_type("IfcProduct"))
+        new_elements = set(e.GlobalId for e in self.new.by_type("IfcProduct"))
+
+        self.deleted_elements = old_elements - new_elements
+        self.added_elements = new_elements - old_elements
+        same_elements = sorted(new_elements - self.added_elements)
+
+        print(" - {} item(s) were deleted".format(len(self.deleted_elements)))
+        print(" - {} item(s) were added".format(len(self.added_elements)))
+        print(" - {} item(s) were retained between the old and new IFC file".format(len(same_elements)))
+
+        start = time.time()
+        with open(self.output_file, "w", encoding="utf-8") as self.diff_file:
+            for global_id in sorted(self.added_elements):
+                self.emit({"GlobalId": global_id, "change": "added"})
+            for global_id in sorted(self.deleted_elements):
+                self.emit({"GlobalId": global_id, "change": "deleted"})
+            old_hashes, new_hashes = self.hash_elements(same_elements)
+            print("# Hashing finished in {:.2f} seconds".format(time.time() - start))
+            for global_id in same_elements:
+                self.diff_hashes(global_id, old_hashes[global_id], new_hashes[global_id])
+
+        print(" - {} item(s) were changed either geometrically or with data".format(self.total_changed))
+        print("# Diff finished in {:.2f} seconds".format(time.time() - start))
+
+    def export(self):
+        # Results are already streamed to the output file during diffing
+        pass
+
+    def hash_elements(self, global_ids):
+        global _worker_files
+        _worker_files = {self.old_file: self.old, self.new_file: self.new}
+        chunks = [global_ids[i : i + self.chunk_size] for i in range(0, len(global_ids), self.chunk_size)]
+        tasks = [
+            (path, chunk, self.precision, self.inverse_classes)
+            for path in (self.old_file, self.new_file)
+            for chunk in chunks
+        ]
+        old_hashes = {}
+        new_hashes = {}
+        if self.processes == 1:
+            results = [hash_elements(*task) for task in tasks]
+        else:
+            with multiprocessing.Pool(self.processes) as pool:
+                results = pool.starmap(hash_elements, tasks)
+        for task, result in zip(tasks, results):
+            (old_hashes if task[0] == self.old_file else new_hashes).update(result)
+        return old_hashes, new_hashes
+
+    def diff_hashes(self, global_id, old_hash, new_hash):
+        if old_hash == new_hash:
+            return
+        old_data, old_placement, old_geometry, old_relationships = old_hash
+        new_data, new_placement, new_geometry, new_relationships = new_hash
+        self.change_register = {}
+        old_element = self.old.by_guid(global_id)
+        new_element = self.new.by_guid(global_id)
+        if old_data != new_data:
+            self.diff_element(old_element, new_element)
+        if old_relationships != new_relationships:
+            self.diff_element_inverse_relationships(old_element, new_element)
+        if old_placement != new_placement or old_geometry != new_geometry:
+            self.change_register.setdefault(global_id, {}).update({"has_geometry_change": True})
+        if self.change_register:
+            self.total_changed += 1
+            self.emit({"GlobalId": global_id, "change": "changed", "diff": self.change_register[global_id]})
+
+    def emit(self, result):
+        self.diff_file.write(json.dumps(result, cls=DiffEncoder) + "\n")
+
+
 class DiffEncoder(json.JSONEncoder):
     def default(self, obj):
         try:
@@ -235,8 +444,19 @@ if __name__ == "__main__":
         help='A list of IFC classes to check in inverse relationships, like "IfcRelDefinesByProperties", or "all".',
         default="",
     )
+    parser.add_argument(
+        "--hash",
+        action="store_true",
+        help="Compare content hashes first, diffing in parallel and streaming results as JSON Lines",
+    )
+    parser.add_argument(
+        "-p", "--processes", type=int, help="The number of processes to hash with. Defaults to all CPUs", default=None
+    )
     args = parser.parse_args()
 
-    ifc_diff = IfcDiff(args.old, args.new, args.output, args.relationships.split())
+    if args.hash:
+        ifc_diff = IfcHashDiff(args.old, args.new, args.output, args.relationships.split(), processes=args.processes)
+    else:
+        ifc_diff = IfcDiff(args.old, args.new, args.output, args.relationships.split())
     ifc_diff.diff()
     ifc_diff.export()
@@ -0,0 +1,64 @@
+"""Compares the throughput of common usecases with and without api.batch
+
+Usage: python -m benchmark.bench_api_batch [number_of_walls]
+"""
+
+import sys
+import time
+import ifcopenshell
+import ifcopenshell.api
+
+
+def create_model(total_walls):
+    f = ifcopenshell.api.run("project.create_file")
+    ifcopenshell.api.run("root.create_entity", f, ifc_class="IfcProject")
+    for i in range(total_walls):
+        ifcopenshell.api.run("root.create_entity", f, ifc_class="IfcWall")
+    return f
+
+
+def create_entity(f, walls):
+    for wall in walls:
+        ifcopenshell.api.run("root.create_entity", f, ifc_class="IfcSlab")
+
+
+def edit_attributes(f, walls):
+    for wall in walls:
+        ifcopenshell.api.run("attribute.edit_attributes", f, product=wall, attributes={"Name": "Wall"})
+
+
+def add_and_edit_pset(f, walls):
+    for wall in walls:
+        pset = ifcopenshell.api.run("pset.add_pset", f, product=wall, name="Pset_WallCommon")
+        ifcopenshell.api.run("pset.edit_pset", f, pset=pset, properties={"IsExternal": True, "FireRating": "2HR"})
+
+
+def run_in_transaction(f, sweep, walls):
+    f.begin_transaction()
+    sweep(f, walls)
+    f.end_transaction()
+
+
+def run_in_batch(f, sweep, walls):
+    with ifcopenshell.api.batch(f):
+        sweep(f, walls)
+
+
+if __name__ == "__main__":
+    total_walls = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    notifications = []
+    for usecase_path in ("root.create_entity", "attribute.edit_attributes", "pset.edit_pset"):
+        ifcopenshell.api.add_post_listener(usecase_path, "benchmark", lambda *args: notifications.append(args[0]))
+    for sweep in (create_entity, edit_attributes, add_and_edit_pset):
+        for mode in (run_in_transaction, run_in_batch):
+            f = create_model(total_walls)
+            walls = f.by_type("IfcWall")
+            del notifications[:]
+            start = time.perf_counter()
+            mode(f, sweep, walls)
+            duration = time.perf_counter() - start
+            print(
+                "{:<20} {:<20} {:7.3f}s {:9.0f} walls/s {:6d} notifications".format(
+                    sweep.__name__, mode.__name__, duration, total_walls / duration, len(notifications)
+                )
+            )
@@ -0,0 +1,41 @@
+"""Measures attribute reads and writes by name across schemas
+
+Usage: python -m benchmark.bench_attribute_access [number_of_iterations]
+"""
+
+import sys
+import timeit
+import ifcopenshell
+import ifcopenshell.api
+
+
+def create_wall(f):
+    placement = f.createIfcLocalPlacement()
+    wall = f.createIfcWall(ifcopenshell.guid.new(), Name="Wall", ObjectPlacement=placement)
+    f.createIfcRelAggregates(ifcopenshell.guid.new(), RelatedObjects=[wall])
+    return wall
+
+
+def run(schema, number):
+    f = ifcopenshell.file(schema=schema)
+    wall = create_wall(f)
+    point = f.createIfcCartesianPoint((0.0, 0.0, 0.0))
+    statements = {
+        "read string": lambda: wall.Name,
+        "read reference": lambda: wall.ObjectPlacement,
+        "read inverse": lambda: wall.Decomposes,
+        "read aggregate": lambda: point.Coordinates,
+        "read missing": lambda: hasattr(wall, "Foo"),
+        "write string": lambda: setattr(wall, "Name", "Foo"),
+        "write reference": lambda: setattr(wall, "ObjectPlacement", None),
+    }
+    for name, statement in statements.items():
+        duration = timeit.timeit(statement, number=number)
+        print("{:<8} {:<16} {:8.3f} us".format(schema, name, duration / number * 1e6))
+
+
+if __name__ == "__main__":
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for schema in ("IFC2X3", "IFC4", "IFC4X3"):
+        if schema in ifcopenshell.ifcopenshell_wrapper.schema_names():
+            run(schema, number)
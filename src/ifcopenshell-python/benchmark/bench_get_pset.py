@@ -0,0 +1,46 @@
+"""Compares reading one property through get_psets, get_pset and get_pset_values
+
+Usage: python -m benchmark.bench_get_pset [number_of_walls]
+"""
+
+import sys
+import time
+import ifcopenshell
+import ifcopenshell.api
+import ifcopenshell.util.element
+
+
+def create_model(total_walls):
+    f = ifcopenshell.api.run("project.create_file")
+    properties = {"Prop{}".format(i): "Value {}".format(i) for i in range(20)}
+    for i in range(total_walls):
+        wall = ifcopenshell.api.run("root.create_entity", f, ifc_class="IfcWall")
+        for name in ("Pset_WallCommon", "Pset_Other", "Pset_Extra"):
+            pset = ifcopenshell.api.run("pset.add_pset", f, product=wall, name=name)
+            ifcopenshell.api.run("pset.edit_pset", f, pset=pset, properties=properties)
+    return f
+
+
+def get_psets(walls):
+    results = []
+    for wall in walls:
+        results.append(ifcopenshell.util.element.get_psets(wall).get("Pset_WallCommon", {}).get("Prop10"))
+    return results
+
+
+def get_pset(walls):
+    return [ifcopenshell.util.element.get_pset(wall, "Pset_WallCommon", "Prop10") for wall in walls]
+
+
+def get_pset_values(walls):
+    return ifcopenshell.util.element.get_pset_values(walls, "Pset_WallCommon", "Prop10")
+
+
+if __name__ == "__main__":
+    total_walls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    f = create_model(total_walls)
+    walls = f.by_type("IfcWall")
+    for fn in (get_psets, get_pset, get_pset_values):
+        start = time.perf_counter()
+        fn(walls)
+        print("{:<16} {:7.3f}s".format(fn.__name__, time.perf_counter() - start))
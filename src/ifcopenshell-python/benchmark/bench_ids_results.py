@@ -0,0 +1,74 @@
+"""Compares IDS validation when reporting all outcomes, only failures, and no messages at all
+
+Usage: python -m benchmark.bench_ids_results [number_of_walls] [number_of_specifications]
+"""
+
+import sys
+import time
+import logging
+import ifcopenshell
+import ifcopenshell.api
+from ifcopenshell import ids
+
+
+def create_model(total_walls):
+    f = ifcopenshell.api.run("project.create_file")
+    ifcopenshell.api.run("root.create_entity", f, ifc_class="IfcProject")
+    for i in range(total_walls):
+        wall = ifcopenshell.api.run("root.create_entity", f, ifc_class="IfcWall", name="Wall {}".format(i))
+        pset = ifcopenshell.api.run("pset.add_pset", f, product=wall, name="Pset_WallCommon")
+        # One in ten walls fails the fire rating requirement
+        fire_rating = "1HR" if i % 10 == 0 else "2HR"
+        ifcopenshell.api.run("pset.edit_pset", f, pset=pset, properties={"FireRating": fire_rating})
+    return f
+
+
+def create_ids(total_specifications):
+    ids_file = ids.ids()
+    for i in range(total_specifications):
+        ids_file.specifications.append(
+            ids.specification.parse(
+                {
+                    "@name": "Specification {}".format(i),
+                    "@necessity": "required",
+                    "applicability": {"entity": {"name": {"simpleValue": "IfcWall"}}},
+                    "requirements": {
+                        "property": {
+                            "@location": "any",
+                            "propertyset": {"simpleValue": "Pset_WallCommon"},
+                            "name": {"simpleValue": "FireRating"},
+                            "value": {"simpleValue": "2HR"},
+                        }
+                    },
+                }
+            )
+        )
+    return ids_file
+
+
+def get_logger(level, report_valid):
+    logger = logging.getLogger("benchmark.{}.{}".format(level, report_valid))
+    logger.propagate = False
+    logger.setLevel(level)
+    logger.addHandler(ids.SimpleHandler(report_valid=report_valid))
+    return logger
+
+
+if __name__ == "__main__":
+    total_walls = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    total_specifications = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    f = create_model(total_walls)
+    modes = {
+        "report all outcomes": get_logger(logging.INFO, True),
+        "report failures": get_logger(logging.INFO, False),
+        "results only": get_logger(logging.CRITICAL, False),
+    }
+    for mode, logger in modes.items():
+        ids_file = create_ids(total_specifications)
+        start = time.perf_counter()
+        results = ids_file.validate(f, logger)
+        duration = time.perf_counter() - start
+        print("{:<24} {:7.3f}s {:8d} outcomes".format(mode, duration, len(results)))
+    start = time.perf_counter()
+    results.to_json()
+    print("{:<24} {:7.3f}s".format("render failures as json", time.perf_counter() - start))
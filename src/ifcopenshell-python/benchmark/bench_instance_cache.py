@@ -0,0 +1,84 @@
+"""Compares traversal and set workloads with and without the instance cache
+
+Usage: python -m benchmark.bench_instance_cache [number_of_walls]
+"""
+
+import sys
+import time
+import tracemalloc
+import ifcopenshell
+import ifcopenshell.api
+from ifcopenshell.entity_instance import entity_instance
+
+wrappers_created = 0
+entity_instance_init = entity_instance.__init__
+
+
+def counting_init(self, *args, **kwargs):
+    global wrappers_created
+    wrappers_created += 1
+    entity_instance_init(self, *args, **kwargs)
+
+
+def create_model(total_walls):
+    f = ifcopenshell.api.run("project.create_file")
+    history = f.createIfcOwnerHistory()
+    origin = f.createIfcAxis2Placement3D(f.createIfcCartesianPoint((0.0, 0.0, 0.0)))
+    storey = f.createIfcLocalPlacement(RelativePlacement=origin)
+    for i in range(total_walls):
+        point = f.createIfcCartesianPoint((float(i), 0.0, 0.0))
+        placement = f.createIfcLocalPlacement(storey, f.createIfcAxis2Placement3D(point))
+        wall = f.createIfcWall(ifcopenshell.guid.new(), history, ObjectPlacement=placement)
+        f.createIfcRelDefinesByProperties(ifcopenshell.guid.new(), history, RelatedObjects=[wall])
+    return f
+
+
+def traverse_and_union(f):
+    # Mimics collecting the unique subgraph of many elements, as in ifcpatch or ifcdiff
+    seen = set()
+    for wall in f.by_type("IfcWall"):
+        seen |= set(f.traverse(wall)) - seen
+    return len(seen)
+
+
+def traverse_and_subtract(f):
+    # Mimics the subgraph checks performed by util.element.remove_deep
+    total = 0
+    for wall in f.by_type("IfcWall"):
+        subgraph = set(f.traverse(wall, max_levels=1))
+        for ref in subgraph:
+            if ref.is_a("IfcOwnerHistory"):
+                continue
+            total += len(f.get_inverse(ref) - subgraph)
+    return total
+
+
+def run(f, workload, enabled):
+    global wrappers_created
+    f.set_instance_cache(enabled)
+    start = time.perf_counter()
+    workload(f)
+    duration = time.perf_counter() - start
+
+    f.set_instance_cache(enabled)
+    wrappers_created = 0
+    entity_instance.__init__ = counting_init
+    tracemalloc.start()
+    workload(f)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    entity_instance.__init__ = entity_instance_init
+
+    print(
+        "{:<22} cache={:<6} {:7.3f}s  peak {:8.2f} MB  wrappers created {}".format(
+            workload.__name__, str(enabled), duration, peak / 1024 / 1024, wrappers_created
+        )
+    )
+
+
+if __name__ == "__main__":
+    total_walls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    f = create_model(total_walls)
+    for workload in (traverse_and_union, traverse_and_subtract):
+        run(f, workload, False)
+        run(f, workload, True)
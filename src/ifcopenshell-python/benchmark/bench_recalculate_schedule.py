@@ -0,0 +1,63 @@
+"""Times recalculating the critical path of a synthetic work schedule
+
+Usage: python -m benchmark.bench_recalculate_schedule [number_of_tasks]
+"""
+
+import sys
+import time
+import random
+import ifcopenshell
+import ifcopenshell.api
+import ifcopenshell.guid
+
+
+def create_model(total_tasks, seed=0):
+    rng = random.Random(seed)
+    f = ifcopenshell.api.run("project.create_file")
+    ifcopenshell.api.run("root.create_entity", f, ifc_class="IfcProject")
+    schedule = ifcopenshell.api.run("sequence.add_work_schedule", f)
+    calendar = ifcopenshell.api.run("sequence.add_work_calendar", f)
+    work_time = ifcopenshell.api.run("sequence.add_work_time", f, work_calendar=calendar, time_type="WorkingTimes")
+    pattern = ifcopenshell.api.run("sequence.assign_recurrence_pattern", f, parent=work_time)
+    ifcopenshell.api.run(
+        "sequence.edit_recurrence_pattern",
+        f,
+        recurrence_pattern=pattern,
+        attributes={"WeekdayComponent": [1, 2, 3, 4, 5]},
+    )
+
+    # Entities are created directly as running the full API for every task
+    # would dominate the setup time of large schedules.
+    sequence_types = ["FINISH_START", "FINISH_START", "START_START", "FINISH_FINISH", "START_FINISH"]
+    tasks = []
+    for i in range(total_tasks):
+        task_time = f.createIfcTaskTime(
+            DurationType=rng.choice(["WORKTIME", "WORKTIME", "ELAPSEDTIME"]),
+            ScheduleDuration="P{}D".format(rng.randint(1, 20)),
+            ScheduleStart="2022-01-03T09:00:00",
+        )
+        task = f.createIfcTask(ifcopenshell.guid.new(), Name="Task {}".format(i), TaskTime=task_time)
+        for j in rng.sample(range(max(0, i - 50), i), min(i, rng.randint(1, 2))):
+            lag = None
+            if rng.random() < 0.2:
+                lag = f.createIfcLagTime(LagValue=f.createIfcDuration("P{}D".format(rng.randint(1, 5))))
+            f.createIfcRelSequence(
+                ifcopenshell.guid.new(),
+                RelatingProcess=tasks[j],
+                RelatedProcess=task,
+                TimeLag=lag,
+                SequenceType=rng.choice(sequence_types),
+            )
+        tasks.append(task)
+    f.createIfcRelAssignsToControl(ifcopenshell.guid.new(), RelatedObjects=tasks, RelatingControl=schedule)
+    f.createIfcRelAssignsToControl(ifcopenshell.guid.new(), RelatedObjects=tasks, RelatingControl=calendar)
+    return f, schedule
+
+
+if __name__ == "__main__":
+    total_tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    f, schedule = create_model(total_tasks)
+    for label in ("first", "unchanged"):
+        start = time.perf_counter()
+        ifcopenshell.api.run("sequence.recalculate_schedule", f, work_schedule=schedule)
+        print("{:<16} {:7.3f}s".format(label, time.perf_counter() - start))
@@ -0,0 +1,64 @@
+"""Compares the undo / redo throughput and memory of the transaction logs
+
+Usage: python -m benchmark.bench_transaction [number_of_walls]
+"""
+
+import sys
+import time
+import tracemalloc
+import ifcopenshell
+import ifcopenshell.api
+import ifcopenshell.util.element
+from ifcopenshell.file import Transaction, DictTransaction
+
+
+def create_model(total_walls):
+    f = ifcopenshell.api.run("project.create_file")
+    for i in range(total_walls):
+        point = f.createIfcCartesianPoint((float(i), 0.0, 0.0))
+        placement = f.createIfcLocalPlacement(RelativePlacement=f.createIfcAxis2Placement3D(point))
+        f.createIfcWall(ifcopenshell.guid.new(), Name="Wall {}".format(i), ObjectPlacement=placement)
+    return f
+
+
+def edit_placements(f):
+    for wall in f.by_type("IfcWall"):
+        point = f.createIfcCartesianPoint((0.0, 1.0, 0.0))
+        wall.ObjectPlacement = f.createIfcLocalPlacement(RelativePlacement=f.createIfcAxis2Placement3D(point))
+        wall.Name = "Moved"
+
+
+def remove_walls(f):
+    for wall in f.by_type("IfcWall"):
+        ifcopenshell.util.element.remove_deep(f, wall)
+
+
+def run(transaction_class, sweep, total_walls):
+    f = create_model(total_walls)
+    f.transaction_class = transaction_class
+    tracemalloc.start()
+    start = time.perf_counter()
+    f.begin_transaction()
+    sweep(f)
+    f.end_transaction()
+    record = time.perf_counter() - start
+    nbytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    f.undo()
+    undo = time.perf_counter() - start
+    start = time.perf_counter()
+    f.redo()
+    redo = time.perf_counter() - start
+    print(
+        "{:<16} {:<16} record {:7.3f}s  undo {:7.3f}s  redo {:7.3f}s  log {:8.2f} MB".format(
+            transaction_class.__name__, sweep.__name__, record, undo, redo, nbytes / 1024 / 1024
+        )
+    )
+
+
+if __name__ == "__main__":
+    total_walls = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    for sweep in (edit_placements, remove_walls):
+        for transaction_class in (DictTransaction, Transaction):
+            run(transaction_class, sweep, total_walls)
@@ -21,6 +21,7 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import io
 import os
 import sys
 
@@ -68,7 +69,20 @@ class SchemaError(Error):
 
 
 def open(fn):
-    f = ifcopenshell_wrapper.open(os.path.abspath(fn))
+    """Opens an IFC-SPF file, or an .ifczip archive containing one
+
+    Archives are decompressed into memory rather than being extracted to a
+    temporary file first.
+
+    :param fn: The path to the file
+    :type fn: str
+    :return: The opened file
+    :rtype: ifcopenshell.file.file
+    """
+    if str(fn).lower().endswith(".ifczip"):
+        f = read_zip(fn)
+    else:
+        f = ifcopenshell_wrapper.open(os.path.abspath(fn))
     if f.good():
         return file(f)
     else:
@@ -83,6 +97,40 @@ def open(fn):
         raise exc(msg)
 
 
+def read_zip(fn):
+    """Parses the first IFC-SPF member of an .ifczip archive
+
+    This is not streamed. The parser needs the whole file in memory, so the
+    member is decompressed in full and the parser then takes its own copy of
+    it, meaning twice the uncompressed size is briefly held in memory.
+
+    :param fn: The path to the archive
+    :type fn: str
+    :return: The parsed file, which is to be wrapped in ifcopenshell.file
+    """
+    import zipfile
+
+    with zipfile.ZipFile(fn) as archive:
+        names = [name for name in archive.namelist() if name.lower().endswith(".ifc")]
+        if not names:
+            raise IOError("No IFC file found in archive")
+        data = archive.read(names[0])
+    if hasattr(ifcopenshell_wrapper, "read_buffer"):
+        return ifcopenshell_wrapper.read_buffer(data)
+    try:
+        return ifcopenshell_wrapper.read(data.decode("utf-8"))
+    except UnicodeDecodeError:
+        # Files which are not valid UTF-8 cannot be passed as a string, so
+        # are parsed from a temporary file instead.
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "data.ifc")
+            with io.open(path, "wb") as f:
+                f.write(data)
+            return ifcopenshell_wrapper.open(path)
+
+
 def create_entity(type, schema="IFC4", *args, **kwargs):
     e = entity_instance((schema, type))
     attrs = list(enumerate(args)) + [(e.wrapped_data.get_argument_index(name), arg) for name, arg in kwargs.items()]
@@ -7,12 +7,21 @@ import ifcopenshell.api
 
 pre_listeners = {}
 post_listeners = {}
+batch_post_listeners = {}
+batches = {}
 
 
 def run(usecase_path, ifc_file=None, should_run_listeners=True, **settings):
+    if batches:
+        active_batch = batches.get(id(ifc_file))
+        if active_batch:
+            return active_batch.run(usecase_path, should_run_listeners, settings)
+
     if should_run_listeners:
         for listener in pre_listeners.get(usecase_path, {}).values():
             listener(usecase_path, ifc_file, settings)
+        for listener in pre_listeners.get("*", {}).values():
+            listener(usecase_path, ifc_file, settings)
 
     def serialise_entity_instance(entity):
         return {"cast_type": "entity_instance", "value": entity.id(), "Name": getattr(entity, "Name", None)}
@@ -50,6 +59,12 @@ def run(usecase_path, ifc_file=None, should_run_listeners=True, **settings):
     if should_run_listeners:
         for listener in post_listeners.get(usecase_path, {}).values():
             listener(usecase_path, ifc_file, settings)
+        for listener in post_listeners.get("*", {}).values():
+            listener(usecase_path, ifc_file, settings)
+        for listener in batch_post_listeners.get(usecase_path, {}).values():
+            listener(usecase_path, ifc_file, [settings])
+        for listener in batch_post_listeners.get("*", {}).values():
+            listener(usecase_path, ifc_file, [settings])
 
     return result
 
@@ -57,7 +72,7 @@ def run(usecase_path, ifc_file=None, should_run_listeners=True, **settings):
 def add_pre_listener(usecase_path, name, callback):
     """Add a pre listener
 
-    :param usecase_path: string, ifcopenshell api use case path
+    :param usecase_path: string, ifcopenshell api use case path, or "*" for all use cases
     :param name: string, name of listener
     :param callback: callback function
     """
@@ -67,13 +82,29 @@ def add_pre_listener(usecase_path, name, callback):
 def add_post_listener(usecase_path, name, callback):
     """Add a post listener
 
-    :param usecase_path: string, ifcopenshell api use case path
+    :param usecase_path: string, ifcopenshell api use case path, or "*" for all use cases
     :param name: string, name of listener
     :param callback: callback function
     """
     post_listeners.setdefault(usecase_path, {})[name] = callback
 
 
+def add_batch_post_listener(usecase_path, name, callback):
+    """Add a post listener which is notified once per batch
+
+    Unlike other post listeners, the callback receives a list of settings
+    rather than a single settings dictionary. Within a batch, it is called
+    once per use case path when the batch finishes, with the settings of
+    every run of that use case. Outside a batch, it is called after every
+    run with a list of one settings dictionary.
+
+    :param usecase_path: string, ifcopenshell api use case path, or "*" for all use cases
+    :param name: string, name of listener
+    :param callback: callback function
+    """
+    batch_post_listeners.setdefault(usecase_path, {})[name] = callback
+
+
 def remove_pre_listener(usecase_path, name, callback):
     """Remove a pre listener
 
@@ -94,9 +125,106 @@ def remove_post_listener(usecase_path, name, callback):
     post_listeners.get(usecase_path, {}).pop(name, None)
 
 
+def remove_batch_post_listener(usecase_path, name, callback):
+    """Remove a post listener which is notified once per batch
+
+    :param usecase_path: string, ifcopenshell api use case path
+    :param name: string, name of listener
+    :param callback: callback function
+    """
+    batch_post_listeners.get(usecase_path, {}).pop(name, None)
+
+
 def remove_all_listeners():
     pre_listeners.clear()
     post_listeners.clear()
+    batch_post_listeners.clear()
+
+
+class batch:
+    """Runs many usecases on a file as a single transaction
+
+    Within a batch, usecases are resolved once per usecase path and the
+    settings are not serialised for version control. Pre listeners still run
+    before every usecase, but post listeners are deferred until the batch
+    finishes. They are then called once per run, in the order the usecases
+    were run. Listeners added with :func:`add_batch_post_listener` are
+    instead called once per usecase path with the settings of every run.
+
+    If the file has no transaction in progress, the batch is recorded as
+    one transaction, which is discarded if an exception is raised.
+
+    Example:
+
+    .. code:: python
+
+        with ifcopenshell.api.batch(model):
+            for wall in model.by_type("IfcWall"):
+                pset = ifcopenshell.api.run("pset.add_pset", model, product=wall, name="Pset_WallCommon")
+                ifcopenshell.api.run("pset.edit_pset", model, pset=pset, properties={"IsExternal": True})
+    """
+
+    def __init__(self, ifc_file):
+        self.file = ifc_file
+        self.usecases = {}
+        self.runs = []
+        self.is_transaction_owner = False
+        self.is_nested = False
+
+    def __enter__(self):
+        if id(self.file) in batches:
+            self.is_nested = True
+            return batches[id(self.file)]
+        if self.file.transaction is None:
+            self.file.begin_transaction()
+            self.is_transaction_owner = True
+        batches[id(self.file)] = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.is_nested:
+            return
+        del batches[id(self.file)]
+        if exc_type is not None:
+            if self.is_transaction_owner:
+                self.file.discard_transaction()
+            return
+        self.notify_post_listeners()
+        if self.is_transaction_owner:
+            self.file.end_transaction()
+
+    def run(self, usecase_path, should_run_listeners, settings):
+        if should_run_listeners:
+            for listener in pre_listeners.get(usecase_path, {}).values():
+                listener(usecase_path, self.file, settings)
+            for listener in pre_listeners.get("*", {}).values():
+                listener(usecase_path, self.file, settings)
+
+        usecase_class = self.usecases.get(usecase_path)
+        if usecase_class is None:
+            usecase_class = importlib.import_module(f"ifcopenshell.api.{usecase_path}").Usecase
+            self.usecases[usecase_path] = usecase_class
+
+        result = usecase_class(self.file, **settings).execute()
+
+        if should_run_listeners:
+            self.runs.append((usecase_path, settings))
+        return result
+
+    def notify_post_listeners(self):
+        runs = {}
+        for usecase_path, settings in self.runs:
+            runs.setdefault(usecase_path, []).append(settings)
+            for listener in list(post_listeners.get(usecase_path, {}).values()):
+                listener(usecase_path, self.file, settings)
+            for listener in list(post_listeners.get("*", {}).values()):
+                listener(usecase_path, self.file, settings)
+        for usecase_path, settings_list in runs.items():
+            for listener in list(batch_post_listeners.get(usecase_path, {}).values()):
+                listener(usecase_path, self.file, settings_list)
+            for listener in list(batch_post_listeners.get("*", {}).values()):
+                listener(usecase_path, self.file, settings_list)
+        self.runs = []
 
 
 def extract_docs(module, usecase):
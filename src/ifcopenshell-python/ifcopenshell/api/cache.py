@@ -0,0 +1,266 @@
+"""Incremental invalidation for the data caches of API modules
+
+The ``Data`` class of an API module caches information derived from a file.
+Instead of rebuilding everything each time it is loaded, a module can own a
+:class:`Cache` which reports the STEP ids of entities touched since the
+module was last loaded. Changes are gathered from the file's transactions
+(including undo and redo) and usecases run through :func:`ifcopenshell.api.run`
+outside of a transaction force a full reload, as their changes are unknown.
+
+A touched entity also touches any entity it references or used to
+reference, so that adding, editing or removing a relationship refreshes the
+data of the elements on both ends of it.
+
+Changes made to a file without a transaction and without the API cannot be
+detected, so a file is only loaded incrementally once it has been seen to
+use transactions. Only the compact :class:`ifcopenshell.file.Transaction`
+log can be read, so any other ``file.transaction_class`` always results in
+a full reload.
+
+Example:
+
+.. code:: python
+
+    cache = ifcopenshell.api.cache.Cache("sequence")
+    changes = cache.get_changes(ifc_file)
+    if changes is None:
+        pass  # Load everything
+    else:
+        pass  # Only reload the entities in changes
+    cache.set_loaded(ifc_file, hits=0, misses=0, reload_time=0.0)
+
+    print(ifcopenshell.api.cache.get_stats())
+"""
+
+import weakref
+import ifcopenshell
+import ifcopenshell.api
+from ifcopenshell.file import Transaction, _ref
+
+caches = {}
+_logs = weakref.WeakKeyDictionary()
+
+
+class Cache:
+    """Tracks whether a module's cached data is up to date with a file"""
+
+    def __init__(self, name):
+        self.name = name
+        self.file = None
+        self.hits = 0
+        self.misses = 0
+        self.full_reloads = 0
+        self.reload_time = 0.0
+        caches[name] = self
+
+    def get_changes(self, ifc_file):
+        """Returns the ids of entities touched since the cache was last loaded
+
+        :param ifc_file: The file which is about to be loaded
+        :type ifc_file: ifcopenshell.file.file
+        :return: A set of STEP ids, or None if everything must be reloaded
+        :rtype: set,None
+        """
+        if self.file is None or self.file() is not ifc_file:
+            return None
+        log = _logs.get(ifc_file)
+        if log is None:
+            return None
+        log.sync(ifc_file)
+        return log.pending.get(self)
+
+    def set_loaded(self, ifc_file, hits=0, misses=0, reload_time=0.0, is_full_reload=False):
+        """Marks the cache as up to date with a file and records statistics
+
+        :param ifc_file: The file which was loaded
+        :type ifc_file: ifcopenshell.file.file
+        :param hits: The number of cached entities which were reused
+        :type hits: int
+        :param misses: The number of entities which were (re)loaded
+        :type misses: int
+        :param reload_time: The time in seconds that the load took
+        :type reload_time: float
+        :param is_full_reload: Whether everything was reloaded
+        :type is_full_reload: bool
+        :return: None
+        :rtype: None
+        """
+        if self.file is not None and self.file() is not ifc_file:
+            previous_log = _logs.get(self.file())
+            if previous_log is not None:
+                previous_log.pending.pop(self, None)
+        self.file = weakref.ref(ifc_file)
+        log = get_log(ifc_file)
+        log.sync(ifc_file)
+        log.pending[self] = set() if log.is_tracked else None
+        self.hits += hits
+        self.misses += misses
+        self.reload_time += reload_time
+        if is_full_reload:
+            self.full_reloads += 1
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.full_reloads = 0
+        self.reload_time = 0.0
+
+
+class ChangeLog:
+    """Accumulates the ids of entities touched in a file for each cache"""
+
+    def __init__(self):
+        self.pending = {}
+        self.is_tracked = False
+        self.transaction = None
+        self.cursor = 0
+        self.total_batch_deletes = 0
+
+    def add(self, ids):
+        for pending in self.pending.values():
+            if pending is not None:
+                pending.update(ids)
+
+    def invalidate(self):
+        for cache in self.pending.keys():
+            self.pending[cache] = None
+
+    def sync(self, ifc_file):
+        transaction = ifc_file.transaction
+        if transaction is None:
+            return
+        self.is_tracked = True
+        if not isinstance(transaction, Transaction):
+            # Only the compact transaction log can be read for changes
+            self.invalidate()
+            return
+        if transaction is not self.transaction:
+            self.transaction = transaction
+            self.cursor = 0
+            self.total_batch_deletes = 0
+        self.read_transaction(transaction)
+
+    def read_transaction(self, transaction):
+        # Unbatching inserts the inverses of batch deleted elements earlier
+        # in the transaction, so the whole transaction is read again.
+        total_batch_deletes = transaction.actions.count(Transaction.BATCH_DELETE)
+        if total_batch_deletes != self.total_batch_deletes:
+            self.total_batch_deletes = total_batch_deletes
+            self.cursor = 0
+        self.add(get_touched_ids(transaction, self.cursor))
+        self.cursor = len(transaction.actions)
+
+    def on_transaction(self, ifc_file, event, transaction):
+        self.is_tracked = True
+        if not isinstance(transaction, Transaction):
+            self.invalidate()
+        elif event == "end" and transaction is self.transaction:
+            self.read_transaction(transaction)
+        else:
+            # Discarded, undone, and redone transactions, as well as those
+            # never synced, may have touched anything they have logged.
+            self.add(get_touched_ids(transaction))
+        if transaction is self.transaction:
+            self.transaction = None
+            self.cursor = 0
+            self.total_batch_deletes = 0
+
+
+def get_log(ifc_file):
+    log = _logs.get(ifc_file)
+    if log is None:
+        log = _logs[ifc_file] = ChangeLog()
+        ifc_file.add_transaction_listener("api.cache", log.on_transaction)
+    return log
+
+
+def get_touched_ids(transaction, start=0):
+    """Returns the ids of entities touched by a transaction
+
+    This includes the entities that were created, edited or deleted, as well
+    as any entities that they reference before or after the change.
+
+    :param transaction: The transaction to read
+    :type transaction: ifcopenshell.file.Transaction
+    :param start: The index of the first operation to read
+    :type start: int
+    :return: A set of STEP ids
+    :rtype: set
+    """
+    ids = set(transaction.ids[start:])
+    ids.discard(0)
+    edited_ids = set()
+    for i in range(start, len(transaction.actions)):
+        action, payload = transaction.actions[i], transaction.payloads[i]
+        if action == Transaction.DELETE:
+            _add_references(payload[1], ids)
+            _add_inverses(payload[2], ids, edited_ids)
+        elif action == Transaction.BATCH_DELETE:
+            _add_inverses(payload, ids, edited_ids)
+        else:
+            _add_references(payload, ids)
+            if action == Transaction.EDIT:
+                edited_ids.add(transaction.ids[i])
+    # An edit only logs the changed attribute, and the inverses of a deleted
+    # element are edited implicitly, but their unchanged attributes may also
+    # reference elements whose data depends on them.
+    for step_id in edited_ids:
+        try:
+            element = transaction.file.by_id(step_id)
+        except RuntimeError:
+            continue
+        for i in range(len(element)):
+            _add_entity_references(element[i], ids)
+    return ids
+
+
+def _add_entity_references(value, ids):
+    if isinstance(value, ifcopenshell.entity_instance):
+        step_id = value.id()
+        if step_id:
+            ids.add(step_id)
+    elif isinstance(value, tuple):
+        for item in value:
+            _add_entity_references(item, ids)
+
+
+def _add_inverses(inverses, ids, edited_ids):
+    for inverse_id, index, value in inverses or ():
+        ids.add(inverse_id)
+        edited_ids.add(inverse_id)
+
+
+def _add_references(value, ids):
+    if isinstance(value, _ref):
+        ids.add(int(value))
+    elif isinstance(value, tuple):
+        for item in value:
+            _add_references(item, ids)
+
+
+def on_post_listener(usecase_path, ifc_file, settings):
+    if ifc_file is None or ifc_file.transaction is not None:
+        return
+    log = _logs.get(ifc_file)
+    if log is not None:
+        log.invalidate()
+
+
+def get_stats():
+    """Returns the hits, misses, and reload times of all module caches
+
+    :return: A dictionary keyed by module name
+    :rtype: dict
+    """
+    return {
+        name: {
+            "hits": cache.hits,
+            "misses": cache.misses,
+            "full_reloads": cache.full_reloads,
+            "reload_time": cache.reload_time,
+        }
+        for name, cache in caches.items()
+    }
+
+
+ifcopenshell.api.add_post_listener("*", "api.cache", on_post_listener)
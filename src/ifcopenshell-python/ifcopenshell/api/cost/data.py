@@ -1,3 +1,5 @@
+import time
+import ifcopenshell.api.cache
 import ifcopenshell.util.date
 import ifcopenshell.util.unit
 import ifcopenshell.util.cost
@@ -141,13 +143,13 @@ class Data(CostValueTrait):
     cost_values = {}
     categories = []
 
+    cache = ifcopenshell.api.cache.Cache("cost")
+
     @classmethod
     def purge(cls):
+        # Loaded data is kept so that the next load only has to refresh the
+        # entities which have since changed.
         cls.is_loaded = False
-        cls.cost_schedules = {}
-        cls.cost_items = {}
-        cls.physical_quantities = {}
-        cls.cost_values = {}
         cls.categories = []
 
     @classmethod
@@ -157,45 +159,122 @@ class Data(CostValueTrait):
     @classmethod
     def load(cls, file):
         cls.file = file
-        cls.cost_schedules = {}
-        cls.cost_items = {}
-        cls.physical_quantities = {}
-        cls.cost_values = {}
-
-        for cost_schedule in cls.file.by_type("IfcCostSchedule"):
-            data = cost_schedule.get_info()
-            del data["OwnerHistory"]
-            if data["SubmittedOn"]:
-                data["SubmittedOn"] = ifcopenshell.util.date.ifc2datetime(data["SubmittedOn"])
-            if data["UpdateDate"]:
-                data["UpdateDate"] = ifcopenshell.util.date.ifc2datetime(data["UpdateDate"])
-            data["Controls"] = []
-            for rel in cost_schedule.Controls:
-                for related_object in rel.RelatedObjects:
-                    if related_object.is_a("IfcCostItem"):
-                        data["Controls"].append(related_object.id())
-                        break  # We are only allowed one summary cost item
-            cls.cost_schedules[cost_schedule.id()] = data
-
-        for cost_item in cls.file.by_type("IfcCostItem"):
-            data = cost_item.get_info()
-            del data["OwnerHistory"]
-            del data["CostValues"]
-            data["IsNestedBy"] = []
-            data["Controls"] = {}
-            for rel in cost_item.IsNestedBy:
-                [data["IsNestedBy"].append(o.id()) for o in rel.RelatedObjects if o.is_a("IfcCostItem")]
-            parametric_quantities = []
-            for rel in cost_item.Controls:
-                for related_object in rel.RelatedObjects or []:
-                    quantities = cls.get_object_quantities(cost_item, related_object)
-                    data["Controls"][related_object.id()] = quantities
-                    parametric_quantities.extend(quantities)
-            cls.cost_items[cost_item.id()] = data
-            cls.load_cost_item_quantities(cost_item, data, parametric_quantities)
-            cls.load_cost_values(cost_item, data)
+        start = time.perf_counter()
+        changes = cls.cache.get_changes(cls.file)
+        if changes is not None and cls.has_changed_units(changes):
+            changes = None
+        if changes is None:
+            cls.cost_schedules = {}
+            cls.cost_items = {}
+            cls.physical_quantities = {}
+            cls.cost_values = {}
+            for cost_schedule in cls.file.by_type("IfcCostSchedule"):
+                cls.load_cost_schedule(cost_schedule)
+            for cost_item in cls.file.by_type("IfcCostItem"):
+                cls.load_cost_item(cost_item)
+            hits, misses = 0, len(cls.cost_schedules) + len(cls.cost_items)
+        else:
+            misses = cls.load_changes(changes)
+            hits = len(cls.cost_schedules) + len(cls.cost_items) - misses
+        cls.cache.set_loaded(
+            cls.file,
+            hits=hits,
+            misses=misses,
+            reload_time=time.perf_counter() - start,
+            is_full_reload=changes is None,
+        )
         cls.is_loaded = True
 
+    @classmethod
+    def has_changed_units(cls, changes):
+        # Unit symbols are derived from the project units, which any cost item may use
+        for ifc_definition_id in changes:
+            try:
+                element = cls.file.by_id(ifc_definition_id)
+            except RuntimeError:
+                continue
+            if element.is_a("IfcUnitAssignment") or element.is_a("IfcNamedUnit") or element.is_a("IfcDerivedUnit"):
+                return True
+        return False
+
+    @classmethod
+    def load_changes(cls, changes):
+        total_loaded = 0
+        cost_items = set()
+        for ifc_definition_id in changes:
+            cls.cost_schedules.pop(ifc_definition_id, None)
+            cls.cost_items.pop(ifc_definition_id, None)
+            cls.cost_values.pop(ifc_definition_id, None)
+            cls.physical_quantities.pop(ifc_definition_id, None)
+            try:
+                element = cls.file.by_id(ifc_definition_id)
+            except RuntimeError:
+                continue
+            if element.is_a("IfcCostSchedule"):
+                cls.load_cost_schedule(element)
+                total_loaded += 1
+            cost_items.update(cls.get_cost_items(element))
+        # Cost items sum up the values and quantities of the items nested within them
+        queue = list(cost_items)
+        while queue:
+            for rel in queue.pop().Nests or []:
+                if rel.RelatingObject.is_a("IfcCostItem") and rel.RelatingObject not in cost_items:
+                    cost_items.add(rel.RelatingObject)
+                    queue.append(rel.RelatingObject)
+        for cost_item in cost_items:
+            cls.load_cost_item(cost_item)
+            total_loaded += 1
+        return total_loaded
+
+    @classmethod
+    def get_cost_items(cls, element):
+        if element.is_a("IfcCostItem"):
+            return {element}
+        elif element.is_a("IfcCostValue") or element.is_a("IfcPhysicalQuantity"):
+            results = set()
+            for inverse in cls.file.get_inverse(element):
+                if inverse.is_a("IfcCostItem"):
+                    results.add(inverse)
+                elif inverse.is_a("IfcCostValue"):
+                    results.update(cls.get_cost_items(inverse))
+            return results
+        return set()
+
+    @classmethod
+    def load_cost_schedule(cls, cost_schedule):
+        data = cost_schedule.get_info()
+        del data["OwnerHistory"]
+        if data["SubmittedOn"]:
+            data["SubmittedOn"] = ifcopenshell.util.date.ifc2datetime(data["SubmittedOn"])
+        if data["UpdateDate"]:
+            data["UpdateDate"] = ifcopenshell.util.date.ifc2datetime(data["UpdateDate"])
+        data["Controls"] = []
+        for rel in cost_schedule.Controls:
+            for related_object in rel.RelatedObjects:
+                if related_object.is_a("IfcCostItem"):
+                    data["Controls"].append(related_object.id())
+                    break  # We are only allowed one summary cost item
+        cls.cost_schedules[cost_schedule.id()] = data
+
+    @classmethod
+    def load_cost_item(cls, cost_item):
+        data = cost_item.get_info()
+        del data["OwnerHistory"]
+        del data["CostValues"]
+        data["IsNestedBy"] = []
+        data["Controls"] = {}
+        for rel in cost_item.IsNestedBy:
+            [data["IsNestedBy"].append(o.id()) for o in rel.RelatedObjects if o.is_a("IfcCostItem")]
+        parametric_quantities = []
+        for rel in cost_item.Controls:
+            for related_object in rel.RelatedObjects or []:
+                quantities = cls.get_object_quantities(cost_item, related_object)
+                data["Controls"][related_object.id()] = quantities
+                parametric_quantities.extend(quantities)
+        cls.cost_items[cost_item.id()] = data
+        cls.load_cost_item_quantities(cost_item, data, parametric_quantities)
+        cls.load_cost_values(cost_item, data)
+
     @classmethod
     def get_object_quantities(cls, cost_item, element):
         if not element.is_a("IfcObject"):
@@ -1,4 +1,6 @@
+import time
 import ifcopenshell
+import ifcopenshell.api.cache
 
 
 class Data:
@@ -6,7 +8,7 @@ class Data:
     materials = {}
     constituent_sets = {}
     constituents = {}
-    layer_sets_usages = {}
+    layer_set_usages = {}
     layer_sets = {}
     layers = {}
     profile_set_usages = {}
@@ -16,21 +18,25 @@ class Data:
     products = {}
     _file = None
 
+    cache = ifcopenshell.api.cache.Cache("material")
+    loaders = (
+        ("IfcMaterial", "materials"),
+        ("IfcMaterialConstituent", "constituents"),
+        ("IfcMaterialConstituentSet", "constituent_sets"),
+        ("IfcMaterialLayer", "layers"),
+        ("IfcMaterialLayerSet", "layer_sets"),
+        ("IfcMaterialLayerSetUsage", "layer_set_usages"),
+        ("IfcMaterialProfile", "profiles"),
+        ("IfcMaterialProfileSet", "profile_sets"),
+        ("IfcMaterialProfileSetUsage", "profile_set_usages"),
+        ("IfcMaterialList", "lists"),
+    )
+
     @classmethod
     def purge(cls):
+        # Loaded data is kept so that the next load only has to refresh the
+        # entities which have since changed.
         cls.is_loaded = False
-        cls.materials = {}
-        cls.constituent_sets = {}
-        cls.constituents = {}
-        cls.layer_set_usages = {}
-        cls.layer_sets = {}
-        cls.layers = {}
-        cls.profile_set_usages = {}
-        cls.profile_sets = {}
-        cls.profiles = {}
-        cls.lists = {}
-        cls.products = {}
-        cls._file = None
 
     @classmethod
     def load(cls, file, product_id=None):
@@ -39,15 +45,52 @@ class Data:
             return
         if product_id:
             return cls.load_product_material(product_id)
-        cls.load_materials()
-        cls.load_constituents()
-        cls.load_layers()
-        cls.load_layer_usages()
-        cls.load_profiles()
-        cls.load_profile_usages()
-        cls.load_lists()
+        start = time.perf_counter()
+        changes = cls.cache.get_changes(cls._file)
+        if changes is None:
+            cls.products = {}
+            cls.load_materials()
+            cls.load_constituents()
+            cls.load_layers()
+            cls.load_layer_usages()
+            cls.load_profiles()
+            cls.load_profile_usages()
+            cls.load_lists()
+            hits, misses = 0, cls.get_total_loaded()
+        else:
+            misses = cls.load_changes(changes)
+            hits = cls.get_total_loaded() - misses
+        cls.cache.set_loaded(
+            cls._file,
+            hits=hits,
+            misses=misses,
+            reload_time=time.perf_counter() - start,
+            is_full_reload=changes is None,
+        )
         cls.is_loaded = True
 
+    @classmethod
+    def load_changes(cls, changes):
+        total_loaded = 0
+        for ifc_definition_id in changes:
+            try:
+                element = cls._file.by_id(ifc_definition_id)
+            except RuntimeError:
+                element = None
+            for ifc_class, name in cls.loaders:
+                if element is not None and element.is_a(ifc_class):
+                    getattr(cls, name)[ifc_definition_id] = cls.get_simple_info(element)
+                    total_loaded += 1
+                else:
+                    getattr(cls, name).pop(ifc_definition_id, None)
+            # Product materials are loaded on demand, so are simply forgotten
+            cls.products.pop(ifc_definition_id, None)
+        return total_loaded
+
+    @classmethod
+    def get_total_loaded(cls):
+        return sum(len(getattr(cls, name)) for ifc_class, name in cls.loaders)
+
     @classmethod
     def load_materials(cls):
         cls.materials = {}
@@ -1,4 +1,6 @@
+import time
 import ifcopenshell
+import ifcopenshell.api.cache
 import ifcopenshell.util.attribute
 import ifcopenshell.util.pset
 
@@ -8,20 +10,55 @@ class Data:
     psets = {}
     qtos = {}
     properties = {}
+    # The ids of the products whose loaded data depends on each entity
+    dependents = {}
+
+    cache = ifcopenshell.api.cache.Cache("pset")
 
     @classmethod
     def purge(cls):
-        cls.products = {}
-        cls.psets = {}
-        cls.qtos = {}
-        cls.properties = {}
+        # Only the products touched since they were loaded are forgotten, so
+        # that they are reloaded on demand, as long as changes can be tracked.
+        ifc_file = cls.cache.file() if cls.cache.file else None
+        cls.refresh(ifc_file)
+
+    @classmethod
+    def refresh(cls, file):
+        start = time.perf_counter()
+        changes = cls.cache.get_changes(file) if file else None
+        if changes is None:
+            misses = len(cls.products)
+            cls.products = {}
+            cls.psets = {}
+            cls.qtos = {}
+            cls.properties = {}
+            cls.dependents = {}
+        else:
+            misses = 0
+            for ifc_definition_id in changes:
+                cls.psets.pop(ifc_definition_id, None)
+                cls.qtos.pop(ifc_definition_id, None)
+                cls.properties.pop(ifc_definition_id, None)
+                for product_id in cls.dependents.pop(ifc_definition_id, ()):
+                    if cls.products.pop(product_id, None) is not None:
+                        misses += 1
+        if file:
+            cls.cache.set_loaded(
+                file,
+                hits=len(cls.products),
+                misses=misses,
+                reload_time=time.perf_counter() - start,
+                is_full_reload=changes is None,
+            )
 
     @classmethod
     def load(cls, file, product_id):
         if not file:
             return
+        cls.refresh(file)
         product = file.by_id(product_id)
         cls.products[product_id] = {"psets": set(), "qtos": set()}
+        cls.add_dependent(product_id, product_id)
         if product.is_a("IfcTypeObject"):
             cls.add_type_product_psets(product, product_id)
         elif product.is_a("IfcMaterialDefinition"):
@@ -31,6 +68,10 @@ class Data:
         else:
             cls.add_product_psets(product, product_id)
 
+    @classmethod
+    def add_dependent(cls, ifc_definition_id, product_id):
+        cls.dependents.setdefault(ifc_definition_id, set()).add(product_id)
+
     @classmethod
     def add_type_product_psets(cls, product, product_id):
         if not hasattr(product, "HasPropertySets") or not product.HasPropertySets:
@@ -60,6 +101,7 @@ class Data:
         for definition in product.IsDefinedBy:
             if not definition.is_a("IfcRelDefinesByProperties"):
                 continue
+            cls.add_dependent(definition.id(), product_id)
             if definition.RelatingPropertyDefinition.is_a("IfcPropertySet"):
                 cls.add_pset(definition.RelatingPropertyDefinition, product_id)
             elif definition.RelatingPropertyDefinition.is_a("IfcElementQuantity"):
@@ -79,10 +121,12 @@ class Data:
         data["Properties"] = [p.id() for p in props if p.is_a("IfcPropertySingleValue")]
         cls.psets[pset.id()] = data
         cls.products[product_id]["psets"].add(pset.id())
+        cls.add_dependent(pset.id(), product_id)
         for prop in props:
             # TODO: support more than single values
             if prop.is_a("IfcPropertySingleValue"):
                 cls.load_prop(prop)
+                cls.add_dependent(prop.id(), product_id)
 
     @classmethod
     def load_prop(cls, prop):
@@ -109,6 +153,8 @@ class Data:
         data["Properties"] = [q.id() for q in qto.Quantities or [] if q.is_a("IfcPhysicalSimpleQuantity")]
         cls.qtos[qto.id()] = data
         cls.products[product_id]["qtos"].add(qto.id())
+        cls.add_dependent(qto.id(), product_id)
         for quantity in qto.Quantities or []:
             if quantity.is_a("IfcPhysicalSimpleQuantity"):
                 cls.load_prop(quantity)
+                cls.add_dependent(quantity.id(), product_id)
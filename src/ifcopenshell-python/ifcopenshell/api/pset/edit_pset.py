@@ -1,6 +1,9 @@
 import ifcopenshell
 import ifcopenshell.util.pset
 
+# The data type of the wrapped value of each measure type, keyed by schema and measure type
+attribute_types = {}
+
 
 class Usecase:
     def __init__(self, file, **settings):
@@ -22,11 +25,14 @@ class Usecase:
 
     def load_pset_template(self):
         if self.settings["pset_template"]:
-            self.pset_template = self.settings["pset_template"]
+            self.primary_measure_types = {}
+            for prop_template in self.settings["pset_template"].HasPropertyTemplates:
+                self.primary_measure_types.setdefault(prop_template.Name, prop_template.PrimaryMeasureType)
         else:
             # TODO: add IFC2X3 PsetQto template support
             self.psetqto = ifcopenshell.util.pset.get_template("IFC4")
-            self.pset_template = self.psetqto.get_by_name(self.settings["pset"].Name)
+            # The template index knows the primary measure types without loading the templates
+            self.primary_measure_types = self.psetqto.get_primary_measure_types(self.settings["pset"].Name)
 
     def update_existing_properties(self):
         for prop in self.get_properties():
@@ -82,11 +88,8 @@ class Usecase:
             return self.settings["pset"].Properties or []
 
     def get_primary_measure_type(self, name, old_value=None, new_value=None):
-        if self.pset_template:
-            for prop_template in self.pset_template.HasPropertyTemplates:
-                if prop_template.Name != name:
-                    continue
-                return prop_template.PrimaryMeasureType or "IfcLabel"
+        if self.primary_measure_types and name in self.primary_measure_types:
+            return self.primary_measure_types[name] or "IfcLabel"
         if old_value:
             return old_value.is_a()
         elif new_value and hasattr(new_value, "is_a"):
@@ -102,7 +105,10 @@ class Usecase:
                 return "IfcInteger"
 
     def cast_value_to_primary_measure_type(self, value, primary_measure_type):
-        type_str = self.file.create_entity(primary_measure_type).attribute_type(0)
+        type_str = attribute_types.get((self.file.schema, primary_measure_type))
+        if type_str is None:
+            type_str = self.file.create_entity(primary_measure_type).attribute_type(0)
+            attribute_types[(self.file.schema, primary_measure_type)] = type_str
         type_fn = {
             "AGGREGATE OF DOUBLE": list,
             "AGGREGATE OF INT": list,
@@ -0,0 +1,97 @@
+import ifcopenshell
+import ifcopenshell.api
+import ifcopenshell.util.pset
+from ifcopenshell.api.pset import edit_pset
+
+
+class Usecase:
+    def __init__(self, file, **settings):
+        """Edit Psets
+
+        Edits the properties of many property sets at once. The properties are
+        given as a table where each key is either a property set, or an element
+        which is given a property set named ``name`` if it does not already
+        have one. Each value is a dictionary of property names and values, with
+        the same meaning as in ``pset.edit_pset``.
+
+        All edits are applied as a single batch, so they are recorded as one
+        transaction and post listeners are only notified once all edits are
+        done. Primary measure types are looked up once per property set name
+        rather than once per property set.
+
+        If ``should_share_values`` is True, new properties with the same name
+        and value are created only once and shared between property sets. This
+        keeps large files small, but any shared property edited later is edited
+        for every property set that uses it.
+
+        :return: The edited property sets, in the order of the table
+        """
+        self.file = file
+        self.settings = {"name": None, "properties": {}, "pset_template": None, "should_share_values": False}
+        for key, value in settings.items():
+            self.settings[key] = value
+
+    def execute(self):
+        self.primary_measure_types = {}
+        self.shared_properties = {}
+        psets = []
+        with ifcopenshell.api.batch(self.file):
+            for element, properties in self.settings["properties"].items():
+                pset = self.get_pset(element)
+                editor = edit_pset.Usecase(self.file, pset=pset, properties=dict(properties))
+                editor.primary_measure_types = self.get_primary_measure_types(pset.Name)
+                editor.update_existing_properties()
+                new_properties = self.add_new_properties(editor)
+                if new_properties:
+                    editor.extend_pset_with_new_properties(new_properties)
+                psets.append(pset)
+        return psets
+
+    def get_pset(self, element):
+        if element.is_a("IfcPropertySet") or element.is_a("IfcExtendedProperties"):
+            return element
+        if not self.settings["name"]:
+            raise ValueError(f"A property set name is required to edit the properties of {element}")
+        return ifcopenshell.api.run("pset.add_pset", self.file, product=element, name=self.settings["name"])
+
+    def get_primary_measure_types(self, name):
+        if self.settings["pset_template"]:
+            name = None
+        if name not in self.primary_measure_types:
+            if self.settings["pset_template"]:
+                primary_measure_types = {}
+                for prop_template in self.settings["pset_template"].HasPropertyTemplates:
+                    primary_measure_types.setdefault(prop_template.Name, prop_template.PrimaryMeasureType)
+            else:
+                # TODO: add IFC2X3 PsetQto template support
+                psetqto = ifcopenshell.util.pset.get_template("IFC4")
+                primary_measure_types = psetqto.get_primary_measure_types(name)
+            self.primary_measure_types[name] = primary_measure_types
+        return self.primary_measure_types[name]
+
+    def add_new_properties(self, editor):
+        if not self.settings["should_share_values"]:
+            return editor.add_new_properties()
+        properties = []
+        for name, value in editor.settings["properties"].items():
+            if value is None:
+                continue
+            if isinstance(value, ifcopenshell.entity_instance):
+                key = (name, value.is_a(), self.get_hashable(value.wrappedValue))
+            else:
+                primary_measure_type = editor.get_primary_measure_type(name, new_value=value)
+                value = editor.cast_value_to_primary_measure_type(value, primary_measure_type)
+                key = (name, primary_measure_type, self.get_hashable(value))
+            prop = self.shared_properties.get(key)
+            if prop is None:
+                if not isinstance(value, ifcopenshell.entity_instance):
+                    value = self.file.create_entity(primary_measure_type, value)
+                prop = self.file.create_entity("IfcPropertySingleValue", Name=name, NominalValue=value)
+                self.shared_properties[key] = prop
+            properties.append(prop)
+        return properties
+
+    def get_hashable(self, value):
+        if isinstance(value, (list, tuple)):
+            return tuple(value)
+        return value
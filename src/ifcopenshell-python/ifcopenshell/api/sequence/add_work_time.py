@@ -1,3 +1,6 @@
+import ifcopenshell.util.sequence
+
+
 class Usecase:
     def __init__(self, file, **settings):
         self.file = file
@@ -15,4 +18,5 @@ class Usecase:
             exception_times = list(self.settings["work_calendar"].ExceptionTimes or [])
             exception_times.append(work_time)
             self.settings["work_calendar"].ExceptionTimes = exception_times
+        ifcopenshell.util.sequence.invalidate_working_days(self.file, self.settings["work_calendar"])
         return work_time
@@ -1,3 +1,6 @@
+import ifcopenshell.util.sequence
+
+
 class Usecase:
     def __init__(self, file, **settings):
         self.file = file
@@ -19,4 +22,5 @@ class Usecase:
             if len(self.file.get_inverse(self.settings["parent"].Recurrence)) == 1:
                 self.file.remove(self.settings["parent"].Recurrence)
             self.settings["parent"].Recurrence = recurrence
+        ifcopenshell.util.sequence.invalidate_working_days(self.file)
         return recurrence
@@ -11,12 +11,52 @@ class Usecase:
             self.settings[key] = value
 
     def execute(self):
+        # Tasks are visited in topological order, and only when the task
+        # itself or one of its predecessors has changed, so each task is
+        # processed at most once. Returns the set of modified tasks.
         self.calendar_cache = {}
-        self.cascade_task(self.settings["task"], is_first_task=True)
+        self.task_time_cache = {}
+        self.modified_tasks = set()
+        first_task = self.settings["task"]
+        pending_tasks = {first_task}
+        for task in self.get_successors(first_task):
+            if task not in pending_tasks:
+                continue
+            if self.cascade_task(task, is_first_task=task == first_task):
+                pending_tasks.update(rel.RelatedProcess for rel in task.IsPredecessorTo)
+        return self.modified_tasks
+
+    def get_successors(self, first_task):
+        successors = {}
+        queue = [first_task]
+        seen = {first_task}
+        for task in queue:
+            successors[task] = [rel.RelatedProcess for rel in task.IsPredecessorTo]
+            for successor in successors[task]:
+                if successor not in seen:
+                    seen.add(successor)
+                    queue.append(successor)
+
+        in_degrees = dict.fromkeys(successors, 0)
+        for task in queue:
+            for successor in successors[task]:
+                in_degrees[successor] += 1
+        # The first task is always processed first, even if it is part of a cycle
+        in_degrees[first_task] = 0
+
+        results = [first_task]
+        for task in results:
+            for successor in successors[task]:
+                in_degrees[successor] -= 1
+                if in_degrees[successor] == 0:
+                    results.append(successor)
+        # Tasks in cycles are visited once in the order they were discovered
+        results.extend(t for t in queue if in_degrees[t] > 0)
+        return results
 
     def cascade_task(self, task, is_first_task=False):
         if not task.TaskTime:
-            return
+            return False
 
         duration = (
             ifcopenshell.util.date.ifc2datetime(task.TaskTime.ScheduleDuration)
@@ -89,15 +129,15 @@ class Usecase:
             if potential_finish > finish:
                 start_ifc = ifcopenshell.util.date.datetime2ifc(start, "IfcDateTime")
                 if task.TaskTime.ScheduleStart == start_ifc and not is_first_task:
-                    return
-                task.TaskTime.ScheduleStart = start_ifc
-                task.TaskTime.ScheduleFinish = ifcopenshell.util.date.datetime2ifc(potential_finish, "IfcDateTime")
+                    return False
+                self.set_task_time(
+                    task, start_ifc, ifcopenshell.util.date.datetime2ifc(potential_finish, "IfcDateTime")
+                )
             else:
                 finish_ifc = ifcopenshell.util.date.datetime2ifc(finish, "IfcDateTime")
                 if task.TaskTime.ScheduleFinish == finish_ifc and not is_first_task:
-                    return
-                task.TaskTime.ScheduleFinish = finish_ifc
-                task.TaskTime.ScheduleStart = ifcopenshell.util.date.datetime2ifc(
+                    return False
+                start_ifc = ifcopenshell.util.date.datetime2ifc(
                     ifcopenshell.util.sequence.get_finish_date(
                         finish,
                         -duration,
@@ -106,13 +146,13 @@ class Usecase:
                     ),
                     "IfcDateTime",
                 )
+                self.set_task_time(task, start_ifc, finish_ifc)
         elif finishes:
             finish = max(finishes)
             finish_ifc = ifcopenshell.util.date.datetime2ifc(finish, "IfcDateTime")
             if task.TaskTime.ScheduleFinish == finish_ifc and not is_first_task:
-                return
-            task.TaskTime.ScheduleFinish = finish_ifc
-            task.TaskTime.ScheduleStart = ifcopenshell.util.date.datetime2ifc(
+                return False
+            start_ifc = ifcopenshell.util.date.datetime2ifc(
                 ifcopenshell.util.sequence.get_finish_date(
                     finish,
                     -duration,
@@ -121,13 +161,13 @@ class Usecase:
                 ),
                 "IfcDateTime",
             )
+            self.set_task_time(task, start_ifc, finish_ifc)
         elif starts:
             start = max(starts)
             start_ifc = ifcopenshell.util.date.datetime2ifc(start, "IfcDateTime")
             if task.TaskTime.ScheduleStart == start_ifc and not is_first_task:
-                return
-            task.TaskTime.ScheduleStart = start_ifc
-            task.TaskTime.ScheduleFinish = ifcopenshell.util.date.datetime2ifc(
+                return False
+            finish_ifc = ifcopenshell.util.date.datetime2ifc(
                 ifcopenshell.util.sequence.get_finish_date(
                     start,
                     duration,
@@ -136,9 +176,19 @@ class Usecase:
                 ),
                 "IfcDateTime",
             )
+            self.set_task_time(task, start_ifc, finish_ifc)
+
+        return True
 
-        for rel in task.IsPredecessorTo:
-            self.cascade_task(rel.RelatedProcess)
+    def set_task_time(self, task, start, finish):
+        task_time = task.TaskTime
+        if task_time.ScheduleStart != start:
+            task_time.ScheduleStart = start
+            self.modified_tasks.add(task)
+        if task_time.ScheduleFinish != finish:
+            task_time.ScheduleFinish = finish
+            self.modified_tasks.add(task)
+        self.task_time_cache.pop(task.id(), None)
 
     def get_lag_time_days(self, lag_time):
         return ifcopenshell.util.date.ifc2datetime(lag_time.LagValue.wrappedValue).days
@@ -155,7 +205,11 @@ class Usecase:
         )
 
     def get_task_time_attribute(self, task, attribute):
-        if task.TaskTime:
-            value = getattr(task.TaskTime, attribute)
-            if value:
-                return ifcopenshell.util.date.ifc2datetime(value)
+        task_times = self.task_time_cache.get(task.id())
+        if task_times is None:
+            task_times = self.task_time_cache[task.id()] = {}
+            if task.TaskTime:
+                for name in ("ScheduleStart", "ScheduleFinish"):
+                    value = getattr(task.TaskTime, name)
+                    task_times[name] = ifcopenshell.util.date.ifc2datetime(value) if value else None
+        return task_times.get(attribute)
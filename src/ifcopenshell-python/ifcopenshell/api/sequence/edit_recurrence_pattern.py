@@ -1,3 +1,6 @@
+import ifcopenshell.util.sequence
+
+
 class Usecase:
     def __init__(self, file, **settings):
         self.file = file
@@ -8,3 +11,4 @@ class Usecase:
     def execute(self):
         for name, value in self.settings["attributes"].items():
             setattr(self.settings["recurrence_pattern"], name, value)
+        ifcopenshell.util.sequence.invalidate_working_days(self.file)
@@ -74,15 +74,11 @@ class Usecase:
     def calculate_duration(self):
         start = ifcopenshell.util.date.ifc2datetime(self.settings["task_time"].ScheduleStart)
         finish = ifcopenshell.util.date.ifc2datetime(self.settings["task_time"].ScheduleFinish)
-        current_date = datetime.date(start.year, start.month, start.day)
+        start_date = datetime.date(start.year, start.month, start.day)
         finish_date = datetime.date(finish.year, finish.month, finish.day)
-        duration = datetime.timedelta()
-        while current_date < finish_date:
-            if self.settings["task_time"].DurationType == "ELAPSEDTIME" or not self.calendar:
-                duration += datetime.timedelta(days=1)
-            elif ifcopenshell.util.sequence.is_working_day(current_date, self.calendar):
-                duration += datetime.timedelta(days=1)
-            current_date += datetime.timedelta(days=1)
+        calendar = None if self.settings["task_time"].DurationType == "ELAPSEDTIME" else self.calendar
+        days = ifcopenshell.util.sequence.count_working_days(start_date, finish_date, calendar)
+        duration = datetime.timedelta(days=days)
         self.settings["task_time"].ScheduleDuration = ifcopenshell.util.date.datetime2ifc(duration, "IfcDuration")
 
     def get_task(self):
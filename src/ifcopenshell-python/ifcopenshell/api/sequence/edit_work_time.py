@@ -1,4 +1,5 @@
 import ifcopenshell.util.date
+import ifcopenshell.util.sequence
 
 
 class Usecase:
@@ -13,3 +14,4 @@ class Usecase:
             if value and name in ["Start", "Finish"]:
                 value = ifcopenshell.util.date.datetime2ifc(value, "IfcDate")
             setattr(self.settings["work_time"], name, value)
+        ifcopenshell.util.sequence.invalidate_working_days(self.file)
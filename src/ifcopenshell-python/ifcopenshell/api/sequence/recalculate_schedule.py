@@ -1,5 +1,4 @@
 import datetime
-import networkx as nx
 import ifcopenshell.api
 import ifcopenshell.util.date
 import ifcopenshell.util.sequence
@@ -15,24 +14,24 @@ class Usecase:
     def execute(self):
         # The method implemented is the same as shown here:
         # https://www.youtube.com/watch?v=qTErIV6OqLg
+        # Nodes are sorted topologically once, so that each forward and
+        # backward pass visits every node exactly once after its dependencies.
         self.start_dates = []
         self.build_network_graph()
+        order = self.sort_topologically()
 
-        self.pending_nodes = set(self.g.nodes)
-        while self.pending_nodes:
-            remaining_nodes = set()
-            for pending_node in self.pending_nodes:
-                if not self.forward_pass(pending_node):
-                    remaining_nodes.add(pending_node)
-            self.pending_nodes = remaining_nodes
+        total_nodes = len(self.nodes)
+        self.early_starts = [None] * total_nodes
+        self.early_finishes = [None] * total_nodes
+        self.late_starts = [None] * total_nodes
+        self.late_finishes = [None] * total_nodes
+        self.total_floats = [None] * total_nodes
+        self.free_floats = [None] * total_nodes
 
-        self.pending_nodes = set(self.g.nodes)
-        while self.pending_nodes:
-            remaining_nodes = set()
-            for pending_node in self.pending_nodes:
-                if not self.backward_pass(pending_node):
-                    remaining_nodes.add(pending_node)
-            self.pending_nodes = remaining_nodes
+        for node in order:
+            self.forward_pass(node)
+        for node in reversed(order):
+            self.backward_pass(node)
 
         self.update_task_times()
 
@@ -46,275 +45,242 @@ class Usecase:
             "USERDEFINED": "FS",
             "NOTDEFINED": "FS",
         }
-        self.g = nx.DiGraph()
-        self.edges = []
-        self.g.add_node("start", duration=0, duration_type="ELAPSEDTIME", calendar=None)
-        self.g.add_node("finish", duration=0, duration_type="ELAPSEDTIME", calendar=None)
+        self.nodes = []
+        self.node_indices = {}
+        self.durations = []
+        self.duration_types = []
+        self.calendars = []
+        self.edges = {}
+        self.add_graph_node("start", 0, "ELAPSEDTIME", None)
+        self.add_graph_node("finish", 0, "ELAPSEDTIME", None)
         for rel in self.settings["work_schedule"].Controls:
             for related_object in rel.RelatedObjects:
                 if not related_object.is_a("IfcTask"):
                     continue
                 self.add_node(related_object)
-        self.g.add_edges_from(self.edges)
+
+        self.predecessors = [[] for node in self.nodes]
+        self.successors = [[] for node in self.nodes]
+        for (predecessor, successor), (lag_time, sequence_type) in self.edges.items():
+            predecessor = self.node_indices.get(predecessor)
+            successor = self.node_indices.get(successor)
+            if predecessor is None or successor is None:
+                continue  # Sequences to tasks outside the schedule or to summary tasks are ignored
+            self.predecessors[successor].append((predecessor, lag_time, sequence_type))
+            self.successors[predecessor].append((successor, lag_time, sequence_type))
+
+        # Tasks left unconnected by ignored sequences still belong to the network
+        start, finish = self.node_indices["start"], self.node_indices["finish"]
+        for node in range(len(self.nodes)):
+            if node != start and not self.predecessors[node]:
+                self.predecessors[node].append((start, 0, "FS"))
+                self.successors[start].append((node, 0, "FS"))
+            if node != finish and not self.successors[node]:
+                self.successors[node].append((finish, 0, "FS"))
+                self.predecessors[finish].append((node, 0, "FS"))
+
+    def add_graph_node(self, ifc_definition_id, duration, duration_type, calendar):
+        self.node_indices[ifc_definition_id] = len(self.nodes)
+        self.nodes.append(ifc_definition_id)
+        self.durations.append(duration)
+        self.duration_types.append(duration_type)
+        self.calendars.append(calendar)
 
     def add_node(self, task):
-        if task.IsNestedBy:
-            for rel in task.IsNestedBy:
+        nests = task.IsNestedBy
+        if nests:
+            for rel in nests:
                 [self.add_node(o) for o in rel.RelatedObjects]
             return
 
-        if task.TaskTime and task.TaskTime.ScheduleDuration:
-            duration = ifcopenshell.util.date.ifc2datetime(task.TaskTime.ScheduleDuration).days
-            duration_type = task.TaskTime.DurationType
+        task_id = task.id()
+        task_time = task.TaskTime
+        if task_time and task_time.ScheduleDuration:
+            duration = ifcopenshell.util.date.ifc2datetime(task_time.ScheduleDuration).days
+            duration_type = task_time.DurationType
         else:
             duration = 0
             duration_type = "ELAPSEDTIME"
 
-        self.g.add_node(
-            task.id(),
-            duration=duration,
-            duration_type=duration_type,
-            calendar=ifcopenshell.util.sequence.derive_calendar(task),
-        )
+        self.add_graph_node(task_id, duration, duration_type, ifcopenshell.util.sequence.derive_calendar(task))
 
-        self.edges.extend(
-            [
-                (
-                    rel.RelatingProcess.id(),
-                    rel.RelatedProcess.id(),
-                    {
-                        "lag_time": 0
-                        if not rel.TimeLag
-                        else ifcopenshell.util.date.ifc2datetime(rel.TimeLag.LagValue.wrappedValue).days,
-                        "type": self.sequence_type_map[rel.SequenceType],
-                    },
-                )
-                for rel in task.IsSuccessorFrom or []
-            ]
-        )
-        predecessor_types = [rel.SequenceType for rel in task.IsSuccessorFrom]
-        successor_types = [rel.SequenceType for rel in task.IsPredecessorTo]
+        predecessor_types = []
+        for rel in task.IsSuccessorFrom or []:
+            sequence_type = rel.SequenceType
+            time_lag = rel.TimeLag
+            self.edges[(rel.RelatingProcess.id(), task_id)] = (
+                0 if not time_lag else ifcopenshell.util.date.ifc2datetime(time_lag.LagValue.wrappedValue).days,
+                self.sequence_type_map[sequence_type],
+            )
+            predecessor_types.append(sequence_type)
+        successor_types = [rel.SequenceType for rel in task.IsPredecessorTo or []]
 
         if not predecessor_types or (
             "FINISH_START" not in predecessor_types and "START_START" not in predecessor_types
         ):
-            self.edges.append(("start", task.id(), {"lag_time": 0, "type": "FS"}))
-            if task.TaskTime and task.TaskTime.ScheduleStart:
-                self.start_dates.append(ifcopenshell.util.date.ifc2datetime(task.TaskTime.ScheduleStart))
+            self.edges[("start", task_id)] = (0, "FS")
+            if task_time and task_time.ScheduleStart:
+                self.start_dates.append(ifcopenshell.util.date.ifc2datetime(task_time.ScheduleStart))
         if not successor_types or ("FINISH_START" not in successor_types and "FINISH_FINISH" not in successor_types):
-            self.edges.append((task.id(), "finish", {"lag_time": 0, "type": "FS"}))
+            self.edges[(task_id, "finish")] = (0, "FS")
+
+    def sort_topologically(self):
+        in_degrees = [len(predecessors) for predecessors in self.predecessors]
+        order = [node for node, in_degree in enumerate(in_degrees) if not in_degree]
+        for node in order:
+            for successor, lag_time, sequence_type in self.successors[node]:
+                in_degrees[successor] -= 1
+                if not in_degrees[successor]:
+                    order.append(successor)
+        if len(order) != len(self.nodes):
+            raise ValueError("The work schedule contains a cyclic task sequence and cannot be calculated")
+        return order
 
     def update_task_times(self):
-        for ifc_definition_id in self.g.nodes:
-            data = self.g.nodes[ifc_definition_id]
-            if not data["duration"]:
+        for node, ifc_definition_id in enumerate(self.nodes):
+            if not self.durations[node]:
                 continue
-            ifcopenshell.api.run(
-                "sequence.edit_task_time",
-                self.file,
-                task_time=self.file.by_id(ifc_definition_id).TaskTime,
-                attributes={
-                    "FreeFloat": ifcopenshell.util.date.datetime2ifc(data["free_float"], "IfcDuration"),
-                    "TotalFloat": ifcopenshell.util.date.datetime2ifc(data["total_float"], "IfcDuration"),
-                    "IsCritical": data["total_float"].days == 0,
-                    "EarlyStart": ifcopenshell.util.date.datetime2ifc(data["early_start"], "IfcDateTime"),
-                    "EarlyFinish": ifcopenshell.util.date.datetime2ifc(data["early_finish"], "IfcDateTime"),
-                    "LateStart": ifcopenshell.util.date.datetime2ifc(data["late_start"], "IfcDateTime"),
-                    "LateFinish": ifcopenshell.util.date.datetime2ifc(data["late_finish"], "IfcDateTime"),
-                },
-            )
+            task_time = self.file.by_id(ifc_definition_id).TaskTime
+            attributes = {
+                "FreeFloat": ifcopenshell.util.date.datetime2ifc(self.free_floats[node], "IfcDuration"),
+                "TotalFloat": ifcopenshell.util.date.datetime2ifc(self.total_floats[node], "IfcDuration"),
+                "IsCritical": self.total_floats[node].days == 0,
+                "EarlyStart": ifcopenshell.util.date.datetime2ifc(self.early_starts[node], "IfcDateTime"),
+                "EarlyFinish": ifcopenshell.util.date.datetime2ifc(self.early_finishes[node], "IfcDateTime"),
+                "LateStart": ifcopenshell.util.date.datetime2ifc(self.late_starts[node], "IfcDateTime"),
+                "LateFinish": ifcopenshell.util.date.datetime2ifc(self.late_finishes[node], "IfcDateTime"),
+            }
+            # These are derived values which never cascade, so they are set
+            # directly rather than through sequence.edit_task_time.
+            for name, value in attributes.items():
+                if getattr(task_time, name) != value:
+                    setattr(task_time, name, value)
 
     def offset_date(self, date, days, node):
         return ifcopenshell.util.sequence.get_finish_date(
-            date, datetime.timedelta(days=days), node["duration_type"], node["calendar"]
+            date, datetime.timedelta(days=days), self.duration_types[node], self.calendars[node]
         )
 
-    def forward_pass(self, node):
-        successors = self.g.successors(node)
-        predecessors = list(self.g.predecessors(node))
-        data = self.g.nodes[node]
+    def get_lagged_dates(self, date, lag_time, node1, node2):
+        if not lag_time:
+            return [date]
+        return [self.offset_date(date, lag_time, node1), self.offset_date(date, lag_time, node2)]
 
-        if node == "start":
-            data["early_start"] = min(self.start_dates)
+    def forward_pass(self, node):
+        if self.nodes[node] == "start":
+            self.early_starts[node] = min(self.start_dates)
         else:
             finishes = []
             starts = []
-            for predecessor in predecessors:
-                predecessor_data = self.g.nodes[predecessor]
-                edge = self.g[predecessor][node]
-                if edge["type"] == "FS":
-                    finish = predecessor_data.get("early_finish")
-                    if finish is None:
-                        return
-                    if not edge["lag_time"]:
-                        starts.append(finish)
-                    else:
-                        starts.append(self.offset_date(finish, edge["lag_time"], data))
-                        starts.append(self.offset_date(finish, edge["lag_time"], predecessor_data))
-                elif edge["type"] == "SS":
-                    start = predecessor_data.get("early_start")
-                    if start is None:
-                        return
-                    if not edge["lag_time"]:
-                        starts.append(start)
-                    else:
-                        starts.append(self.offset_date(start, edge["lag_time"], data))
-                        starts.append(self.offset_date(start, edge["lag_time"], predecessor_data))
-                elif edge["type"] == "FF":
-                    finish = predecessor_data.get("early_finish")
-                    if finish is None:
-                        return
-                    if not edge["lag_time"]:
-                        finishes.append(finish)
-                    else:
-                        finishes.append(self.offset_date(finish, edge["lag_time"], data))
-                        finishes.append(self.offset_date(finish, edge["lag_time"], predecessor_data))
-                elif edge["type"] == "SF":
-                    start = predecessor_data.get("early_start")
-                    if start is None:
-                        return
-                    if not edge["lag_time"]:
-                        finishes.append(start)
-                    else:
-                        finishes.append(self.offset_date(start, edge["lag_time"], data))
-                        finishes.append(self.offset_date(start, edge["lag_time"], predecessor_data))
+            for predecessor, lag_time, sequence_type in self.predecessors[node]:
+                if sequence_type == "FS":
+                    starts.extend(self.get_lagged_dates(self.early_finishes[predecessor], lag_time, node, predecessor))
+                elif sequence_type == "SS":
+                    starts.extend(self.get_lagged_dates(self.early_starts[predecessor], lag_time, node, predecessor))
+                elif sequence_type == "FF":
+                    finishes.extend(
+                        self.get_lagged_dates(self.early_finishes[predecessor], lag_time, node, predecessor)
+                    )
+                elif sequence_type == "SF":
+                    finishes.extend(self.get_lagged_dates(self.early_starts[predecessor], lag_time, node, predecessor))
             if starts and finishes:
-                data["early_start"] = max(starts)
-                data["early_finish"] = max(finishes)
-                if self.offset_date(data["early_start"], data["duration"], data) > data["early_finish"]:
-                    data["early_finish"] = self.offset_date(data["early_start"], data["duration"], data)
+                self.early_starts[node] = max(starts)
+                self.early_finishes[node] = max(finishes)
+                early_finish = self.offset_date(self.early_starts[node], self.durations[node], node)
+                if early_finish > self.early_finishes[node]:
+                    self.early_finishes[node] = early_finish
                 else:
-                    data["early_start"] = self.offset_date(data["early_finish"], -data["duration"], data)
+                    self.early_starts[node] = self.offset_date(self.early_finishes[node], -self.durations[node], node)
             elif finishes:
-                data["early_finish"] = max(finishes)
+                self.early_finishes[node] = max(finishes)
             elif starts:
-                data["early_start"] = max(starts)
-            else:
-                print("How did this happen?")
+                self.early_starts[node] = max(starts)
 
-        if data.get("early_finish") is None:
-            data["early_finish"] = self.offset_date(data["early_start"], data["duration"], data)
-        elif data.get("early_start") is None:
-            data["early_start"] = self.offset_date(data["early_finish"], -data["duration"], data)
-
-        return True
+        if self.early_finishes[node] is None:
+            self.early_finishes[node] = self.offset_date(self.early_starts[node], self.durations[node], node)
+        elif self.early_starts[node] is None:
+            self.early_starts[node] = self.offset_date(self.early_finishes[node], -self.durations[node], node)
 
     def backward_pass(self, node):
-        successors = list(self.g.successors(node))
-        predecessors = self.g.predecessors(node)
-        data = self.g.nodes[node]
         free_floats = []
 
-        if node == "finish":
-            data["late_finish"] = data["early_finish"]
+        if self.nodes[node] == "finish":
+            self.late_finishes[node] = self.early_finishes[node]
         else:
             finishes = []
             starts = []
-            for successor in successors:
-                successor_data = self.g.nodes[successor]
-                edge = self.g[node][successor]
-                if edge["type"] == "FS":
-                    start = successor_data.get("late_start")
-                    if start is None:
-                        return
-                    if not edge["lag_time"]:
-                        finishes.append(start)
-                    else:
-                        finishes.append(self.offset_date(start, -edge["lag_time"], data))
-                        finishes.append(self.offset_date(start, -edge["lag_time"], successor_data))
+            for successor, lag_time, sequence_type in self.successors[node]:
+                if sequence_type == "FS":
+                    finishes.extend(self.get_lagged_dates(self.late_starts[successor], -lag_time, node, successor))
                     free_floats.append(
                         self.calculate_free_float(
-                            data["early_finish"], successor_data["early_start"], edge["lag_time"], data, successor_data
+                            self.early_finishes[node], self.early_starts[successor], lag_time, node, successor
                         )
                     )
-                elif edge["type"] == "SS":
-                    start = successor_data.get("late_start")
-                    if start is None:
-                        return
-                    if not edge["lag_time"]:
-                        starts.append(start)
-                    else:
-                        starts.append(self.offset_date(start, -edge["lag_time"], data))
-                        starts.append(self.offset_date(start, -edge["lag_time"], successor_data))
+                elif sequence_type == "SS":
+                    starts.extend(self.get_lagged_dates(self.late_starts[successor], -lag_time, node, successor))
                     free_floats.append(
                         self.calculate_free_float(
-                            data["early_start"], successor_data["early_start"], edge["lag_time"], data, successor_data
+                            self.early_starts[node], self.early_starts[successor], lag_time, node, successor
                         )
                     )
-                elif edge["type"] == "FF":
-                    finish = successor_data.get("late_finish")
-                    if finish is None:
-                        return
-                    if not edge["lag_time"]:
-                        finishes.append(finish)
-                    else:
-                        finishes.append(self.offset_date(finish, -edge["lag_time"], data))
-                        finishes.append(self.offset_date(finish, -edge["lag_time"], successor_data))
+                elif sequence_type == "FF":
+                    finishes.extend(self.get_lagged_dates(self.late_finishes[successor], -lag_time, node, successor))
                     free_floats.append(
                         self.calculate_free_float(
-                            data["early_finish"], successor_data["early_finish"], edge["lag_time"], data, successor_data
+                            self.early_finishes[node], self.early_finishes[successor], lag_time, node, successor
                         )
                     )
-                elif edge["type"] == "SF":
-                    finish = successor_data.get("late_finish")
-                    if finish is None:
-                        return
-                    if not edge["lag_time"]:
-                        starts.append(finish)
-                    else:
-                        starts.append(self.offset_date(finish, -edge["lag_time"], data))
-                        starts.append(self.offset_date(finish, -edge["lag_time"], successor_data))
+                elif sequence_type == "SF":
+                    starts.extend(self.get_lagged_dates(self.late_finishes[successor], -lag_time, node, successor))
                     free_floats.append(
                         self.calculate_free_float(
-                            data["early_start"], successor_data["early_finish"], edge["lag_time"], data, successor_data
+                            self.early_starts[node], self.early_finishes[successor], lag_time, node, successor
                         )
                     )
             if starts and finishes:
-                data["late_start"] = min(starts)
-                data["late_finish"] = min(finishes)
-                if self.offset_date(data["late_start"], data["duration"], data) < data["late_finish"]:
-                    data["late_finish"] = self.offset_date(data["late_start"], data["duration"], data)
+                self.late_starts[node] = min(starts)
+                self.late_finishes[node] = min(finishes)
+                late_finish = self.offset_date(self.late_starts[node], self.durations[node], node)
+                if late_finish < self.late_finishes[node]:
+                    self.late_finishes[node] = late_finish
                 else:
-                    data["late_start"] = self.offset_date(data["late_finish"], -data["duration"], data)
+                    self.late_starts[node] = self.offset_date(self.late_finishes[node], -self.durations[node], node)
             elif finishes:
-                data["late_finish"] = min(finishes)
+                self.late_finishes[node] = min(finishes)
             elif starts:
-                data["late_start"] = min(starts)
-            else:
-                print("How did this happen?")
+                self.late_starts[node] = min(starts)
 
-        if data.get("late_finish") is None:
-            data["late_finish"] = self.offset_date(data["late_start"], data["duration"], data)
-        elif data.get("late_start") is None:
-            data["late_start"] = self.offset_date(data["late_finish"], -data["duration"], data)
+        if self.late_finishes[node] is None:
+            self.late_finishes[node] = self.offset_date(self.late_starts[node], self.durations[node], node)
+        elif self.late_starts[node] is None:
+            self.late_starts[node] = self.offset_date(self.late_finishes[node], -self.durations[node], node)
 
-        if data["duration_type"] == "WORKTIME":
-            data["total_float"] = datetime.timedelta(
+        if self.duration_types[node] == "WORKTIME":
+            self.total_floats[node] = datetime.timedelta(
                 days=ifcopenshell.util.sequence.count_working_days(
-                    data["early_finish"], data["late_finish"], data["calendar"]
+                    self.early_finishes[node], self.late_finishes[node], self.calendars[node]
                 )
             )
         else:
-            data["total_float"] = data["late_finish"] - data["early_finish"]
-
-        data["free_float"] = min(free_floats) if free_floats else None
+            self.total_floats[node] = self.late_finishes[node] - self.early_finishes[node]
 
-        return True
+        self.free_floats[node] = min(free_floats) if free_floats else None
 
-    def calculate_free_float(self, predecessor_date, successor_date, lag_time, predecessor_data, successor_data):
+    def calculate_free_float(self, predecessor_date, successor_date, lag_time, predecessor, successor):
         if not lag_time:
             min_successor_date = successor_date
         else:
             min_successor_date = min(
                 (
-                    self.offset_date(successor_date, -lag_time, predecessor_data),
-                    self.offset_date(successor_date, -lag_time, successor_data),
+                    self.offset_date(successor_date, -lag_time, predecessor),
+                    self.offset_date(successor_date, -lag_time, successor),
                 )
             )
-        if predecessor_data["duration_type"] == "WORKTIME":
+        if self.duration_types[predecessor] == "WORKTIME":
             return datetime.timedelta(
                 days=ifcopenshell.util.sequence.count_working_days(
-                    predecessor_date, min_successor_date, predecessor_data["calendar"]
+                    predecessor_date, min_successor_date, self.calendars[predecessor]
                 )
             )
         return min_successor_date - predecessor_date
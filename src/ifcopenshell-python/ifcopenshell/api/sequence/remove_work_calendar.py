@@ -1,4 +1,5 @@
 import ifcopenshell
+import ifcopenshell.util.sequence
 
 
 class Usecase:
@@ -16,4 +17,5 @@ class Usecase:
             definition=self.settings["work_calendar"],
             relating_context=self.file.by_type("IfcContext")[0],
         )
+        ifcopenshell.util.sequence.invalidate_working_days(self.file, self.settings["work_calendar"])
         self.file.remove(self.settings["work_calendar"])
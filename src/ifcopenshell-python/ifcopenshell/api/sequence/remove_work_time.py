@@ -1,3 +1,6 @@
+import ifcopenshell.util.sequence
+
+
 class Usecase:
     def __init__(self, file, **settings):
         self.file = file
@@ -7,3 +10,4 @@ class Usecase:
 
     def execute(self):
         self.file.remove(self.settings["work_time"])
+        ifcopenshell.util.sequence.invalidate_working_days(self.file)
@@ -1,4 +1,5 @@
 import ifcopenshell.api
+import ifcopenshell.util.sequence
 
 
 class Usecase:
@@ -10,3 +11,4 @@ class Usecase:
 
     def execute(self):
         self.file.remove(self.settings["recurrence_pattern"])
+        ifcopenshell.util.sequence.invalidate_working_days(self.file)
@@ -52,6 +52,17 @@ def set_derived_atribute(*args):
 # module.
 _method_dict = {}
 
+# Similarly, for every entity populate a table mapping
+# attribute names (including inverse attributes) to a
+# tuple of (attribute category, attribute index, whether
+# the value may contain instances that need wrapping).
+# For example, IFC4.IfcWall.Name maps to (FORWARD, 2,
+# False) as it is the third attribute and is a string.
+# This avoids resolving the category and index by name
+# on the C++ side for every attribute read.
+INVALID, FORWARD, INVERSE = range(3)
+_attribute_dict = {}
+
 
 def register_schema_attributes(schema):
     for decl in schema.declarations():
@@ -61,6 +72,14 @@ def register_schema_attributes(schema):
             # get type strings as reported by IfcOpenShell C++
             type_strs = decl.argument_types()
 
+            if hasattr(decl, "all_attributes"):
+                attributes = {}
+                for i, (attr, type_str) in enumerate(zip(decl.all_attributes(), type_strs)):
+                    attributes[attr.name()] = (FORWARD, i, "ENTITY INSTANCE" in type_str)
+                for attr in decl.all_inverse_attributes():
+                    attributes[attr.name()] = (INVERSE, attr.name(), True)
+                _attribute_dict[fq_name] = attributes
+
             # convert case for setter function
             type_strs = [x.title().replace(" ", "") for x in type_strs]
 
@@ -102,6 +121,10 @@ class entity_instance(object):
         >>> #423=IfcProductDefinitionShape($,$,(#409,#421))
     """
 
+    # The STEP id and hash are cached once the instance belongs to a file
+    _id = 0
+    _hash = None
+
     def __init__(self, e, file=None):
         if isinstance(e, tuple):
             e = ifcopenshell_wrapper.new_IfcBaseClass(*e)
@@ -109,8 +132,27 @@ class entity_instance(object):
         super(entity_instance, self).__setattr__("method_list", None)
         self.wrapped_data.file = file
 
+    # Resolved lazily from _attribute_dict on first attribute access
+    attribute_table = None
+
     def __getattr__(self, name):
-        INVALID, FORWARD, INVERSE = range(3)
+        attributes = self.attribute_table
+        if attributes is None:
+            attributes = _attribute_dict.get(self.wrapped_data.is_a(True), False)
+            super(entity_instance, self).__setattr__("attribute_table", attributes)
+        if attributes:
+            try:
+                attr_cat, index, should_wrap = attributes[name]
+            except KeyError:
+                raise AttributeError(
+                    "entity instance of type '%s' has no attribute '%s'" % (self.wrapped_data.is_a(True), name)
+                )
+            if attr_cat == FORWARD:
+                value = self.wrapped_data.get_argument(index)
+                return entity_instance.wrap_value(value, self.wrapped_data.file) if should_wrap else value
+            return entity_instance.wrap_value(self.wrapped_data.get_inverse(index), self.wrapped_data.file)
+
+        # Type declarations, such as IfcLabel, only expose wrappedValue
         attr_cat = self.wrapped_data.get_attribute_category(name)
         if attr_cat == FORWARD:
             return entity_instance.wrap_value(
@@ -134,8 +176,12 @@ class entity_instance(object):
 
     @staticmethod
     def wrap_value(v, file):
-        def wrap(e):
-            return entity_instance(e, file)
+        if file is not None and file.instance_cache is not None:
+            wrap = file.wrap_instance
+        else:
+
+            def wrap(e):
+                return entity_instance(e, file)
 
         def is_instance(e):
             return isinstance(e, ifcopenshell_wrapper.entity_instance)
@@ -172,7 +218,15 @@ class entity_instance(object):
         return self.wrapped_data.get_argument_name(attr_idx)
 
     def __setattr__(self, key, value):
-        index = self.wrapped_data.get_argument_index(key)
+        attributes = self.attribute_table
+        if attributes is None:
+            attributes = _attribute_dict.get(self.wrapped_data.is_a(True), False)
+            super(entity_instance, self).__setattr__("attribute_table", attributes)
+        attribute = attributes.get(key) if attributes else None
+        if attribute and attribute[0] == FORWARD:
+            index = attribute[1]
+        else:
+            index = self.wrapped_data.get_argument_index(key)
         self[index] = value
 
     def __getitem__(self, key):
@@ -229,15 +283,28 @@ class entity_instance(object):
 
         :rtype: int
         """
-        return self.wrapped_data.id()
+        if self._id:
+            return self._id
+        step_id = self.wrapped_data.id()
+        if step_id:
+            super(entity_instance, self).__setattr__("_id", step_id)
+        return step_id
 
     def __eq__(self, other):
         if not isinstance(self, type(other)):
             return False
+        if self is other:
+            return True
         return self.wrapped_data == other.wrapped_data
 
     def __hash__(self):
-        return hash((self.id(), self.wrapped_data.file_pointer()))
+        if self._hash is not None:
+            return self._hash
+        step_id = self.id()
+        result = hash((step_id, self.wrapped_data.file_pointer()))
+        if step_id:
+            super(entity_instance, self).__setattr__("_hash", result)
+        return result
 
     def __dir__(self):
         return sorted(
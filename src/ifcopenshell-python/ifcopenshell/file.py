@@ -21,7 +21,10 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import sys
+import array
 import numbers
+import weakref
 import functools
 import ifcopenshell.util.element
 
@@ -36,7 +39,13 @@ except NameError:
     basestring = (str, bytes)
 
 
-class Transaction:
+class DictTransaction:
+    """The original transaction log, storing every operation as a dictionary
+
+    This is kept for comparison with the compact :class:`Transaction` and can
+    be selected by setting ``file.transaction_class``.
+    """
+
     def __init__(self, ifc_file):
         self.file = ifc_file
         self.operations = []
@@ -170,6 +179,236 @@ class Transaction:
                 pass
 
 
+ZIP_CHUNK_SIZE = 1 << 24
+
+
+class _ref(int):
+    """A serialised reference to an entity instance by STEP id"""
+
+    __slots__ = ()
+
+
+class _typed(tuple):
+    """A serialised (type, value) pair of an unidentified type instance, e.g. IfcLabel"""
+
+    __slots__ = ()
+
+
+def _sizeof(value):
+    if isinstance(value, tuple):
+        return sys.getsizeof(value) + sum(map(_sizeof, value))
+    return sys.getsizeof(value)
+
+
+class Transaction:
+    """A compact log of the operations performed on a file
+
+    Operations are stored as parallel arrays of action codes and STEP ids,
+    with a payload list that only holds the values required to reverse or
+    replay an operation. Entity references are stored as plain integers and
+    only non-null attributes are stored for created and deleted instances.
+    Inverses of deleted instances are only scanned if the instance is
+    actually referenced.
+
+    The approximate memory used by the payloads is tracked in ``nbytes`` so
+    that the file history can be bounded by memory as well as by count.
+    """
+
+    CREATE, EDIT, DELETE, BATCH_DELETE = range(4)
+
+    def __init__(self, ifc_file):
+        self.file = ifc_file
+        self.actions = array.array("B")
+        self.ids = array.array("q")
+        self.payloads = []
+        self.nbytes = 0
+        self.is_batched = False
+        self.batch_delete_index = 0
+        self.batch_delete_ids = set()
+        self.batch_inverses = []
+
+    def serialise_value(self, value):
+        if isinstance(value, entity_instance):
+            step_id = value.id()
+            if step_id:
+                return _ref(step_id)
+            return _typed((value.is_a(), value.wrappedValue))
+        elif isinstance(value, (tuple, list)):
+            return tuple(map(self.serialise_value, value))
+        return value
+
+    def unserialise_value(self, value):
+        if isinstance(value, _ref):
+            return self.file.by_id(value)
+        elif isinstance(value, _typed):
+            return self.file.create_entity(*value)
+        elif isinstance(value, tuple):
+            return tuple(map(self.unserialise_value, value))
+        return value
+
+    def serialise_attributes(self, element):
+        attributes = []
+        for i in range(len(element)):
+            value = element[i]
+            if value is not None:
+                attributes.append((i, self.serialise_value(value)))
+        return tuple(attributes)
+
+    def unserialise_attributes(self, element, attributes):
+        for i, value in attributes:
+            try:
+                element[i] = self.unserialise_value(value)
+            except:
+                # Catch discrepancy where IfcOpenShell creates but doesn't allow editing of invalid values
+                pass
+
+    def append(self, action, step_id, payload, index=None):
+        if index is None:
+            self.actions.append(action)
+            self.ids.append(step_id)
+            self.payloads.append(payload)
+        else:
+            self.actions.insert(index, action)
+            self.ids.insert(index, step_id)
+            self.payloads.insert(index, payload)
+        self.nbytes += self.actions.itemsize + self.ids.itemsize + _sizeof(payload)
+
+    def batch(self):
+        self.is_batched = True
+        self.batch_delete_index = len(self.actions)
+        self.batch_delete_ids = set()
+        self.batch_inverses = []
+
+    def unbatch(self):
+        for inverses in self.batch_inverses:
+            if inverses:
+                self.append(self.BATCH_DELETE, 0, inverses, index=self.batch_delete_index)
+        self.is_batched = False
+        self.batch_delete_index = 0
+        self.batch_delete_ids = set()
+        self.batch_inverses = []
+
+    def store_create(self, element):
+        step_id = element.id()
+        if step_id:
+            self.append(self.CREATE, step_id, (element.is_a(), self.serialise_attributes(element)))
+
+    def store_edit(self, element, index, value):
+        self.append(self.EDIT, element.id(), (index, self.serialise_value(element[index]), self.serialise_value(value)))
+
+    def store_delete(self, element):
+        inverses = None
+        step_id = element.id()
+        if self.is_batched:
+            if step_id not in self.batch_delete_ids:
+                self.batch_inverses.append(self.get_element_inverses(element))
+            self.batch_delete_ids.add(step_id)
+        else:
+            inverses = self.get_element_inverses(element)
+        self.append(self.DELETE, step_id, (element.is_a(), self.serialise_attributes(element), inverses))
+
+    def get_element_inverses(self, element):
+        if not self.file.get_total_inverses(element):
+            return None
+        inverses = []
+        for inverse in self.file.get_inverse(element):
+            for i in range(len(inverse)):
+                attribute = inverse[i]
+                if ifcopenshell.util.element.has_element_reference(attribute, element):
+                    inverses.append((inverse.id(), i, self.serialise_value(attribute)))
+        return tuple(inverses) or None
+
+    def restore_inverses(self, inverses):
+        for inverse_id, index, value in inverses or ():
+            self.file.by_id(inverse_id)[index] = self.unserialise_value(value)
+
+    def rollback(self):
+        for i in reversed(range(len(self.actions))):
+            action, step_id, payload = self.actions[i], self.ids[i], self.payloads[i]
+            if action == self.CREATE:
+                element = self.file.by_id(step_id)
+                if hasattr(element, "GlobalId") and element.GlobalId is None:
+                    # hack, otherwise ifcopenshell gets upset
+                    element.GlobalId = "x"
+                self.file.remove(element)
+            elif action == self.EDIT:
+                element = self.file.by_id(step_id)
+                try:
+                    element[payload[0]] = self.unserialise_value(payload[1])
+                except:
+                    # Catch discrepancy where IfcOpenShell creates but doesn't allow editing of invalid values
+                    pass
+            elif action == self.DELETE:
+                ifc_class, attributes, inverses = payload
+                element = self.file.create_entity(ifc_class, id=step_id)
+                self.unserialise_attributes(element, attributes)
+                self.restore_inverses(inverses)
+            elif action == self.BATCH_DELETE:
+                self.restore_inverses(payload)
+
+    def commit(self):
+        for i in range(len(self.actions)):
+            action, step_id, payload = self.actions[i], self.ids[i], self.payloads[i]
+            if action == self.CREATE:
+                element = self.file.create_entity(payload[0], id=step_id)
+                self.unserialise_attributes(element, payload[1])
+            elif action == self.EDIT:
+                element = self.file.by_id(step_id)
+                element[payload[0]] = self.unserialise_value(payload[2])
+            elif action == self.DELETE:
+                self.file.remove(self.file.by_id(step_id))
+
+
+def _unwrap_ids(value):
+    if isinstance(value, ifcopenshell_wrapper.entity_instance):
+        step_id = value.id()
+        if step_id:
+            return _ref(step_id)
+        return _typed((value.is_a(), _unwrap_ids(value.get_argument(0))))
+    elif isinstance(value, tuple):
+        return tuple(map(_unwrap_ids, value))
+    return value
+
+
+def _get_value_kinds(value, kinds):
+    if isinstance(value, (_ref, _typed)):
+        kinds.add(type(value))
+    elif isinstance(value, tuple):
+        for v in value:
+            _get_value_kinds(v, kinds)
+    return kinds
+
+
+def _restore_value(value, is_tagged):
+    if isinstance(value, _ref):
+        return int(value)
+    elif isinstance(value, _typed):
+        return tuple(value) if is_tagged else value[1]
+    elif isinstance(value, tuple):
+        return tuple(_restore_value(v, is_tagged) for v in value)
+    return value
+
+
+def _to_column(values, argument_type):
+    import numpy as np
+
+    if argument_type == "ENTITY INSTANCE" and all(isinstance(v, _ref) or v is None for v in values):
+        return np.fromiter((v or 0 for v in values), dtype=np.int64, count=len(values))
+    elif argument_type == "DOUBLE":
+        return np.fromiter((np.nan if v is None else v for v in values), dtype=np.float64, count=len(values))
+    elif argument_type == "INT" and None not in values:
+        return np.fromiter(values, dtype=np.int64, count=len(values))
+    kinds = set()
+    for value in values:
+        _get_value_kinds(value, kinds)
+    # Typed values are only tagged with their type if they could be confused with references
+    is_tagged = len(kinds) == 2
+    column = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = _restore_value(value, is_tagged) if kinds else value
+    return column
+
+
 class file(object):
     """Base class for containing IFC files.
 
@@ -187,6 +426,8 @@ class file(object):
         >>> True
     """
 
+    zip_compression_level = 6
+
     def __init__(self, f=None, schema=None):
         if f is not None:
             self.wrapped_data = f
@@ -195,30 +436,122 @@ class file(object):
             args = map(ifcopenshell_wrapper.schema_by_name, args)
             self.wrapped_data = ifcopenshell_wrapper.file(*args)
         self.history_size = 64
+        self.history_max_bytes = None
         self.history = []
         self.future = []
         self.transaction = None
+        self.transaction_class = Transaction
+        self.transaction_listeners = {}
+        self.instance_cache = None
 
     def set_history_size(self, size):
         self.history_size = size
+        self.trim_history()
+
+    def set_history_max_bytes(self, max_bytes):
+        """Bounds the undo history by the approximate memory used by its transactions
+
+        The oldest transactions are discarded first. The most recent
+        transaction is always kept so that it may be undone.
+
+        :param max_bytes: The maximum number of bytes, or None for no limit
+        :type max_bytes: None|int
+        """
+        self.history_max_bytes = max_bytes
+        self.trim_history()
+
+    def get_history_nbytes(self):
+        """Returns the approximate memory in bytes used by the undo history
+
+        :rtype: int
+        """
+        return sum(getattr(t, "nbytes", 0) for t in self.history)
+
+    def trim_history(self):
         while len(self.history) > self.history_size:
             self.history.pop(0)
+        if self.history_max_bytes is None:
+            return
+        nbytes = self.get_history_nbytes()
+        while len(self.history) > 1 and nbytes > self.history_max_bytes:
+            nbytes -= getattr(self.history.pop(0), "nbytes", 0)
+
+    def set_instance_cache(self, enabled):
+        """Enables or disables the entity instance identity cache
+
+        When enabled, the same STEP id always returns the same
+        entity_instance object for as long as that object is referenced
+        elsewhere. This saves allocations and speeds up hashing when many
+        instances are put into sets, such as when traversing subgraphs.
+
+        :param enabled: Whether or not to cache entity instances
+        :type enabled: bool
+        """
+        self.instance_cache = weakref.WeakValueDictionary() if enabled else None
+
+    def wrap_instance(self, e):
+        """Wraps a low level wrapper instance, reusing a cached entity_instance if possible
+
+        :param e: The low level SWIG instance
+        :type e: ifcopenshell.ifcopenshell_wrapper.entity_instance
+        :rtype: ifcopenshell.entity_instance.entity_instance
+        """
+        if self.instance_cache is None:
+            return entity_instance(e, self)
+        step_id = e.id()
+        if not step_id:
+            return entity_instance(e, self)
+        inst = self.instance_cache.get(step_id)
+        if inst is None:
+            inst = self.instance_cache[step_id] = entity_instance(e, self)
+            object.__setattr__(inst, "_id", step_id)
+        return inst
+
+    def add_transaction_listener(self, name, callback):
+        """Add a callback which is notified whenever the file changes through a transaction
+
+        The callback is called with the file, the event name and the
+        transaction, after the transaction is ended, discarded, undone or
+        redone. The event name is one of "end", "discard", "undo" or "redo".
+
+        :param name: A unique name for the listener
+        :type name: string
+        :param callback: The callback function
+        :type callback: callable
+        """
+        self.transaction_listeners[name] = callback
+
+    def remove_transaction_listener(self, name):
+        """Remove a transaction listener previously added by name
+
+        :param name: The name of the listener
+        :type name: string
+        """
+        self.transaction_listeners.pop(name, None)
+
+    def notify_transaction_listeners(self, event, transaction):
+        for listener in list(self.transaction_listeners.values()):
+            listener(self, event, transaction)
 
     def begin_transaction(self):
-        self.transaction = Transaction(self)
+        self.transaction = self.transaction_class(self)
 
     def end_transaction(self):
         if self.transaction:
-            self.history.append(self.transaction)
-            if len(self.history) > self.history_size:
-                self.history.pop(0)
+            transaction = self.transaction
+            self.history.append(transaction)
             self.future = []
             self.transaction = None
+            self.trim_history()
+            self.notify_transaction_listeners("end", transaction)
 
     def discard_transaction(self):
-        if self.transaction:
-            self.transaction.rollback()
+        transaction = self.transaction
+        if transaction:
+            transaction.rollback()
         self.transaction = None
+        if transaction:
+            self.notify_transaction_listeners("discard", transaction)
 
     def undo(self):
         if not self.history:
@@ -226,6 +559,7 @@ class file(object):
         transaction = self.history.pop()
         transaction.rollback()
         self.future.append(transaction)
+        self.notify_transaction_listeners("undo", transaction)
 
     def redo(self):
         if not self.future:
@@ -233,6 +567,7 @@ class file(object):
         transaction = self.future.pop()
         transaction.commit()
         self.history.append(transaction)
+        self.notify_transaction_listeners("redo", transaction)
 
     def create_entity(self, type, *args, **kwargs):
         """Create a new IFC entity in the file.
@@ -290,6 +625,9 @@ class file(object):
         # the owner.
         e.wrapped_data.this.disown()
 
+        if self.instance_cache is not None:
+            self.instance_cache[e.id()] = e
+
         if self.transaction:
             self.transaction.store_create(e)
 
@@ -303,9 +641,9 @@ class file(object):
 
     def __getitem__(self, key):
         if isinstance(key, numbers.Integral):
-            return entity_instance(self.wrapped_data.by_id(key), self)
+            return self.wrap_instance(self.wrapped_data.by_id(key))
         elif isinstance(key, basestring):
-            return entity_instance(self.wrapped_data.by_guid(str(key)), self)
+            return self.wrap_instance(self.wrapped_data.by_guid(str(key)))
 
     def by_id(self, id):
         """Return an IFC entity instance filtered by IFC ID.
@@ -334,7 +672,7 @@ class file(object):
         if self.transaction:
             max_id = self.wrapped_data.getMaxId()
         inst.wrapped_data.this.disown()
-        result = entity_instance(self.wrapped_data.add(inst.wrapped_data, -1 if _id is None else _id), self)
+        result = self.wrap_instance(self.wrapped_data.add(inst.wrapped_data, -1 if _id is None else _id))
         if self.transaction:
             added_elements = [e for e in self.traverse(result) if e.id() > max_id]
             [self.transaction.store_create(e) for e in reversed(added_elements)]
@@ -352,9 +690,10 @@ class file(object):
         :returns: A list of ifcopenshell.entity_instance.entity_instance objects
         :rtype: list
         """
+        wrap = self.wrap_instance
         if include_subtypes:
-            return [entity_instance(e, self) for e in self.wrapped_data.by_type(type)]
-        return [entity_instance(e, self) for e in self.wrapped_data.by_type_excl_subtypes(type)]
+            return [wrap(e) for e in self.wrapped_data.by_type(type)]
+        return [wrap(e) for e in self.wrapped_data.by_type_excl_subtypes(type)]
 
     def traverse(self, inst, max_levels=None, breadth_first=False):
         """Get a list of all referenced instances for a particular instance including itself
@@ -376,7 +715,95 @@ class file(object):
         else:
             fn = self.wrapped_data.traverse
 
-        return [entity_instance(e, self) for e in fn(inst.wrapped_data, max_levels)]
+        wrap = self.wrap_instance
+        return [wrap(e) for e in fn(inst.wrapped_data, max_levels)]
+
+    def get_attributes(self, elements, attributes, include_subtypes=True):
+        """Return the values of attributes for many elements as columns
+
+        This bypasses the creation of entity_instance wrappers, so is
+        considerably faster than accessing attributes one element at a time.
+        References to other entity instances are returned as their integer
+        STEP ids rather than as wrapped instances, with 0 representing null.
+
+        Entity references and floating point attributes are returned as
+        typed NumPy arrays, with null floats represented as NaN. All other
+        attributes (strings, enumerations, aggregates, etc) are returned as
+        NumPy object arrays. Values of defined types in a select, such as an
+        IfcLabel, are returned as their underlying value, unless the column
+        also contains references, in which case they are returned as a tuple
+        of their type and value so that they cannot be mistaken for ids.
+        Attributes which do not exist for a particular element are returned as
+        None and inverse attributes are returned as tuples of ids.
+
+        :param elements: Either an IFC class name, or a list of STEP ids or entity instances
+        :type elements: string|list
+        :param attributes: A list of attribute names, forward or inverse
+        :type attributes: list
+        :param include_subtypes: Whether to include subtypes when an IFC class is provided
+        :type include_subtypes: bool
+        :returns: A dictionary of NumPy arrays, including an "id" column
+        :rtype: dict
+
+        Example::
+
+            columns = ifc_file.get_attributes("IfcProduct", ["GlobalId", "Name", "ObjectPlacement"])
+            print(columns["id"][0], columns["GlobalId"][0], columns["ObjectPlacement"][0])
+            >>> 122 2XQ$n5SLP5MBLyL442paFx 57
+        """
+        import numpy as np
+
+        INVALID, FORWARD, INVERSE = range(3)
+
+        if isinstance(elements, basestring):
+            if include_subtypes:
+                instances = self.wrapped_data.by_type(elements)
+            else:
+                instances = self.wrapped_data.by_type_excl_subtypes(elements)
+        else:
+            instances = [
+                e.wrapped_data if isinstance(e, entity_instance) else self.wrapped_data.by_id(e) for e in elements
+            ]
+
+        ids = array.array("q")
+        values = [[] for attribute in attributes]
+        argument_types = [None] * len(attributes)
+        accessors = {}
+
+        for inst in instances:
+            ifc_class = inst.is_a()
+            accessor = accessors.get(ifc_class)
+            if accessor is None:
+                accessor = []
+                for i, attribute in enumerate(attributes):
+                    category = inst.get_attribute_category(attribute)
+                    if category == FORWARD:
+                        index = inst.get_argument_index(attribute)
+                        argument_type = inst.get_argument_type(index)
+                    elif category == INVERSE:
+                        index = attribute
+                        argument_type = "INVERSE"
+                    else:
+                        index = argument_type = None
+                    if argument_types[i] is None:
+                        argument_types[i] = argument_type
+                    elif argument_type is not None and argument_types[i] != argument_type:
+                        argument_types[i] = "MIXED"
+                    accessor.append((category, index))
+                accessors[ifc_class] = accessor
+            ids.append(inst.id())
+            for column, (category, index) in zip(values, accessor):
+                if category == FORWARD:
+                    column.append(_unwrap_ids(inst.get_argument(index)))
+                elif category == INVERSE:
+                    column.append(_unwrap_ids(inst.get_inverse(index)))
+                else:
+                    column.append(None)
+
+        columns = {"id": np.frombuffer(ids, dtype=np.int64) if len(ids) else np.empty(0, dtype=np.int64)}
+        for attribute, column, argument_type in zip(attributes, values, argument_types):
+            columns[attribute] = _to_column(column, argument_type)
+        return columns
 
     def get_inverse(self, inst, allow_duplicate=False):
         """Return a list of entities that reference this entity
@@ -386,7 +813,8 @@ class file(object):
         :returns: A list of ifcopenshell.entity_instance.entity_instance objects
         :rtype: list
         """
-        inverses = [entity_instance(e, self) for e in self.wrapped_data.get_inverse(inst.wrapped_data)]
+        wrap = self.wrap_instance
+        inverses = [wrap(e) for e in self.wrapped_data.get_inverse(inst.wrapped_data)]
         if allow_duplicate:
             return inverses
         return set(inverses)
@@ -414,6 +842,8 @@ class file(object):
         """
         if self.transaction:
             self.transaction.store_delete(inst)
+        if self.instance_cache is not None:
+            self.instance_cache.pop(inst.id(), None)
         return self.wrapped_data.remove(inst.wrapped_data)
 
     def batch(self):
@@ -431,6 +861,54 @@ class file(object):
     def __iter__(self):
         return iter(self[id] for id in self.wrapped_data.entity_names())
 
+    def write(self, path, compresslevel=None):
+        """Writes the file to disk as IFC-SPF
+
+        Paths with an .ifczip extension are written as a zip archive, without
+        an intermediate uncompressed file on disk. See write_zip.
+
+        :param path: The path to write to
+        :type path: str
+        :param compresslevel: The zlib compression level from 0 (none) to 9
+            (smallest and slowest) used for .ifczip archives. Defaults to
+            ifcopenshell.file.zip_compression_level.
+        :type compresslevel: int
+        :return: None
+        :rtype: None
+        """
+        if str(path).lower().endswith(".ifczip"):
+            return self.write_zip(path, compresslevel)
+        return self.wrapped_data.write(path)
+
+    def write_zip(self, path, compresslevel=None):
+        """Writes the file to disk as an .ifczip archive
+
+        This is not streamed. The whole model is first serialised to a string
+        in memory, which is then encoded and compressed in chunks so that no
+        second, encoded copy of it is held as well.
+
+        :param path: The path to write to
+        :type path: str
+        :param compresslevel: The zlib compression level, see write
+        :type compresslevel: int
+        :return: None
+        :rtype: None
+        """
+        import os
+        import zipfile
+
+        if compresslevel is None:
+            compresslevel = self.zip_compression_level
+        name = os.path.splitext(os.path.basename(path))[0] + ".ifc"
+        data = self.wrapped_data.to_string()
+        # UTF-8 needs at most 4 bytes per character
+        force_zip64 = len(data) * 4 >= zipfile.ZIP64_LIMIT
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as archive:
+            with archive.open(name, "w", force_zip64=force_zip64) as member:
+                # Encoding in chunks avoids holding a second copy of the whole file
+                for i in range(0, len(data), ZIP_CHUNK_SIZE):
+                    member.write(data[i : i + ZIP_CHUNK_SIZE].encode("utf-8"))
+
     @staticmethod
     def from_string(s):
         return file(ifcopenshell_wrapper.read(s))
@@ -18,8 +18,12 @@
 
 import os
 import re
+import json
+import bisect
 import logging
+import multiprocessing
 import numpy as np
+from array import array
 from datetime import date
 
 import ifcopenshell.util.element
@@ -183,13 +187,27 @@ class ids:
         ids_file.specifications = [specification.parse(s) for s in ids_content["specification"]]
         return ids_file
 
-    def validate(self, ifc_file, logger=None):
+    def validate(self, ifc_file, logger=None, processes=1):
         """Use to validate IFC model against IDS specifications.
 
+        Only the objects of the class named by an entity applicability facet
+        are checked, and the type, properties, and associations of each object
+        are looked up once and shared by all specifications.
+
+        Outcomes are recorded in a compact :class:`results` object. Messages
+        are only rendered for the outcomes that the logger's handlers would
+        emit, so passing elements are cheap unless valid cases are reported.
+
         :param ifc_file: path to ifc file
         :type ifc_file: str
         :param logger: Logging object with handlers, defaults to None
         :type logger: logging, optional
+        :param processes: Number of processes to validate specifications in
+            parallel. Results are logged in the same order as when validating
+            sequentially, defaults to 1
+        :type processes: int, optional
+        :return: The outcome of validating each applicable element
+        :rtype: results
         """
         if not isinstance(logger, logging.Logger):
             logger = logging.getLogger("IDS_Logger")
@@ -210,16 +228,30 @@ class ids:
                 else:
                     logger.error("IFC version not recognized")
 
-        # Consider other way around: for elem, for spec so we can see if an element pass all IDSes?
-        for spec in self.specifications:
-            self.ifc_applicable = 0
-            self.ifc_passed = 0
-            for elem in ifc_file.by_type("IfcObject"):
-                apply, comply = spec(elem, logger)
-                if apply:
-                    self.ifc_applicable += 1
-                if comply:
-                    self.ifc_passed += 1
+        views = element_views()
+        validation_results = results(self, ifc_file, views)
+        if processes > 1 and len(self.specifications) > 1 and "fork" in multiprocessing.get_all_start_methods():
+            # Forked processes share the parsed model instead of parsing it again
+            global _validation
+            _validation = (self, ifc_file, views)
+            with multiprocessing.get_context("fork").Pool(processes) as pool:
+                for worker_results in pool.map(_validate_specification, range(len(self.specifications))):
+                    validation_results.extend(worker_results)
+            _validation = None
+        else:
+            for i in range(len(self.specifications)):
+                self.validate_specification(i, ifc_file, validation_results, views)
+
+        is_logging_valid = is_logged(logger, logging.INFO)
+        is_logging_invalid = is_logged(logger, logging.ERROR)
+        for i, spec in enumerate(self.specifications):
+            self.ifc_applicable, self.ifc_passed = validation_results.get_totals(i)
+            if is_logging_valid or is_logging_invalid:
+                for j in validation_results.get_outcomes(i, include_passed=is_logging_valid):
+                    if validation_results.passed[j]:
+                        logger.info(validation_results.get_message(j))
+                    elif is_logging_invalid:
+                        logger.error(validation_results.get_message(j))
             if self.ifc_applicable == 0:
                 if spec.necessity == "required":
                     logger.error("No applicable elements found. Minimum 1 applicable element required.")
@@ -242,6 +274,27 @@ class ids:
             )
         for h in logger.handlers:
             h.flush()
+        return validation_results
+
+    def validate_specification(self, index, ifc_file, validation_results, views):
+        """Records the outcomes of validating a model against one specification
+
+        :param index: The index of the specification to validate against
+        :type index: int
+        :param ifc_file: The model to validate
+        :type ifc_file: ifcopenshell.file.file
+        :param validation_results: The results to record outcomes in
+        :type validation_results: results
+        :param views: Element data shared between specifications
+        :type views: element_views
+        :return: None
+        :rtype: None
+        """
+        spec = self.specifications[index]
+        for elem in spec.get_candidates(ifc_file):
+            is_applicable, facet_index = spec.check(elem, views)
+            if is_applicable:
+                validation_results.add(index, elem.id(), facet_index)
 
 
 class specification:
@@ -333,62 +386,99 @@ class specification:
         else:
             self.requirements = boolean_and([facet])
 
-    def __call__(self, inst, logger):
+    def get_candidates(self, ifc_file):
+        """Returns the objects that the applicability could apply to.
+
+        Objects are narrowed down by class if the applicability has an entity
+        facet with a simple value, otherwise all objects are candidates.
+
+        :param ifc_file: The model to validate
+        :type ifc_file: ifcopenshell.file.file
+        :return: A list of IFC objects
+        :rtype: list
+        """
+        for term in self.applicability.terms if self.applicability else ():
+            if isinstance(term, entity) and isinstance(term.name, str):
+                try:
+                    elements = ifc_file.by_type(term.name)
+                except RuntimeError:
+                    # The class does not exist in the schema of the model
+                    return []
+                return [e for e in elements if e.is_a("IfcObject")]
+        return ifc_file.by_type("IfcObject")
+
+    def __call__(self, inst, logger, views=None):
         """When specification is called on an ifc instance, it validates against applicability and requirements.
 
         :param inst: IFC entity element
         :type inst: IFC entity
         :param logger: Logging object
         :type logger: logging
+        :param views: Element data shared between specifications, defaults to None
+        :type views: element_views, optional
         :return: results of validation on applicability and requirements
         :rtype: [bool,bool]
         """
-        if self.applicability(inst, logger):
+        if views is None:
+            views = element_views()
+        if self.applicability(inst, logger, views):
 
-            valid = self.requirements(inst, logger)
+            valid = self.requirements(inst, logger, views)
 
             if valid:
-                logger.info(
-                    {
-                        "guid": inst.GlobalId,
-                        "result": valid.success,
-                        "sentence": str(self)
-                        + ".\n"
-                        + inst.is_a()
-                        + " '"
-                        + str(inst.Name)
-                        + "' (#"
-                        + str(inst.id())
-                        + ") has "
-                        + str(valid)
-                        + " so is compliant",
-                        "ifc_element": inst,
-                    }
-                )
+                logger.info(self.get_message(inst, valid))
                 return True, True
             else:
-                # BUG "has does not have"
-                logger.error(
-                    {
-                        "guid": inst.GlobalId,
-                        "result": valid.success,
-                        "sentence": str(self)
-                        + ".\n"
-                        + inst.is_a()
-                        + " '"
-                        + str(inst.Name)
-                        + "' (#"
-                        + str(inst.id())
-                        + ") has "
-                        + str(valid)
-                        + " so is not compliant",
-                        "ifc_element": inst,
-                    }
-                )
+                logger.error(self.get_message(inst, valid))
                 return True, False
         else:
             return False, False
 
+    def check(self, inst, views):
+        """Checks an ifc instance without building any messages.
+
+        :param inst: IFC entity element
+        :type inst: IFC entity
+        :param views: Element data shared between specifications
+        :type views: element_views
+        :return: Whether the specification applies, and the index of the first
+            failing requirement facet, or -1 if all requirements pass
+        :rtype: [bool,int]
+        """
+        if not self.applicability(inst, None, views):
+            return False, -1
+        for i, term in enumerate(self.requirements.terms):
+            if not term(inst, None, views):
+                return True, i
+        return True, -1
+
+    def get_message(self, inst, valid):
+        """Builds the log message for an applicable ifc instance.
+
+        :param inst: IFC entity element
+        :type inst: IFC entity
+        :param valid: The evaluation of the requirements
+        :type valid: facet_evaluation
+        :return: A dictionary with the guid, result, sentence, and instance
+        :rtype: dict
+        """
+        # BUG "has does not have"
+        return {
+            "guid": inst.GlobalId,
+            "result": valid.success,
+            "sentence": str(self)
+            + ".\n"
+            + inst.is_a()
+            + " '"
+            + str(inst.Name)
+            + "' (#"
+            + str(inst.id())
+            + ") has "
+            + str(valid)
+            + (" so is compliant" if valid else " so is not compliant"),
+            "ifc_element": inst,
+        }
+
     def __str__(self):
         """Represent the specification in human readable sentence.
 
@@ -412,6 +502,53 @@ class facet_evaluation:
         return self.str
 
 
+class element_views:
+    """Caches the data of IFC elements that facets validate against.
+
+    Getting the type, property sets, and associations of an element is
+    relatively slow, so they are only looked up once per element and shared
+    between all facets and specifications.
+    """
+
+    def __init__(self):
+        self.types = {}
+        self.attributes = {}
+        self.psets = {}
+        self.associations = {}
+
+    def get_type(self, inst):
+        """Returns the type of an element, or None if it is untyped"""
+        try:
+            return self.types[inst.id()]
+        except KeyError:
+            element_type = self.types[inst.id()] = ifcopenshell.util.element.get_type(inst)
+            return element_type
+
+    def get_attributes(self, inst):
+        """Returns the attributes of an element keyed by lowercase name"""
+        try:
+            return self.attributes[inst.id()]
+        except KeyError:
+            attributes = self.attributes[inst.id()] = {k.lower(): v for k, v in inst.get_info().items()}
+            return attributes
+
+    def get_psets(self, inst):
+        """Returns the properties of an element as per ifcopenshell.util.element.get_psets"""
+        try:
+            return self.psets[inst.id()]
+        except KeyError:
+            psets = self.psets[inst.id()] = ifcopenshell.util.element.get_psets(inst)
+            return psets
+
+    def get_associations(self, inst):
+        """Returns the associations of an element"""
+        try:
+            return self.associations[inst.id()]
+        except KeyError:
+            associations = self.associations[inst.id()] = inst.HasAssociations
+            return associations
+
+
 class meta_facet(type):
     """A metaclass for automatically registering facets in a map to be instantiated based on XML tagnames."""
 
@@ -506,13 +643,15 @@ class entity(facet):
             print(e)
         return fac_dict
 
-    def __call__(self, inst, logger):
+    def __call__(self, inst, logger, views=None):
         """Validate an ifc instance against that entity facet.
 
         :param inst: IFC entity element
         :type inst: IFC entity
         :param logger: Logging object
         :type logger: logging
+        :param views: Element data shared between specifications, defaults to None
+        :type views: element_views, optional
         :return: result of the validation as bool and message
         :rtype: facet_evaluation(bool, str)
         """
@@ -571,20 +710,25 @@ class classification(facet):
         }
         return fac_dict
 
-    def __call__(self, inst, logger):
+    def __call__(self, inst, logger, views=None):
         """Validate an ifc instance against that classification facet.
 
         :param inst: IFC entity element
         :type inst: IFC entity
         :param logger: Logging object
         :type logger: logging
+        :param views: Element data shared between specifications, defaults to None
+        :type views: element_views, optional
         :return: result of the validation as bool and message
         :rtype: facet_evaluation(bool, str)
         """
+        if views is None:
+            views = element_views()
 
-        instance_classiciations = inst.HasAssociations
-        if ifcopenshell.util.element.get_type(inst):
-            type_classifications = ifcopenshell.util.element.get_type(inst).HasAssociations
+        instance_classiciations = views.get_associations(inst)
+        element_type = views.get_type(inst)
+        if element_type:
+            type_classifications = views.get_associations(element_type)
         else:
             type_classifications = ()
 
@@ -671,27 +815,32 @@ class property(facet):
         }
         return fac_dict
 
-    def __call__(self, inst, logger):
+    def __call__(self, inst, logger, views=None):
         """Validate an ifc instance against that property facet.
 
         :param inst: IFC entity element
         :type inst: IFC entity
         :param logger: Logging object
         :type logger: logging
+        :param views: Element data shared between specifications, defaults to None
+        :type views: element_views, optional
         :return: result of the validation as bool and message
         :rtype: facet_evaluation(bool, str)
         """
+        if views is None:
+            views = element_views()
 
         self.location = self.node["@location"]
 
         if self.propertyset == "attribute":
-            val = {k.lower(): v for k, v in inst.get_info().items()}.get(self.name, None)
+            val = views.get_attributes(inst).get(self.name, None)
         else:
             # TODO sometimes AttributeError: 'str' object has no attribute 'wrappedValue'
-            instance_props = ifcopenshell.util.element.get_psets(inst)
+            instance_props = views.get_psets(inst)
 
-            if ifcopenshell.util.element.get_type(inst):
-                type_props = ifcopenshell.util.element.get_psets(ifcopenshell.util.element.get_type(inst))
+            element_type = views.get_type(inst)
+            if element_type:
+                type_props = views.get_psets(element_type)
             else:
                 type_props = {}
 
@@ -772,25 +921,28 @@ class material(facet):
         }
         return fac_dict
 
-    def __call__(self, inst, logger):
+    def __call__(self, inst, logger, views=None):
         """Validate an ifc instance against that material facet.
 
         :param inst: IFC entity element
         :type inst: IFC entity
         :param logger: Logging object
         :type logger: logging
+        :param views: Element data shared between specifications, defaults to None
+        :type views: element_views, optional
         :return: result of the validation as bool and message
         :rtype: facet_evaluation(bool, str)
         """
+        if views is None:
+            views = element_views()
 
         self.location = self.node["@location"]
 
-        instance_material_rel = [rel for rel in inst.HasAssociations if rel.is_a("IfcRelAssociatesMaterial")]
-        if ifcopenshell.util.element.get_type(inst):
+        instance_material_rel = [rel for rel in views.get_associations(inst) if rel.is_a("IfcRelAssociatesMaterial")]
+        element_type = views.get_type(inst)
+        if element_type:
             type_material_rel = [
-                rel
-                for rel in ifcopenshell.util.element.get_type(inst).HasAssociations
-                if rel.is_a("IfcRelAssociatesMaterial")
+                rel for rel in views.get_associations(element_type) if rel.is_a("IfcRelAssociatesMaterial")
             ]
         else:
             type_material_rel = []
@@ -1051,6 +1203,162 @@ class restriction:
         return msg
 
 
+class results:
+    """The outcomes of validating a model against the specifications of an IDS.
+
+    Each applicable element is recorded as a row of compact arrays holding
+    the specification index, the element id, the index of the first failing
+    requirement facet (or -1), and whether it passed. Rows are ordered by
+    specification. Messages and reports are rendered from these rows on
+    demand.
+
+    Example::
+
+        validation_results = my_ids.validate(ifc_file)
+        for i in validation_results.get_outcomes(include_passed=False):
+            print(validation_results.get_message(i)["sentence"])
+        validation_results.to_json("report.json")
+    """
+
+    def __init__(self, ids_file, ifc_file, views=None):
+        self.ids_file = ids_file
+        self.ifc_file = ifc_file
+        self.views = views or element_views()
+        self.specifications = array("I")
+        self.elements = array("q")
+        self.facets = array("i")
+        self.passed = array("B")
+
+    def __len__(self):
+        return len(self.elements)
+
+    def add(self, spec_index, element_id, facet_index):
+        self.specifications.append(spec_index)
+        self.elements.append(element_id)
+        self.facets.append(facet_index)
+        self.passed.append(facet_index == -1)
+
+    def extend(self, other):
+        self.specifications.extend(other.specifications)
+        self.elements.extend(other.elements)
+        self.facets.extend(other.facets)
+        self.passed.extend(other.passed)
+
+    def get_outcomes(self, spec_index=None, include_passed=True):
+        """Returns the row indices of outcomes, in validation order.
+
+        :param spec_index: Only return outcomes of this specification, defaults to None
+        :type spec_index: int, optional
+        :param include_passed: Whether to include passing elements, defaults to True
+        :type include_passed: bool, optional
+        :return: A list of row indices
+        :rtype: list[int]
+        """
+        if spec_index is None:
+            start, end = 0, len(self.elements)
+        else:
+            start, end = self.get_rows(spec_index)
+        if include_passed:
+            return list(range(start, end))
+        return [i for i in range(start, end) if not self.passed[i]]
+
+    def get_rows(self, spec_index):
+        """Returns the start and end row of the outcomes of a specification."""
+        start = bisect.bisect_left(self.specifications, spec_index)
+        end = bisect.bisect_right(self.specifications, spec_index, start)
+        return start, end
+
+    def get_totals(self, spec_index):
+        """Returns the number of applicable and passing elements of a specification.
+
+        :param spec_index: The index of the specification
+        :type spec_index: int
+        :return: The number of applicable and passing elements
+        :rtype: tuple[int, int]
+        """
+        start, end = self.get_rows(spec_index)
+        return end - start, sum(self.passed[start:end])
+
+    def get_message(self, i):
+        """Renders the log message of an outcome, as logged during validation.
+
+        :param i: The row index of the outcome
+        :type i: int
+        :return: A dictionary with the guid, result, sentence, and instance
+        :rtype: dict
+        """
+        spec = self.ids_file.specifications[self.specifications[i]]
+        inst = self.ifc_file.by_id(self.elements[i])
+        # Facets describe themselves using the last instance they evaluated
+        spec.applicability(inst, None, self.views)
+        return spec.get_message(inst, spec.requirements(inst, None, self.views))
+
+    def asdict(self, include_passed=False):
+        """Renders outcomes as a list of JSON compatible dictionaries.
+
+        :param include_passed: Whether to include passing elements, defaults to False
+        :type include_passed: bool, optional
+        :return: A list of dictionaries
+        :rtype: list[dict]
+        """
+        report = []
+        for i in self.get_outcomes(include_passed=include_passed):
+            message = self.get_message(i)
+            report.append(
+                {
+                    "specification": self.ids_file.specifications[self.specifications[i]].name,
+                    "id": self.elements[i],
+                    "guid": message["guid"],
+                    "result": bool(self.passed[i]),
+                    "facet": self.facets[i] if self.facets[i] != -1 else None,
+                    "sentence": message["sentence"],
+                }
+            )
+        return report
+
+    def to_json(self, filepath=None, include_passed=False):
+        """Renders outcomes as JSON.
+
+        :param filepath: Path to save the report to, defaults to None
+        :type filepath: str, optional
+        :param include_passed: Whether to include passing elements, defaults to False
+        :type include_passed: bool, optional
+        :return: The JSON report
+        :rtype: str
+        """
+        report = json.dumps(self.asdict(include_passed=include_passed), indent=4)
+        if filepath:
+            with open(filepath, "w") as f:
+                f.write(report)
+        return report
+
+
+def is_logged(logger, level):
+    """Whether any handler of a logger would emit a record of a given level"""
+    if not logger.isEnabledFor(level):
+        return False
+    while logger:
+        for handler in logger.handlers:
+            if level >= handler.level:
+                return True
+        if not logger.propagate:
+            break
+        logger = logger.parent
+    return level >= logging.lastResort.level if logging.lastResort else False
+
+
+_validation = None
+
+
+def _validate_specification(index):
+    ids_file, ifc_file, views = _validation
+    validation_results = results(ids_file, ifc_file, views)
+    ids_file.validate_specification(index, ifc_file, validation_results, views)
+    # Only the compact arrays are sent back, as files cannot be sent between processes
+    validation_results.ids_file = validation_results.ifc_file = validation_results.views = None
+    return validation_results
+
+
 class SimpleHandler(logging.StreamHandler):
     """Logging handler listing all cases in python list."""
 
@@ -27,6 +27,84 @@ def get_psets(element, psets_only=False, qtos_only=False):
     return psets
 
 
+def get_pset(element, name, prop=None, psets_only=False, qtos_only=False):
+    definition = get_pset_definition(element, name, psets_only=psets_only, qtos_only=qtos_only)
+    if definition is None:
+        return None
+    if prop is None:
+        return get_property_definition(definition)
+    return get_property_definition_value(definition, prop)
+
+
+def get_pset_values(elements, name, prop, psets_only=False, qtos_only=False):
+    # Property definitions are often shared, so each value is only read once
+    results = []
+    values = {}
+    for element in elements:
+        definition = get_pset_definition(element, name, psets_only=psets_only, qtos_only=qtos_only)
+        if definition is None:
+            results.append(None)
+            continue
+        definition_id = definition.id()
+        if definition_id not in values:
+            values[definition_id] = get_property_definition_value(definition, prop)
+        results.append(values[definition_id])
+    return results
+
+
+def get_pset_definition(element, name, psets_only=False, qtos_only=False):
+    if element.is_a("IfcTypeObject"):
+        for definition in element.HasPropertySets or []:
+            if definition.Name != name:
+                continue
+            if psets_only and not definition.is_a("IfcPropertySet"):
+                continue
+            if qtos_only and not definition.is_a("IfcElementQuantity"):
+                continue
+            return definition
+    elif element.is_a("IfcMaterialDefinition") or element.is_a("IfcProfileDef"):
+        if qtos_only:
+            return
+        for definition in element.HasProperties or []:
+            if definition.Name == name:
+                return definition
+    elif hasattr(element, "IsDefinedBy"):
+        for relationship in element.IsDefinedBy:
+            if relationship.is_a("IfcRelDefinesByProperties"):
+                definition = relationship.RelatingPropertyDefinition
+                if definition.Name != name:
+                    continue
+                if psets_only and not definition.is_a("IfcPropertySet"):
+                    continue
+                if qtos_only and not definition.is_a("IfcElementQuantity"):
+                    continue
+                return definition
+
+
+def get_property_definition_value(definition, name):
+    if name == "id":
+        return definition.id()
+    if definition.is_a("IfcElementQuantity"):
+        for quantity in definition.Quantities or []:
+            if quantity.Name == name and quantity.is_a("IfcPhysicalSimpleQuantity"):
+                return quantity[3]
+        return
+    elif definition.is_a("IfcPropertySet"):
+        properties = definition.HasProperties
+    elif definition.is_a("IfcMaterialProperties") or definition.is_a("IfcProfileProperties"):
+        properties = definition.Properties
+    else:
+        # Entity introduced in IFC4
+        # definition.is_a('IfcPreDefinedPropertySet'):
+        for prop in range(4, len(definition)):
+            if definition.attribute_name(prop) == name:
+                return definition[prop]
+        return
+    for prop in properties or []:
+        if prop.Name == name and (prop.is_a("IfcPropertySingleValue") or prop.is_a("IfcComplexProperty")):
+            return get_properties([prop])[name]
+
+
 def get_property_definition(definition):
     if definition is not None:
         props = {}
@@ -1,13 +1,20 @@
+import os
 import re
+import sys
+import json
+import hashlib
 import pathlib
 import ifcopenshell
 import ifcopenshell.util.schema
 from ifcopenshell.entity_instance import entity_instance
 from functools import lru_cache
-from typing import List, Generator, Optional
+from typing import List, Generator, Optional, Union
 
 templates = {}
 
+# Incremented whenever the structure of a template index changes
+INDEX_VERSION = 2
+
 
 def get_template(schema):
     global templates
@@ -16,6 +23,112 @@ def get_template(schema):
     return templates[schema]
 
 
+def build_index(template: ifcopenshell.file) -> dict:
+    """Compiles the property set templates of a file into a lookup index
+
+    The index stores the position and STEP id of every template, the parsed
+    classes and predefined types it applies to, and the primary measure type
+    of each of its simple property templates. It only contains builtin types
+    so that it can be stored as JSON.
+    """
+    index = {"version": INDEX_VERSION, "names": {}, "templates": [], "by_class": {}, "primary_measure_types": {}}
+    for prop_set in template.by_type("IfcPropertySetTemplate"):
+        position = len(index["templates"])
+        index["templates"].append([prop_set.Name, prop_set.id(), prop_set.Name.startswith("Qto_")])
+        index["names"].setdefault(prop_set.Name, position)
+        for applicable in (prop_set.ApplicableEntity or "IfcRoot").split(","):
+            match = re.match(r"(\w+)(\[\w+\])*/*(\w+)*(\[\w+\])*", applicable)
+            if not match:
+                continue
+            index["by_class"].setdefault(match.group(1).lower(), []).append([position, match.group(3)])
+        if prop_set.Name not in index["primary_measure_types"]:
+            primary_measure_types = index["primary_measure_types"][prop_set.Name] = {}
+            for prop_template in prop_set.HasPropertyTemplates or ():
+                primary_measure_types.setdefault(prop_template.Name, getattr(prop_template, "PrimaryMeasureType", None))
+    return index
+
+
+def get_index_path(path: str) -> str:
+    """Returns the path of the prebuilt index shipped alongside a template file"""
+    return os.path.splitext(path)[0] + ".index.json"
+
+
+def get_cache_dir() -> str:
+    """Returns the user cache directory used to store the indexes of template files"""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~", "AppData", "Local"))
+    elif sys.platform == "darwin":
+        base = os.path.expanduser(os.path.join("~", "Library", "Caches"))
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+    return os.path.join(base, "ifcopenshell", "pset")
+
+
+def get_source_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def write_index(path: str, index_path: Optional[str] = None) -> dict:
+    """Builds the index of a template file and writes it alongside the template
+
+    This is run when packaging to prebuild the index of the bundled templates,
+    see ``make pset-index``. The index records a hash of the template so that
+    it is ignored if the template changes without the index being rebuilt.
+    """
+    index = build_index(ifcopenshell.open(path))
+    index["source"] = get_source_hash(path)
+    with open(index_path or get_index_path(path), "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    return index
+
+
+def read_index(path: str) -> Optional[dict]:
+    try:
+        with open(path, "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if isinstance(index, dict) and index.get("version") == INDEX_VERSION:
+        return index
+
+
+def load_index(path: str) -> dict:
+    """Loads the template index of a file, building and caching it if necessary
+
+    A prebuilt index alongside the template, such as the one shipped with the
+    bundled templates, is used if it was built from the same template.
+    Otherwise, the index is cached in the user cache directory, keyed by the
+    absolute path of the template, and rebuilt when the template is modified.
+    Nothing is ever written alongside the template, and if the cache cannot
+    be written, the index is still built in memory.
+    """
+    index = read_index(get_index_path(path))
+    if index and index.get("source") == get_source_hash(path):
+        return index
+
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    source = {"path": path, "mtime": stat.st_mtime_ns, "size": stat.st_size}
+    key = hashlib.blake2b(path.encode("utf-8"), digest_size=16).hexdigest()
+    cache_file = os.path.join(get_cache_dir(), key + ".json")
+    index = read_index(cache_file)
+    if index and index.get("source") == source:
+        return index
+
+    index = build_index(ifcopenshell.open(path))
+    index["source"] = source
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(temp_file, cache_file)
+    except OSError:
+        pass
+    return index
+
+
 class PsetQto:
     templates_path = {
         "IFC4": "Pset_IFC4_ADD2.ifc",
@@ -23,36 +136,98 @@ class PsetQto:
 
     def __init__(self, schema: str, templates=None) -> None:
         self.schema = ifcopenshell.ifcopenshell_wrapper.schema_by_name(schema)
+        self.paths = []
+        self.indexes = []
+        self._templates = []
         if not templates:
             folder_path = pathlib.Path(__file__).parent.absolute()
-            path = str(folder_path.joinpath("schema", self.templates_path[schema]))
-            templates = [ifcopenshell.open(path)]
-        self.templates = templates
+            templates = [str(folder_path.joinpath("schema", self.templates_path[schema]))]
+        for template in templates:
+            self.add_templates(template)
+
+    def add_templates(self, template: Union[str, pathlib.Path, ifcopenshell.file]) -> None:
+        """Adds the property set templates of a file
+
+        Files given as a path are indexed through a cache, and only opened
+        once template instances are requested.
+        """
+        if isinstance(template, ifcopenshell.file):
+            self.paths.append(None)
+            self.indexes.append(build_index(template))
+            self._templates.append(template)
+        else:
+            self.paths.append(str(template))
+            self.indexes.append(load_index(str(template)))
+            self._templates.append(None)
+        self.clear_cache()
+
+    @property
+    def templates(self) -> List[ifcopenshell.file]:
+        for i, template in enumerate(self._templates):
+            if template is None and i < len(self.paths) and self.paths[i]:
+                self._templates[i] = ifcopenshell.open(self.paths[i])
+        return self._templates
+
+    def get_indexes(self) -> List[dict]:
+        # Files may also have been appended to the templates directly
+        while len(self.indexes) < len(self._templates):
+            self.indexes.append(build_index(self._templates[len(self.indexes)]))
+            self.paths.append(None)
+        return self.indexes
+
+    def get_template_instance(self, i: int, position: int) -> entity_instance:
+        template = self._templates[i]
+        if template is None:
+            template = self._templates[i] = ifcopenshell.open(self.paths[i])
+        return template.by_id(self.indexes[i]["templates"][position][1])
+
+    def clear_cache(self) -> None:
+        PsetQto.get_applicable.cache_clear()
+        PsetQto.get_applicable_names.cache_clear()
+        PsetQto.get_by_name.cache_clear()
 
     @lru_cache()
     def get_applicable(
         self, ifc_class="", predefined_type="", pset_only=False, qto_only=False
     ) -> List[entity_instance]:
-        any_class = not ifc_class
-        if not any_class:
-            entity = self.schema.declaration_by_name(ifc_class)
-        result = []
-        for template in self.templates:
-            for prop_set in template.by_type("IfcPropertySetTemplate"):
-                if pset_only:
-                    if prop_set.Name.startswith("Qto_"):
-                        continue
-                if qto_only:
-                    if not prop_set.Name.startswith("Qto_"):
-                        continue
-                if any_class or self.is_applicable(entity, prop_set.ApplicableEntity or "IfcRoot", predefined_type):
-                    result.append(prop_set)
-        return result
+        return [
+            self.get_template_instance(i, position)
+            for i, position in self.get_applicable_positions(ifc_class, predefined_type, pset_only, qto_only)
+        ]
 
     @lru_cache()
     def get_applicable_names(self, ifc_class: str, predefined_type="", pset_only=False, qto_only=False) -> List[str]:
         """Return names instead of objects for other use eg. enum"""
-        return [prop_set.Name for prop_set in self.get_applicable(ifc_class, predefined_type, pset_only, qto_only)]
+        return [
+            self.indexes[i]["templates"][position][0]
+            for i, position in self.get_applicable_positions(ifc_class, predefined_type, pset_only, qto_only)
+        ]
+
+    def get_applicable_positions(self, ifc_class="", predefined_type="", pset_only=False, qto_only=False):
+        classes = None
+        if ifc_class:
+            classes = []
+            entity = self.schema.declaration_by_name(ifc_class)
+            while entity:
+                classes.append(entity.name().lower())
+                entity = entity.supertype()
+        results = []
+        for i, index in enumerate(self.get_indexes()):
+            if classes is None:
+                positions = range(len(index["templates"]))
+            else:
+                positions = set()
+                for name in classes:
+                    for position, applicable_predefined_type in index["by_class"].get(name, ()):
+                        if not predefined_type or predefined_type == applicable_predefined_type:
+                            positions.add(position)
+                positions = sorted(positions)
+            for position in positions:
+                is_qto = index["templates"][position][2]
+                if (pset_only and is_qto) or (qto_only and not is_qto):
+                    continue
+                results.append((i, position))
+        return results
 
     def is_applicable(self, entity: entity_instance, applicables: str, predefined_type="") -> bool:
         """applicables can have multiple possible patterns :
@@ -77,11 +252,24 @@ class PsetQto:
 
     @lru_cache()
     def get_by_name(self, name: str) -> Optional[entity_instance]:
-        for template in self.templates:
-            for prop_set in template.by_type("IfcPropertySetTemplate"):
-                if prop_set.Name == name:
-                    return prop_set
+        for i, index in enumerate(self.get_indexes()):
+            position = index["names"].get(name)
+            if position is not None:
+                return self.get_template_instance(i, position)
+        return None
+
+    def get_primary_measure_types(self, name: str) -> Optional[dict]:
+        """Returns the primary measure type of each property in a template, without loading the template
+
+        :param name: The name of the property set template
+        :return: A dictionary of property names and primary measure types, or
+            None if there is no template with that name
+        """
+        for index in self.get_indexes():
+            primary_measure_types = index["primary_measure_types"].get(name)
+            if primary_measure_types is not None:
+                return primary_measure_types
         return None
 
     def is_templated(self, name: str) -> bool:
-        return bool(self.get_by_name(name))
+        return any(name in index["names"] for index in self.get_indexes())
@@ -1,112 +1,358 @@
+import weakref
+import functools
+import collections
 import ifcopenshell.util
 import ifcopenshell.util.fm
 import ifcopenshell.util.element
 import lark
 
+grammar = """
+start: query (lfunction query)*
+query: selector | group
+group: "(" query (lfunction query)* ")"
+selector: (inverse_relationship)? guid_selector | (inverse_relationship)? class_selector
+guid_selector: "#" /[0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_$]{22}/
+class_selector: "." WORD filter ?
+filter: "[" filter_key (comparison filter_value)? "]"
+filter_key: WORD | pset_or_qto
+filter_value: ESCAPED_STRING
+pset_or_qto: /[A-Za-z0-9_]+/ "." /[A-Za-z0-9_]+/
+lfunction: and | or
+inverse_relationship: types | contains_elements | boundedby
+types: "*"
+contains_elements: "@"
+boundedby: "@@"
+and: "&"
+or: "|"
+comparison: contains | morethanequalto | lessthanequalto | equal | morethan | lessthan
+contains: "*="
+morethanequalto: ">="
+lessthanequalto: "<"
+equal: "="
+morethan: ">"
+lessthan: "<"
 
-class Selector:
-    def parse(self, ifc_file, query):
-        self.file = ifc_file
+// Embed common.lark for packaging
+DIGIT: "0".."9"
+HEXDIGIT: "a".."f"|"A".."F"|DIGIT
+INT: DIGIT+
+SIGNED_INT: ["+"|"-"] INT
+DECIMAL: INT "." INT? | "." INT
+_EXP: ("e"|"E") SIGNED_INT
+FLOAT: INT _EXP | DECIMAL _EXP?
+SIGNED_FLOAT: ["+"|"-"] FLOAT
+NUMBER: FLOAT | INT
+SIGNED_NUMBER: ["+"|"-"] NUMBER
+_STRING_INNER: /.*?/
+_STRING_ESC_INNER: _STRING_INNER /(?<!\\\\)(\\\\\\\\)*?/
+ESCAPED_STRING : "\\"" _STRING_ESC_INNER "\\""
+LCASE_LETTER: "a".."z"
+UCASE_LETTER: "A".."Z"
+LETTER: UCASE_LETTER | LCASE_LETTER
+WORD: LETTER+
+CNAME: ("_"|LETTER) ("_"|LETTER|DIGIT)*
+WS_INLINE: (" "|/\\t/)+
+WS: /[ \\t\\f\\r\\n]/+
+CR : /\\r/
+LF : /\\n/
+NEWLINE: (CR? LF)+
 
-        l = lark.Lark(
-            """start: query (lfunction query)*
-                    query: selector | group
-                    group: "(" query (lfunction query)* ")"
-                    selector: (inverse_relationship)? guid_selector | (inverse_relationship)? class_selector
-                    guid_selector: "#" /[0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_$]{22}/
-                    class_selector: "." WORD filter ?
-                    filter: "[" filter_key (comparison filter_value)? "]"
-                    filter_key: WORD | pset_or_qto
-                    filter_value: ESCAPED_STRING
-                    pset_or_qto: /[A-Za-z0-9_]+/ "." /[A-Za-z0-9_]+/
-                    lfunction: and | or
-                    inverse_relationship: types | contains_elements | boundedby
-                    types: "*"
-                    contains_elements: "@"
-                    boundedby: "@@"
-                    and: "&"
-                    or: "|"
-                    comparison: contains | morethanequalto | lessthanequalto | equal | morethan | lessthan
-                    contains: "*="
-                    morethanequalto: ">="
-                    lessthanequalto: "<"
-                    equal: "="
-                    morethan: ">"
-                    lessthan: "<"
-
-                    // Embed common.lark for packaging
-                    DIGIT: "0".."9"
-                    HEXDIGIT: "a".."f"|"A".."F"|DIGIT
-                    INT: DIGIT+
-                    SIGNED_INT: ["+"|"-"] INT
-                    DECIMAL: INT "." INT? | "." INT
-                    _EXP: ("e"|"E") SIGNED_INT
-                    FLOAT: INT _EXP | DECIMAL _EXP?
-                    SIGNED_FLOAT: ["+"|"-"] FLOAT
-                    NUMBER: FLOAT | INT
-                    SIGNED_NUMBER: ["+"|"-"] NUMBER
-                    _STRING_INNER: /.*?/
-                    _STRING_ESC_INNER: _STRING_INNER /(?<!\\\\)(\\\\\\\\)*?/
-                    ESCAPED_STRING : "\\"" _STRING_ESC_INNER "\\""
-                    LCASE_LETTER: "a".."z"
-                    UCASE_LETTER: "A".."Z"
-                    LETTER: UCASE_LETTER | LCASE_LETTER
-                    WORD: LETTER+
-                    CNAME: ("_"|LETTER) ("_"|LETTER|DIGIT)*
-                    WS_INLINE: (" "|/\\t/)+
-                    WS: /[ \\t\\f\\r\\n]/+
-                    CR : /\\r/
-                    LF : /\\n/
-                    NEWLINE: (CR? LF)+
-
-                    %ignore WS // Disregard spaces in text
-                 """
-        )
-
-        start = l.parse(query)
-        return self.get_group(start)
+%ignore WS // Disregard spaces in text
+"""
 
-    def get_group(self, group):
+
+@functools.lru_cache(maxsize=None)
+def get_parser():
+    """Returns the selector query parser, which is only compiled once"""
+    return lark.Lark(grammar)
+
+
+GroupPlan = collections.namedtuple("GroupPlan", ["queries"])
+SelectorPlan = collections.namedtuple("SelectorPlan", ["inverse_relationship", "guid", "ifc_class", "filter"])
+FilterPlan = collections.namedtuple("FilterPlan", ["key", "comparison", "value"])
+
+
+class QueryPlan:
+    """A parsed selector query which may be executed against many files
+
+    The parse tree is reduced to nested GroupPlan, SelectorPlan and
+    FilterPlan tuples, so that executing the query does not need to inspect
+    the parse tree again.
+    """
+
+    def __init__(self, query):
+        self.query = query
+        self.root = self.compile_group(get_parser().parse(query))
+
+    def compile_group(self, group):
+        queries = []
         lfunction = None
         for child in group.children:
             if child.data == "query":
-                new_results = self.get_query(child)
-                if not lfunction:
-                    results = new_results
-                elif lfunction == "or":
-                    results.extend(new_results)
-                elif lfunction == "and":
-                    results = list(set(results).intersection(new_results))
-                results = list(set(results))
+                queries.append((lfunction, self.compile_query(child)))
             elif child.data == "lfunction":
                 lfunction = child.children[0].data
-        return results
+        return GroupPlan(tuple(queries))
 
-    def get_query(self, query):
+    def compile_query(self, query):
         for child in query.children:
             if child.data == "selector":
-                return self.get_selector(child)
+                return self.compile_selector(child)
             elif child.data == "group":
-                return self.get_group(child)
+                return self.compile_group(child)
 
-    def get_selector(self, selector):
+    def compile_selector(self, selector):
         if len(selector.children) == 1:
             inverse_relationship = None
             class_or_guid_selector = selector.children[0]
         else:
-            inverse_relationship = selector.children[0]
+            inverse_relationship = selector.children[0].children[0].data
             class_or_guid_selector = selector.children[1]
 
-        if class_or_guid_selector.data == "class_selector":
-            results = self.get_class_selector(class_or_guid_selector)
-        elif class_or_guid_selector.data == "guid_selector":
-            results = self.get_guid_selector(class_or_guid_selector)
+        if class_or_guid_selector.data == "guid_selector":
+            return SelectorPlan(inverse_relationship, str(class_or_guid_selector.children[0]), None, None)
+
+        filter_rule = None
+        if len(class_or_guid_selector.children) > 1 and class_or_guid_selector.children[1].data == "filter":
+            filter_rule = self.compile_filter(class_or_guid_selector.children[1])
+        return SelectorPlan(inverse_relationship, None, str(class_or_guid_selector.children[0]), filter_rule)
+
+    def compile_filter(self, filter_rule):
+        key = filter_rule.children[0].children[0]
+        if isinstance(key, str):
+            key = str(key)
+        else:
+            key = key.children[0] + "." + key.children[1]
+        comparison = value = None
+        if len(filter_rule.children) > 1:
+            comparison = filter_rule.children[1].children[0].data
+            value = filter_rule.children[2].children[0][1:-1]
+        return FilterPlan(key, comparison, value)
+
+    def execute(self, ifc_file, selector=None):
+        """Executes the query against a file
+
+        :param ifc_file: The IFC file to select elements from
+        :type ifc_file: ifcopenshell.file.file
+        :param selector: An optional selector to execute with, otherwise a new one is used
+        :type selector: Selector
+        :returns: A list of selected elements
+        :rtype: list
+        """
+        return (selector or Selector()).execute(ifc_file, self)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_query(query):
+    """Parses a query into a QueryPlan, caching the result for repeated queries
+
+    :param query: The selector query string
+    :type query: str
+    :rtype: QueryPlan
+    """
+    return QueryPlan(query)
+
+
+class SelectorIndex:
+    """An index of the relationships of elements in a file, used to speed up selector queries
+
+    Property sets, type assignments, materials, containment and space
+    boundaries are each indexed by STEP id the first time they are needed,
+    after which filters and inverse relationship operators are answered by
+    dictionary lookups instead of traversing each element.
+
+    The index is invalidated whenever a transaction on the file is ended,
+    discarded, undone or redone. Changes made outside of a transaction
+    require an explicit call to invalidate().
+    """
+
+    def __init__(self, ifc_file):
+        self.file = weakref.ref(ifc_file)
+        self.invalidate()
+        ifc_file.add_transaction_listener("selector.index", self.on_transaction)
+
+    def on_transaction(self, ifc_file, event, transaction):
+        self.invalidate()
+
+    def invalidate(self):
+        self.psets = None
+        self.types = None
+        self.typed_elements = None
+        self.materials = None
+        self.containers = None
+        self.aggregates = None
+        self.contained_elements = None
+        self.boundary_elements = None
+
+    def get_psets(self, element):
+        if self.psets is None:
+            self.build_psets()
+        return self.psets.get(element.id(), {})
+
+    def get_type(self, element):
+        if element.is_a("IfcTypeObject"):
+            return element
+        if self.types is None:
+            self.build_types()
+        return self.types.get(element.id())
+
+    def get_typed_elements(self, element):
+        if self.typed_elements is None:
+            self.build_types()
+        return self.typed_elements.get(element.id(), [])
+
+    def get_material(self, element):
+        if self.materials is None:
+            self.build_materials()
+        material = self.materials.get(element.id())
+        if material is None:
+            relating_type = self.get_type(element)
+            if relating_type and relating_type != element:
+                material = self.materials.get(relating_type.id())
+        if material is not None:
+            if material.is_a("IfcMaterialLayerSetUsage"):
+                return material.ForLayerSet
+            elif material.is_a("IfcMaterialProfileSetUsage"):
+                return material.ForProfileSet
+        return material
+
+    def get_container(self, element):
+        if self.containers is None:
+            self.build_containment()
+        aggregate = self.aggregates.get(element.id())
+        while aggregate is not None:
+            element = aggregate
+            aggregate = self.aggregates.get(element.id())
+        return self.containers.get(element.id())
+
+    def get_contained_elements(self, element):
+        if self.contained_elements is None:
+            self.build_containment()
+        return self.contained_elements.get(element.id(), [])
+
+    def get_boundary_elements(self, element):
+        if self.boundary_elements is None:
+            self.boundary_elements = {}
+            for rel in self.file().by_type("IfcRelSpaceBoundary"):
+                self.boundary_elements.setdefault(rel.RelatingSpace.id(), []).append(rel.RelatedBuildingElement)
+        return self.boundary_elements.get(element.id(), [])
+
+    def build_psets(self):
+        ifc_file = self.file()
+        self.psets = {}
+        definitions = {}
+
+        def get_property_definition(definition):
+            props = definitions.get(definition.id())
+            if props is None:
+                props = definitions[definition.id()] = ifcopenshell.util.element.get_property_definition(definition)
+            return props
+
+        for rel in ifc_file.by_type("IfcRelDefinesByProperties"):
+            definition = rel.RelatingPropertyDefinition
+            if definition is None or not definition.id():
+                continue
+            props = get_property_definition(definition)
+            for element in rel.RelatedObjects:
+                self.psets.setdefault(element.id(), {})[definition.Name] = props
+        for element in ifc_file.by_type("IfcTypeObject"):
+            for definition in element.HasPropertySets or []:
+                self.psets.setdefault(element.id(), {})[definition.Name] = get_property_definition(definition)
+        if ifc_file.schema != "IFC2X3":
+            for element in ifc_file.by_type("IfcMaterialDefinition") + ifc_file.by_type("IfcProfileDef"):
+                for definition in element.HasProperties or []:
+                    self.psets.setdefault(element.id(), {})[definition.Name] = get_property_definition(definition)
+
+    def build_types(self):
+        self.types = {}
+        self.typed_elements = {}
+        for rel in self.file().by_type("IfcRelDefinesByType"):
+            relating_type = rel.RelatingType
+            self.typed_elements.setdefault(relating_type.id(), []).extend(rel.RelatedObjects)
+            for element in rel.RelatedObjects:
+                self.types.setdefault(element.id(), relating_type)
+
+    def build_materials(self):
+        self.materials = {}
+        for rel in self.file().by_type("IfcRelAssociatesMaterial"):
+            for element in rel.RelatedObjects:
+                self.materials.setdefault(element.id(), rel.RelatingMaterial)
+
+    def build_containment(self):
+        ifc_file = self.file()
+        self.containers = {}
+        self.aggregates = {}
+        self.contained_elements = {}
+        for rel in ifc_file.by_type("IfcRelContainedInSpatialStructure"):
+            self.contained_elements.setdefault(rel.RelatingStructure.id(), []).extend(rel.RelatedElements)
+            for element in rel.RelatedElements:
+                self.containers.setdefault(element.id(), rel.RelatingStructure)
+        # In IFC2X3 Decomposes includes nesting, whereas in IFC4 it is only aggregation
+        aggregate_class = "IfcRelDecomposes" if ifc_file.schema == "IFC2X3" else "IfcRelAggregates"
+        for rel in ifc_file.by_type(aggregate_class):
+            for element in rel.RelatedObjects:
+                self.aggregates.setdefault(element.id(), rel.RelatingObject)
+
+
+_indices = weakref.WeakKeyDictionary()
+
+
+def get_index(ifc_file):
+    """Returns the selector index of a file, creating it if necessary
+
+    :param ifc_file: The IFC file to index
+    :type ifc_file: ifcopenshell.file.file
+    :rtype: SelectorIndex
+    """
+    index = _indices.get(ifc_file)
+    if index is None:
+        index = _indices[ifc_file] = SelectorIndex(ifc_file)
+    return index
+
+
+class Selector:
+    def __init__(self, use_index=False):
+        self.use_index = use_index
+        self.index = None
+
+    def parse(self, ifc_file, query):
+        return self.execute(ifc_file, compile_query(query))
+
+    def execute(self, ifc_file, plan):
+        self.file = ifc_file
+        self.index = get_index(ifc_file) if self.use_index else None
+        return self.get_group(plan.root)
+
+    def get_group(self, group):
+        for lfunction, query in group.queries:
+            new_results = self.get_query(query)
+            if not lfunction:
+                results = new_results
+            elif lfunction == "or":
+                results.extend(new_results)
+            elif lfunction == "and":
+                results = list(set(results).intersection(new_results))
+            results = list(set(results))
+        return results
+
+    def get_query(self, query):
+        if isinstance(query, SelectorPlan):
+            return self.get_selector(query)
+        return self.get_group(query)
+
+    def get_selector(self, selector):
+        if selector.guid:
+            results = self.get_guid_selector(selector)
+        else:
+            results = self.get_class_selector(selector)
 
-        if not inverse_relationship:
+        if not selector.inverse_relationship:
             return results
-        return self.parse_inverse_relationship(results, inverse_relationship.children[0].data)
+        return self.parse_inverse_relationship(results, selector.inverse_relationship)
 
     def parse_inverse_relationship(self, elements, inverse_relationship):
+        if self.index:
+            return self.parse_indexed_inverse_relationship(elements, inverse_relationship)
         results = []
         for element in elements:
             if inverse_relationship == "types":
@@ -122,28 +368,33 @@ class Selector:
                     results.append(relationship.RelatedBuildingElement)
         return results
 
+    def parse_indexed_inverse_relationship(self, elements, inverse_relationship):
+        results = []
+        for element in elements:
+            if inverse_relationship == "types":
+                results.extend(self.index.get_typed_elements(element))
+            elif inverse_relationship == "contains_elements":
+                results.extend(self.index.get_contained_elements(element))
+            elif inverse_relationship == "boundedby":
+                results.extend(self.index.get_boundary_elements(element))
+        return results
+
     def get_class_selector(self, class_selector):
-        if class_selector.children[0] == "COBie":
+        if class_selector.ifc_class == "COBie":
             elements = ifcopenshell.util.fm.get_cobie_components(self.file)
-        elif class_selector.children[0] == "COBieType":
+        elif class_selector.ifc_class == "COBieType":
             elements = ifcopenshell.util.fm.get_cobie_types(self.file)
-        elif class_selector.children[0] == "FMHEM":
+        elif class_selector.ifc_class == "FMHEM":
             elements = ifcopenshell.util.fm.get_fmhem_types(self.file)
         else:
-            elements = self.file.by_type(class_selector.children[0])
-        if len(class_selector.children) > 1 and class_selector.children[1].data == "filter":
-            return self.filter_elements(elements, class_selector.children[1])
+            elements = self.file.by_type(class_selector.ifc_class)
+        if class_selector.filter:
+            return self.filter_elements(elements, class_selector.filter)
         return elements
 
     def filter_elements(self, elements, filter_rule):
         results = []
-        key = filter_rule.children[0].children[0]
-        if not isinstance(key, str):
-            key = key.children[0] + "." + key.children[1]
-        comparison = value = None
-        if len(filter_rule.children) > 1:
-            comparison = filter_rule.children[1].children[0].data
-            value = filter_rule.children[2].children[0][1:-1]
+        key, comparison, value = filter_rule
         for element in elements:
             element_value = self.get_element_value(element, key)
             if element_value is None:
@@ -153,39 +404,43 @@ class Selector:
         return results
 
     def get_element_value(self, element, key):
-        if "." in key and key.split(".")[0] == "type":
+        if "." in key and key.split(".")[0] in ("type", "material", "container"):
+            relationship, key = key.split(".", 1)
             try:
-                element = ifcopenshell.util.element.get_type(element)
+                element = self.get_related_element(element, relationship)
                 if not element:
                     return None
             except:
                 return
-            key = ".".join(key.split(".")[1:])
-        elif "." in key and key.split(".")[0] == "material":
-            try:
-                element = ifcopenshell.util.element.get_material(element, should_skip_usage=True)
-                if not element:
-                    return None
-            except:
-                return
-            key = ".".join(key.split(".")[1:])
-        elif "." in key and key.split(".")[0] == "container":
-            try:
-                element = ifcopenshell.util.element.get_container(element)
-                if not element:
-                    return None
-            except:
-                return
-            key = ".".join(key.split(".")[1:])
-        info = element.get_info()
-        if key in info:
-            return info[key]
+        if key == "id":
+            return element.id()
+        elif key == "type":
+            return element.is_a()
+        attribute_names = element.wrapped_data.get_attribute_names()
+        if key in attribute_names:
+            return element[attribute_names.index(key)]
         elif "." in key:
             pset_name, prop = key.split(".")
-            psets = ifcopenshell.util.element.get_psets(element)
+            if not self.index:
+                return ifcopenshell.util.element.get_pset(element, pset_name, prop)
+            psets = self.index.get_psets(element)
             if pset_name in psets and prop in psets[pset_name]:
                 return psets[pset_name][prop]
 
+    def get_related_element(self, element, relationship):
+        if relationship == "type":
+            if self.index:
+                return self.index.get_type(element)
+            return ifcopenshell.util.element.get_type(element)
+        elif relationship == "material":
+            if self.index:
+                return self.index.get_material(element)
+            return ifcopenshell.util.element.get_material(element, should_skip_usage=True)
+        elif relationship == "container":
+            if self.index:
+                return self.index.get_container(element)
+            return ifcopenshell.util.element.get_container(element)
+
     def filter_element(self, element, element_value, comparison, value):
         if comparison == "equal":
             return str(element_value) == value
@@ -202,4 +457,4 @@ class Selector:
         return False
 
     def get_guid_selector(self, guid_selector):
-        return [self.file.by_id(guid_selector.children[0])]
+        return [self.file.by_id(guid_selector.guid)]
@@ -1,6 +1,8 @@
+import math
+import weakref
 import datetime
+import numpy as np
 import ifcopenshell.util.date
-from functools import lru_cache
 
 
 def derive_calendar(task):
@@ -16,64 +18,181 @@ def derive_calendar(task):
 
 
 def count_working_days(start, finish, calendar):
-    result = 0
-    current_date = datetime.date(start.year, start.month, start.day)
-    finish_date = datetime.date(finish.year, finish.month, finish.day)
-    while current_date < finish_date:
-        if is_working_day(current_date, calendar):
-            result += 1
-        current_date += datetime.timedelta(days=1)
-    return result
+    if not calendar:
+        return max((to_date(finish) - to_date(start)).days, 0)
+    return get_working_days(calendar).count(start, finish)
 
 
 def get_finish_date(start, duration, duration_type, calendar):
-    current_date = datetime.date(start.year, start.month, start.day)
-    abs_duration = abs(duration.days)
-    date_offset = datetime.timedelta(days=1 if duration.days > 0 else -1)
-    while abs_duration > 0:
-        if duration_type == "ELAPSEDTIME" or not calendar:
-            abs_duration -= 1
-        elif ifcopenshell.util.sequence.is_working_day(current_date, calendar):
-            abs_duration -= 1
-        current_date += date_offset
-
+    current_date = to_date(start)
+    if duration_type == "ELAPSEDTIME" or not calendar:
+        return current_date + datetime.timedelta(days=duration.days)
+    working_days = get_working_days(calendar)
     if duration.days > 0:
-        current_date = get_soonest_working_day(current_date, duration_type, calendar)
-    else:
-        current_date = get_recent_working_day(current_date, duration_type, calendar)
-    return current_date
+        return working_days.get_soonest(working_days.offset(current_date, duration.days))
+    return working_days.get_recent(working_days.offset(current_date, duration.days))
 
 
 def get_soonest_working_day(start, duration_type, calendar):
     if duration_type == "ELAPSEDTIME" or not calendar:
         return start
-    while not is_working_day(start, calendar):
-        start += datetime.timedelta(days=1)
-    return start
+    return get_working_days(calendar).get_soonest(start)
 
 
 def get_recent_working_day(start, duration_type, calendar):
     if duration_type == "ELAPSEDTIME" or not calendar:
         return start
-    while not is_working_day(start, calendar):
-        start -= datetime.timedelta(days=1)
-    return start
+    return get_working_days(calendar).get_recent(start)
 
 
-@lru_cache(maxsize=None)
 def is_working_day(day, calendar):
-    is_working_day = False
-    for work_time in calendar.WorkingTimes or []:
-        if is_work_time_applicable_to_day(work_time, day):
-            is_working_day = True
-            break
-    if not is_working_day:
-        return is_working_day
-    for work_time in calendar.ExceptionTimes or []:
-        if is_work_time_applicable_to_day(work_time, day):
-            is_working_day = False
-            break
-    return is_working_day
+    return get_working_days(calendar).is_working_day(day)
+
+
+def to_date(day):
+    return datetime.date(day.year, day.month, day.day)
+
+
+class WorkingDays:
+    # A compiled calendar stores one flag per day over a horizon which grows
+    # as needed, together with a running count of working days, so that
+    # counting and offsetting by working days are simple lookups.
+    chunk = 366 * 5
+    max_days = 366 * 100
+
+    def __init__(self, calendar):
+        # Compiled calendars are cached per file, so they must not keep the
+        # file alive through a reference to the calendar instance.
+        ifc_file = calendar.wrapped_data.file
+        self.calendar_id = calendar.id()
+        self.file = weakref.ref(ifc_file) if ifc_file is not None else None
+        self.unbound_calendar = calendar if ifc_file is None else None
+        self.origin = None
+        self.is_working = np.zeros(0, dtype=bool)
+        self.counts = np.zeros(1, dtype=np.int64)
+
+    def is_working_day(self, day):
+        index = self.get_index(day)
+        return bool(self.is_working[index])
+
+    def count(self, start, finish):
+        if finish.toordinal() <= start.toordinal():
+            return 0
+        start = self.get_index(start)
+        finish = self.get_index(finish)
+        return int(self.counts[finish] - self.counts[start])
+
+    def offset(self, start, days):
+        # Returns the day after the nth working day from start inclusive, or
+        # the day before it when going backwards in time.
+        if not days:
+            return start
+        index = self.get_index(start)
+        while True:
+            if days > 0:
+                target = self.counts[index] + days
+                if target <= self.counts[-1]:
+                    return self.get_day(np.searchsorted(self.counts, target, side="left"))
+                self.extend(self.origin + len(self.is_working) + self.chunk)
+            else:
+                target = self.counts[index + 1] + days
+                if target >= 0:
+                    return self.get_day(np.searchsorted(self.counts, target, side="right") - 2)
+                index += self.extend(self.origin - self.chunk)
+
+    def get_soonest(self, day):
+        index = self.get_index(day)
+        while True:
+            target = self.counts[index] + 1
+            if target <= self.counts[-1]:
+                return self.get_day(np.searchsorted(self.counts, target, side="left") - 1)
+            self.extend(self.origin + len(self.is_working) + self.chunk)
+
+    def get_recent(self, day):
+        index = self.get_index(day)
+        while True:
+            target = self.counts[index + 1]
+            if target > 0:
+                return self.get_day(np.searchsorted(self.counts, target, side="left") - 1)
+            index += self.extend(self.origin - self.chunk)
+
+    def get_day(self, index):
+        return datetime.date.fromordinal(self.origin + int(index))
+
+    def get_index(self, day):
+        ordinal = day.toordinal()
+        if self.origin is None:
+            self.origin = ordinal - self.chunk // 5
+            self.is_working = self.get_working_flags(self.origin, ordinal + self.chunk)
+            self.counts = np.concatenate(([0], np.cumsum(self.is_working)))
+        if ordinal < self.origin:
+            self.extend(ordinal - self.chunk // 5)
+        elif ordinal >= self.origin + len(self.is_working):
+            self.extend(ordinal + self.chunk)
+        return ordinal - self.origin
+
+    def extend(self, ordinal):
+        # Grows the horizon to include the ordinal and returns how many days
+        # were prepended, which shifts all existing indices.
+        end = self.origin + len(self.is_working)
+        if max(end, ordinal) - min(self.origin, ordinal) > self.max_days:
+            raise ValueError(f"Working days of {self.get_calendar()} cannot be searched beyond {self.max_days} days")
+        prepended = 0
+        if ordinal < self.origin:
+            prepended = self.origin - ordinal
+            self.is_working = np.concatenate((self.get_working_flags(ordinal, self.origin), self.is_working))
+            self.origin = ordinal
+        elif ordinal > end:
+            self.is_working = np.concatenate((self.is_working, self.get_working_flags(end, ordinal)))
+        self.counts = np.concatenate(([0], np.cumsum(self.is_working)))
+        return prepended
+
+    def get_working_flags(self, start, finish):
+        days = [datetime.date.fromordinal(o) for o in range(start, finish)]
+        flags = np.zeros(len(days), dtype=bool)
+        calendar = self.get_calendar()
+        for work_time in calendar.WorkingTimes or []:
+            flags |= [is_work_time_applicable_to_day(work_time, day) for day in days]
+        for work_time in calendar.ExceptionTimes or []:
+            flags &= [not is_work_time_applicable_to_day(work_time, day) for day in days]
+        return flags
+
+    def get_calendar(self):
+        if self.file is None:
+            return self.unbound_calendar
+        return self.file().by_id(self.calendar_id)
+
+
+_working_days = weakref.WeakKeyDictionary()
+
+
+def get_working_days(calendar):
+    ifc_file = calendar.wrapped_data.file
+    if ifc_file is None:
+        return WorkingDays(calendar)
+    calendars = _working_days.get(ifc_file)
+    if calendars is None:
+        calendars = _working_days[ifc_file] = {}
+        ifc_file.add_transaction_listener("sequence.working_days", on_transaction)
+    working_days = calendars.get(calendar.id())
+    if working_days is None:
+        working_days = calendars[calendar.id()] = WorkingDays(calendar)
+    return working_days
+
+
+def invalidate_working_days(ifc_file, calendar=None):
+    calendars = _working_days.get(ifc_file)
+    if calendars is None:
+        return
+    elif calendar is None:
+        calendars.clear()
+    else:
+        calendars.pop(calendar.id(), None)
+
+
+def on_transaction(ifc_file, event, transaction):
+    if event in ("discard", "undo", "redo"):
+        invalidate_working_days(ifc_file)
 
 
 def is_work_time_applicable_to_day(work_time, day):
@@ -2,7 +2,9 @@ from __future__ import print_function
 
 import sys
 import json
+import time
 import functools
+import multiprocessing
 
 from collections import namedtuple
 
@@ -26,15 +28,25 @@ log_entry_type = namedtuple("log_entry_type", ("level", "message", "instance"))
 
 
 class json_logger:
-    def __init__(self):
+    def __init__(self, stream=None):
+        """Collects log entries as dictionaries
+
+        :param stream: If provided, each entry is written to this file-like
+            object as a line of JSON instead of being collected in statements
+        """
         self.statements = []
         self.instance = None
+        self.stream = stream
 
     def set_instance(self, instance):
         self.instance = instance
 
     def log(self, level, message, *args, **kwargs):
-        self.statements.append(log_entry_type(level, message % args, kwargs.get("instance"))._asdict())
+        statement = log_entry_type(level, message % args, kwargs.get("instance"))._asdict()
+        if self.stream is None:
+            self.statements.append(statement)
+        else:
+            print(json.dumps(statement, default=str), file=self.stream)
 
     def __getattr__(self, level):
         return functools.partial(self.log, level, instance=self.instance)
@@ -117,7 +129,157 @@ def try_valid(attr, val, schema):
         return False
 
 
-def validate(f, logger):
+class record_logger:
+    """Records log entries in a worker process so that they can be logged by the parent process"""
+
+    def __init__(self):
+        self.records = []
+        self.instance = None
+
+    def log(self, level, message, *args):
+        # Schema declarations and instances cannot be sent between processes, so messages are formatted here
+        self.records.append((level, message % args, self.instance.id() if self.instance else None))
+
+    def __getattr__(self, level):
+        if level not in ("debug", "info", "warning", "error", "critical"):
+            raise AttributeError(level)
+        return functools.partial(self.log, level)
+
+
+class instance_record_logger(record_logger):
+    """Records log entries like a json_logger, which logs the instance separately from the message"""
+
+    def set_instance(self, instance):
+        self.instance = instance
+
+
+class compiled_entity:
+    """The attribute checks of an entity, derived from the schema once and reused for all of its instances"""
+
+    def __init__(self, entity, schema):
+        self.entity = entity
+        self.is_abstract = entity.is_abstract()
+        self.attributes = entity.all_attributes()
+        # Tuples of (attribute, whether a null value is allowed, value checker)
+        self.checks = [
+            (attr, is_derived or attr.optional(), compile_checker(attr, schema))
+            for attr, is_derived in zip(self.attributes, entity.derived())
+        ]
+        self.inverses = [(attr, attr.name(), attr.bound1(), attr.bound2()) for attr in entity.all_inverse_attributes()]
+
+
+compiled_schemas = {}
+
+
+def get_compiled_entity(schema, name):
+    entities = compiled_schemas.setdefault(schema.name(), {})
+    compiled = entities.get(name)
+    if compiled is None:
+        compiled = entities[name] = compiled_entity(schema.declaration_by_name(name), schema)
+    return compiled
+
+
+def compile_checker(attr, schema):
+    """Returns a function that raises a ValidationError if a value is not valid for an attribute
+
+    The result is equivalent to :func:`assert_valid`, but type declarations
+    are only unwrapped once. Uncommon combinations of types and values are
+    delegated to :func:`assert_valid`.
+    """
+    if isinstance(attr, attribute):
+        attr_type = attr.type_of_attribute()
+    else:
+        attr_type = attr
+
+    # Entity instances are checked against type declarations, but other values against their underlying type
+    while isinstance(attr_type, named_type):
+        attr_type = attr_type.declared_type()
+    value_type = attr_type
+    while isinstance(value_type, (named_type, type_declaration)):
+        value_type = value_type.declared_type()
+
+    def fallback(val):
+        return assert_valid(attr, val, schema)
+
+    def fail(val):
+        raise ValidationError("%r not valid for %s" % (val, attr))
+
+    if isinstance(attr_type, (entity_type, type_declaration)):
+        name = attr_type.name()
+
+        def check_instance(val):
+            if not val.is_a(name):
+                fail(val)
+            return True
+
+    elif isinstance(attr_type, select_type):
+        # Whether an instance is valid for a select only depends on its class, unless it is an enumeration
+        valid_classes = {}
+
+        def check_instance(val):
+            ifc_class = val.is_a()
+            is_valid = valid_classes.get(ifc_class)
+            if is_valid is None:
+                if isinstance(schema.declaration_by_name(ifc_class), enumeration_type):
+                    return fallback(val)
+                is_valid = valid_classes[ifc_class] = any(try_valid(x, val, schema) for x in attr_type.select_list())
+            if not is_valid:
+                fail(val)
+            return True
+
+    else:
+        check_instance = fallback
+
+    if isinstance(value_type, simple_type):
+        simple_type_python = simple_type_python_mapping[value_type.declared_type()]
+        if type(simple_type_python) == set:
+            items = frozenset(simple_type_python)
+
+            def check_value(val):
+                if val not in items:
+                    fail(val)
+                return True
+
+        else:
+
+            def check_value(val):
+                if type(val) != simple_type_python:
+                    fail(val)
+                return True
+
+    elif isinstance(value_type, entity_type):
+        check_value = fail
+    elif isinstance(value_type, enumeration_type):
+        items = frozenset(value_type.enumeration_items())
+
+        def check_value(val):
+            if val not in items:
+                fail(val)
+            return True
+
+    elif isinstance(value_type, aggregation_type):
+        b1, b2 = value_type.bound1(), value_type.bound2()
+        check_element = compile_checker(value_type.type_of_element(), schema)
+
+        def check_value(val):
+            if len(val) < b1 or (b2 != -1 and len(val) > b2):
+                fail(val)
+            for v in val:
+                check_element(v)
+            return True
+
+    else:
+        check_value = fallback
+
+    def check(val):
+        if isinstance(val, ifcopenshell.entity_instance):
+            return check_instance(val)
+        return check_value(val)
+
+    return check
+
+
+def validate(f, logger, processes=1):
     """
     For an IFC population model `f` validate whether the entity attribute values are correctly supplied. As this
     is a function that is applied after a file has been parsed, certain types of errors in syntax, duplicate
@@ -132,65 +294,110 @@ def validate(f, logger):
     to one of the leaves. For enumerations it is checked that the value is indeed on of the items. For aggregations it
     is checked that the elements and the cardinality conforms. Type declarations (IfcInteger which is an integer) are
     unpacked until one of the above cases is reached.
+
+    The checks for each entity are derived from the schema once. Instances are validated grouped by their class, and
+    the classes can optionally be divided over multiple processes.
+
+    :param f: The IFC model to validate
+    :param logger: A logging.Logger or json_logger to log errors to
+    :param processes: The number of processes to validate in, defaults to 1
+    :return: The number of instances validated
     """
     schema = ifcopenshell.ifcopenshell_wrapper.schema_by_name(f.schema)
-    for inst in f:
-        if hasattr(logger, "set_instance"):
-            logger.set_instance(inst)
+    ifc_classes = sorted(f.wrapped_data.types())
+    if processes > 1 and len(ifc_classes) > 1 and "fork" in multiprocessing.get_all_start_methods():
+        # Forked processes share the parsed model instead of parsing it again
+        global _validation
+        _validation = (f, hasattr(logger, "set_instance"))
+        with multiprocessing.get_context("fork").Pool(processes) as pool:
+            shards = [ifc_classes[i::processes] for i in range(processes)]
+            total = 0
+            for total_instances, records in pool.map(_validate_classes, shards):
+                total += total_instances
+                for level, message, step_id in records:
+                    if hasattr(logger, "set_instance"):
+                        logger.set_instance(f.by_id(step_id))
+                    getattr(logger, level)("%s", message)
+        _validation = None
+        return total
+    return validate_classes(f, logger, schema, ifc_classes)
+
+
+_validation = None
+
+
+def _validate_classes(ifc_classes):
+    f, has_instance = _validation
+    logger = instance_record_logger() if has_instance else record_logger()
+    schema = ifcopenshell.ifcopenshell_wrapper.schema_by_name(f.schema)
+    return validate_classes(f, logger, schema, ifc_classes), logger.records
+
+
+def validate_classes(f, logger, schema, ifc_classes):
+    total = 0
+    for ifc_class in ifc_classes:
+        compiled = get_compiled_entity(schema, ifc_class)
+        for inst in f.by_type(ifc_class, include_subtypes=False):
+            validate_instance(inst, compiled, logger)
+            total += 1
+    return total
 
-        entity = schema.declaration_by_name(inst.is_a())
-        attrs = entity.all_attributes()
 
-        if entity.is_abstract():
-            e = "Entity %s is abstract" % entity.name()
+def validate_instance(inst, compiled, logger):
+    if hasattr(logger, "set_instance"):
+        logger.set_instance(inst)
+
+    entity = compiled.entity
+    attrs = compiled.attributes
+
+    if compiled.is_abstract:
+        e = "Entity %s is abstract" % entity.name()
+        if hasattr(logger, "set_instance"):
+            logger.error(e)
+        else:
+            logger.error("In %s\n%s", inst, e)
+
+    has_invalid_value = False
+    for i in range(len(attrs)):
+        try:
+            inst[i]
+            pass
+        except:
             if hasattr(logger, "set_instance"):
-                logger.error(e)
+                logger.error("Invalid attribute value for %s.%s", entity, attrs[i])
+            else:
+                logger.error(
+                    "In %s\nInvalid attribute value for %s.%s",
+                    inst,
+                    entity,
+                    attrs[i],
+                )
+            has_invalid_value = True
+
+    if not has_invalid_value:
+        for (attr, is_optional, check), val in zip(compiled.checks, inst):
+
+            if val is None and not is_optional:
+                logger.error("Attribute %s.%s not optional", entity, attr)
+
+            if val is not None:
+                try:
+                    check(val)
+                except ValidationError as e:
+                    if hasattr(logger, "set_instance"):
+                        logger.error(str(e))
+                    else:
+                        logger.error("In %s\n%s", inst, e)
+
+    for attr, name, b1, b2 in compiled.inverses:
+        val = getattr(inst, name)
+        if len(val) < b1 or (b2 != -1 and len(val) > b2):
+            e = ValidationError("%r not valid for %s" % (val, attr))
+            if hasattr(logger, "set_instance"):
+                logger.error(str(e))
             else:
                 logger.error("In %s\n%s", inst, e)
 
-        has_invalid_value = False
-        for i in range(len(attrs)):
-            try:
-                inst[i]
-                pass
-            except:
-                if hasattr(logger, "set_instance"):
-                    logger.error("Invalid attribute value for %s.%s", entity, attrs[i])
-                else:
-                    logger.error(
-                        "In %s\nInvalid attribute value for %s.%s",
-                        inst,
-                        entity,
-                        attrs[i],
-                    )
-                has_invalid_value = True
-
-        if not has_invalid_value:
-            for attr, val, is_derived in zip(attrs, inst, entity.derived()):
-
-                if val is None and not (is_derived or attr.optional()):
-                    logger.error("Attribute %s.%s not optional", entity, attr)
-
-                if val is not None:
-                    attr_type = attr.type_of_attribute()
-                    try:
-                        assert_valid(attr, val, schema)
-                    except ValidationError as e:
-                        if hasattr(logger, "set_instance"):
-                            logger.error(str(e))
-                        else:
-                            logger.error("In %s\n%s", inst, e)
-
-        for attr in entity.all_inverse_attributes():
-            val = getattr(inst, attr.name())
-            try:
-                assert_valid_inverse(attr, val, schema)
-            except ValidationError as e:
-                if hasattr(logger, "set_instance"):
-                    logger.error(str(e))
-                else:
-                    logger.error("In %s\n%s", inst, e)
-
 
 if __name__ == "__main__":
     import sys
@@ -198,10 +405,15 @@ if __name__ == "__main__":
 
     filenames = [x for x in sys.argv[1:] if not x.startswith("--")]
     flags = set(x for x in sys.argv[1:] if x.startswith("--"))
+    processes = 1
+    for flag in flags:
+        if flag.startswith("--processes="):
+            processes = int(flag.split("=")[1])
 
     for fn in filenames:
         if "--json" in flags:
-            logger = json_logger()
+            # Entries are streamed as they are logged rather than collected
+            logger = json_logger(stream=sys.stdout)
         else:
             logger = logging.getLogger("validate")
             logger.setLevel(logging.DEBUG)
@@ -209,7 +421,11 @@ if __name__ == "__main__":
         f = ifcopenshell.open(fn)
 
         print("Validating", fn, file=sys.stderr)
-        validate(f, logger)
-
-        if "--json" in flags:
-            print("\n".join(json.dumps(x, default=str) for x in logger.statements))
+        start = time.perf_counter()
+        total = validate(f, logger, processes=processes)
+        duration = time.perf_counter() - start
+        print(
+            "Validated %d instances in %.2fs (%d instances per second)"
+            % (total, duration, total / duration if duration else 0),
+            file=sys.stderr,
+        )
@@ -0,0 +1,52 @@
+import test.bootstrap
+import ifcopenshell.api
+from ifcopenshell.api.cost.data import Data
+
+
+class TestData(test.bootstrap.IFC4):
+    def add_schedule(self):
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcProject")
+        self.schedule = ifcopenshell.api.run("cost.add_cost_schedule", self.file)
+        self.parent = ifcopenshell.api.run("cost.add_cost_item", self.file, cost_schedule=self.schedule)
+        self.child1 = ifcopenshell.api.run("cost.add_cost_item", self.file, cost_item=self.parent)
+        self.child2 = ifcopenshell.api.run("cost.add_cost_item", self.file, cost_item=self.parent)
+        value = ifcopenshell.api.run("cost.add_cost_value", self.file, parent=self.parent)
+        ifcopenshell.api.run("cost.edit_cost_value", self.file, cost_value=value, attributes={"Category": "*"})
+        self.value = ifcopenshell.api.run("cost.add_cost_value", self.file, parent=self.child1)
+        ifcopenshell.api.run("cost.edit_cost_value", self.file, cost_value=self.value, attributes={"AppliedValue": 1.0})
+
+    def get_loaded_data(self):
+        return [Data.cost_schedules.copy(), Data.cost_items.copy(), Data.cost_values.copy()]
+
+    def assert_loaded_data_is_up_to_date(self):
+        data = self.get_loaded_data()
+        Data.cache.file = None
+        Data.load(self.file)
+        assert data == self.get_loaded_data()
+
+    def test_only_reloading_cost_items_touched_in_a_transaction(self):
+        self.add_schedule()
+        self.file.begin_transaction()
+        Data.load(self.file)
+        ifcopenshell.api.run("cost.edit_cost_item", self.file, cost_item=self.child2, attributes={"Name": "Foo"})
+        misses = Data.cache.misses
+        Data.purge()
+        Data.load(self.file)
+        assert Data.cache.misses - misses == 2
+        assert Data.cost_items[self.child2.id()]["Name"] == "Foo"
+        self.file.end_transaction()
+        self.assert_loaded_data_is_up_to_date()
+
+    def test_reloading_the_parents_of_a_changed_cost_value(self):
+        self.add_schedule()
+        self.file.begin_transaction()
+        Data.load(self.file)
+        ifcopenshell.api.run("cost.edit_cost_value", self.file, cost_value=self.value, attributes={"AppliedValue": 2.0})
+        Data.load(self.file)
+        assert Data.cost_items[self.child1.id()]["TotalAppliedValue"] == 2.0
+        assert Data.cost_items[self.parent.id()]["TotalAppliedValue"] == 2.0
+        self.file.end_transaction()
+        self.file.undo()
+        Data.load(self.file)
+        assert Data.cost_items[self.parent.id()]["TotalAppliedValue"] == 1.0
+        self.assert_loaded_data_is_up_to_date()
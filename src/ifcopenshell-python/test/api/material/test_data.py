@@ -0,0 +1,50 @@
+import test.bootstrap
+import ifcopenshell.api
+from ifcopenshell.api.material.data import Data
+
+
+class TestData(test.bootstrap.IFC4):
+    def add_materials(self):
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcProject")
+        self.wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        self.material1 = ifcopenshell.api.run("material.add_material", self.file, name="Foo")
+        self.material2 = ifcopenshell.api.run("material.add_material", self.file, name="Bar")
+
+    def get_loaded_data(self):
+        return {name: getattr(Data, name).copy() for ifc_class, name in Data.loaders}
+
+    def assert_loaded_data_is_up_to_date(self):
+        data = self.get_loaded_data()
+        Data.cache.file = None
+        Data.load(self.file)
+        assert data == self.get_loaded_data()
+
+    def test_only_reloading_materials_touched_in_a_transaction(self):
+        self.add_materials()
+        self.file.begin_transaction()
+        Data.load(self.file)
+        ifcopenshell.api.run("attribute.edit_attributes", self.file, product=self.material2, attributes={"Name": "Baz"})
+        misses = Data.cache.misses
+        Data.purge()
+        Data.load(self.file)
+        assert Data.cache.misses - misses == 1
+        assert Data.materials[self.material2.id()]["Name"] == "Baz"
+        self.file.end_transaction()
+        self.assert_loaded_data_is_up_to_date()
+
+    def test_forgetting_the_material_of_a_product_when_it_is_assigned(self):
+        self.add_materials()
+        self.file.begin_transaction()
+        Data.load(self.file)
+        Data.load(self.file, self.wall.id())
+        assert Data.products[self.wall.id()] == {}
+        ifcopenshell.api.run("material.assign_material", self.file, product=self.wall, material=self.material1)
+        Data.load(self.file)
+        assert self.wall.id() not in Data.products
+        Data.load(self.file, self.wall.id())
+        assert Data.products[self.wall.id()] == {"type": "IfcMaterial", "id": self.material1.id()}
+        self.file.end_transaction()
+        self.file.undo()
+        Data.load(self.file)
+        assert self.wall.id() not in Data.products
+        self.assert_loaded_data_is_up_to_date()
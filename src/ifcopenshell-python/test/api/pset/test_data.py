@@ -0,0 +1,51 @@
+import test.bootstrap
+import ifcopenshell.api
+from ifcopenshell.api.pset.data import Data
+
+
+class TestData(test.bootstrap.IFC4):
+    def add_psets(self):
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcProject")
+        self.wall1 = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        self.wall2 = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        for wall in (self.wall1, self.wall2):
+            pset = ifcopenshell.api.run("pset.add_pset", self.file, product=wall, name="Foo_Bar")
+            ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"Foo": "Bar"})
+
+    def test_only_forgetting_products_touched_in_a_transaction(self):
+        self.add_psets()
+        self.file.begin_transaction()
+        Data.purge()
+        Data.load(self.file, self.wall1.id())
+        Data.load(self.file, self.wall2.id())
+        pset = self.wall2.IsDefinedBy[0].RelatingPropertyDefinition
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"Foo": "Baz"})
+        Data.purge()
+        assert self.wall1.id() in Data.products
+        assert self.wall2.id() not in Data.products
+        Data.load(self.file, self.wall2.id())
+        assert Data.properties[pset.HasProperties[0].id()]["NominalValue"] == "Baz"
+        self.file.end_transaction()
+
+    def test_forgetting_products_when_a_pset_is_removed(self):
+        self.add_psets()
+        self.file.begin_transaction()
+        Data.purge()
+        Data.load(self.file, self.wall1.id())
+        pset = self.wall1.IsDefinedBy[0].RelatingPropertyDefinition
+        pset_id = pset.id()
+        ifcopenshell.api.run("pset.remove_pset", self.file, product=self.wall1, pset=pset)
+        self.file.end_transaction()
+        Data.purge()
+        assert self.wall1.id() not in Data.products
+        assert pset_id not in Data.psets
+
+    def test_forgetting_everything_after_changes_outside_a_transaction(self):
+        self.add_psets()
+        self.file.begin_transaction()
+        Data.purge()
+        Data.load(self.file, self.wall1.id())
+        self.file.end_transaction()
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        Data.purge()
+        assert Data.products == {}
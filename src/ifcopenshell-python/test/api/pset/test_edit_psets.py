@@ -0,0 +1,72 @@
+import pytest
+import test.bootstrap
+import ifcopenshell.api
+
+
+class TestEditPsets(test.bootstrap.IFC4):
+    def create_walls(self, total):
+        return [ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall") for i in range(total)]
+
+    def test_editing_the_psets_of_many_elements(self):
+        wall1, wall2 = self.create_walls(2)
+        psets = ifcopenshell.api.run(
+            "pset.edit_psets",
+            self.file,
+            name="Pset_WallCommon",
+            properties={wall1: {"Status": "NEW", "ThermalTransmittance": 42}, wall2: {"Status": "EXISTING"}},
+        )
+        assert psets == [
+            wall1.IsDefinedBy[0].RelatingPropertyDefinition,
+            wall2.IsDefinedBy[0].RelatingPropertyDefinition,
+        ]
+        assert psets[0].Name == "Pset_WallCommon"
+        assert psets[0].HasProperties[0].Name == "Status"
+        assert psets[0].HasProperties[0].NominalValue.is_a("IfcLabel")
+        assert psets[0].HasProperties[0].NominalValue.wrappedValue == "NEW"
+        assert psets[0].HasProperties[1].NominalValue.is_a("IfcThermalTransmittanceMeasure")
+        assert psets[0].HasProperties[1].NominalValue.wrappedValue == 42.0
+        assert len(psets[1].HasProperties) == 1
+        assert psets[1].HasProperties[0].NominalValue.wrappedValue == "EXISTING"
+
+    def test_editing_existing_psets_like_editing_each_pset(self):
+        wall1, wall2 = self.create_walls(2)
+        properties = {"Status": "NEW", "Combustible": True, "Foo": 1.5, "Bar": "Baz"}
+        for wall in (wall1, wall2):
+            pset = ifcopenshell.api.run("pset.add_pset", self.file, product=wall, name="Pset_WallCommon")
+            ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties=properties)
+        edits = {"Status": None, "Combustible": False, "Foo": 2.5, "Qux": 1}
+        pset1 = wall1.IsDefinedBy[0].RelatingPropertyDefinition
+        pset2 = wall2.IsDefinedBy[0].RelatingPropertyDefinition
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset1, properties=dict(edits))
+        ifcopenshell.api.run("pset.edit_psets", self.file, properties={pset2: edits})
+        assert [p.NominalValue and p.NominalValue.get_info() for p in pset1.HasProperties] == [
+            p.NominalValue and p.NominalValue.get_info() for p in pset2.HasProperties
+        ]
+        assert [p.Name for p in pset1.HasProperties] == [p.Name for p in pset2.HasProperties]
+
+    def test_editing_psets_as_a_single_transaction(self):
+        walls = self.create_walls(3)
+        ifcopenshell.api.run(
+            "pset.edit_psets", self.file, name="Foo_Bar", properties={w: {"Foo": "Bar"} for w in walls}
+        )
+        assert len(self.file.history) == 1
+        self.file.undo()
+        assert not self.file.by_type("IfcPropertySet")
+
+    def test_sharing_identical_new_properties(self):
+        wall1, wall2, wall3 = self.create_walls(3)
+        psets = ifcopenshell.api.run(
+            "pset.edit_psets",
+            self.file,
+            name="Pset_WallCommon",
+            properties={wall1: {"Status": "NEW"}, wall2: {"Status": "NEW"}, wall3: {"Status": "EXISTING"}},
+            should_share_values=True,
+        )
+        assert psets[0].HasProperties[0] == psets[1].HasProperties[0]
+        assert psets[0].HasProperties[0] != psets[2].HasProperties[0]
+        assert len(self.file.by_type("IfcPropertySingleValue")) == 2
+
+    def test_editing_elements_requires_a_pset_name(self):
+        (wall,) = self.create_walls(1)
+        with pytest.raises(ValueError):
+            ifcopenshell.api.run("pset.edit_psets", self.file, properties={wall: {"Foo": "Bar"}})
@@ -0,0 +1,56 @@
+import test.bootstrap
+import ifcopenshell.api
+
+
+class TestCascadeSchedule(test.bootstrap.IFC4):
+    def add_task(self, duration):
+        task = ifcopenshell.api.run("sequence.add_task", self.file)
+        task_time = ifcopenshell.api.run("sequence.add_task_time", self.file, task=task)
+        task_time.DurationType = "ELAPSEDTIME"
+        task_time.ScheduleDuration = duration
+        task_time.ScheduleStart = "2022-01-03T00:00:00"
+        task_time.ScheduleFinish = "2022-01-03T00:00:00"
+        return task
+
+    def add_sequence(self, predecessor, successor):
+        ifcopenshell.api.run(
+            "sequence.assign_sequence", self.file, relating_process=predecessor, related_process=successor
+        )
+
+    def test_cascading_finish_to_start_dates_through_a_diamond(self):
+        task1, task2, task3, task4 = (
+            self.add_task("P2D"),
+            self.add_task("P1D"),
+            self.add_task("P3D"),
+            self.add_task("P1D"),
+        )
+        self.add_sequence(task1, task2)
+        self.add_sequence(task1, task3)
+        self.add_sequence(task2, task4)
+        self.add_sequence(task3, task4)
+        task1.TaskTime.ScheduleFinish = "2022-01-05T00:00:00"
+        modified = ifcopenshell.api.run("sequence.cascade_schedule", self.file, task=task2)
+        assert modified == {task2, task4}
+        assert task2.TaskTime.ScheduleStart == "2022-01-05T00:00:00"
+        assert task2.TaskTime.ScheduleFinish == "2022-01-06T00:00:00"
+        assert task4.TaskTime.ScheduleStart == "2022-01-06T00:00:00"
+        modified = ifcopenshell.api.run("sequence.cascade_schedule", self.file, task=task3)
+        assert modified == {task3, task4}
+        assert task3.TaskTime.ScheduleFinish == "2022-01-08T00:00:00"
+        assert task4.TaskTime.ScheduleStart == "2022-01-08T00:00:00"
+        assert task4.TaskTime.ScheduleFinish == "2022-01-09T00:00:00"
+
+    def test_stopping_the_cascade_when_dates_do_not_change(self):
+        task1, task2, task3 = self.add_task("P1D"), self.add_task("P1D"), self.add_task("P1D")
+        self.add_sequence(task1, task2)
+        self.add_sequence(task2, task3)
+        task1.TaskTime.ScheduleFinish = "2022-01-04T00:00:00"
+        assert ifcopenshell.api.run("sequence.cascade_schedule", self.file, task=task2) == {task2, task3}
+        assert ifcopenshell.api.run("sequence.cascade_schedule", self.file, task=task2) == set()
+
+    def test_cascading_a_cyclic_sequence_terminates(self):
+        task1, task2 = self.add_task("P1D"), self.add_task("P1D")
+        self.add_sequence(task1, task2)
+        self.add_sequence(task2, task1)
+        task1.TaskTime.ScheduleFinish = "2022-01-04T00:00:00"
+        assert ifcopenshell.api.run("sequence.cascade_schedule", self.file, task=task2) == {task1, task2}
@@ -0,0 +1,80 @@
+import test.bootstrap
+import ifcopenshell.api
+from ifcopenshell.file import DictTransaction
+from ifcopenshell.api.sequence.data import Data
+
+
+class TestData(test.bootstrap.IFC4):
+    def add_schedule(self):
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcProject")
+        self.schedule = ifcopenshell.api.run("sequence.add_work_schedule", self.file)
+        self.task1 = ifcopenshell.api.run("sequence.add_task", self.file, work_schedule=self.schedule)
+        self.task2 = ifcopenshell.api.run("sequence.add_task", self.file, work_schedule=self.schedule)
+        ifcopenshell.api.run("sequence.add_task_time", self.file, task=self.task1)
+
+    def get_loaded_data(self):
+        return {name: getattr(Data, name).copy() for ifc_class, name, loader in Data.loaders}
+
+    def assert_loaded_data_is_up_to_date(self):
+        data = self.get_loaded_data()
+        Data.cache.file = None
+        Data.load(self.file)
+        assert data == self.get_loaded_data()
+
+    def test_only_reloading_entities_touched_in_a_transaction(self):
+        self.add_schedule()
+        self.file.begin_transaction()
+        Data.load(self.file)
+        ifcopenshell.api.run("sequence.edit_task", self.file, task=self.task2, attributes={"Name": "Foo"})
+        misses = Data.cache.misses
+        Data.purge()
+        Data.load(self.file)
+        assert Data.cache.misses - misses == 1
+        assert Data.tasks[self.task2.id()]["Name"] == "Foo"
+        self.file.end_transaction()
+        self.assert_loaded_data_is_up_to_date()
+
+    def test_reloading_both_ends_of_a_changed_relationship(self):
+        self.add_schedule()
+        self.file.begin_transaction()
+        Data.load(self.file)
+        rel = ifcopenshell.api.run(
+            "sequence.assign_sequence", self.file, relating_process=self.task1, related_process=self.task2
+        )
+        Data.load(self.file)
+        assert Data.tasks[self.task1.id()]["IsPredecessorTo"] == [rel.id()]
+        assert Data.tasks[self.task2.id()]["IsSuccessorFrom"] == [rel.id()]
+        assert rel.id() in Data.sequences
+        self.file.end_transaction()
+        self.file.undo()
+        Data.load(self.file)
+        assert Data.tasks[self.task1.id()]["IsPredecessorTo"] == []
+        assert rel.id() not in Data.sequences
+        self.assert_loaded_data_is_up_to_date()
+
+    def test_reloading_everything_after_changes_outside_a_transaction(self):
+        self.add_schedule()
+        self.file.begin_transaction()
+        Data.load(self.file)
+        self.file.end_transaction()
+        full_reloads = Data.cache.full_reloads
+        ifcopenshell.api.run("sequence.edit_task", self.file, task=self.task1, attributes={"Name": "Foo"})
+        Data.load(self.file)
+        assert Data.cache.full_reloads - full_reloads == 1
+        assert Data.tasks[self.task1.id()]["Name"] == "Foo"
+
+    def test_reloading_everything_with_transactions_that_cannot_be_read(self):
+        self.add_schedule()
+        self.file.transaction_class = DictTransaction
+        self.file.begin_transaction()
+        Data.load(self.file)
+        full_reloads = Data.cache.full_reloads
+        ifcopenshell.api.run("sequence.edit_task", self.file, task=self.task1, attributes={"Name": "Foo"})
+        Data.load(self.file)
+        assert Data.cache.full_reloads - full_reloads == 1
+        assert Data.tasks[self.task1.id()]["Name"] == "Foo"
+        self.file.end_transaction()
+        self.file.undo()
+        Data.load(self.file)
+        assert Data.cache.full_reloads - full_reloads == 2
+        assert Data.tasks[self.task1.id()]["Name"] != "Foo"
@@ -0,0 +1,54 @@
+import datetime
+import pytest
+import test.bootstrap
+import ifcopenshell.api
+
+
+class TestRecalculateSchedule(test.bootstrap.IFC4):
+    def add_task(self, schedule, duration, start=None):
+        task = ifcopenshell.api.run("sequence.add_task", self.file, work_schedule=schedule)
+        task_time = ifcopenshell.api.run("sequence.add_task_time", self.file, task=task)
+        task_time.DurationType = "ELAPSEDTIME"
+        task_time.ScheduleDuration = duration
+        task_time.ScheduleStart = start
+        return task
+
+    def test_calculating_the_critical_path_of_a_finish_to_start_chain(self):
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcProject")
+        schedule = ifcopenshell.api.run("sequence.add_work_schedule", self.file)
+        task1 = self.add_task(schedule, "P2D", "2022-01-03T09:00:00")
+        task2 = self.add_task(schedule, "P3D")
+        task3 = self.add_task(schedule, "P1D", "2022-01-03T09:00:00")
+        ifcopenshell.api.run("sequence.assign_sequence", self.file, relating_process=task1, related_process=task2)
+        ifcopenshell.api.run("sequence.recalculate_schedule", self.file, work_schedule=schedule)
+        assert task1.TaskTime.EarlyStart == "2022-01-03T00:00:00"
+        assert task2.TaskTime.EarlyStart == "2022-01-05T00:00:00"
+        assert task2.TaskTime.EarlyFinish == "2022-01-08T00:00:00"
+        assert task1.TaskTime.IsCritical is True
+        assert task2.TaskTime.IsCritical is True
+        assert task3.TaskTime.IsCritical is False
+        assert task3.TaskTime.TotalFloat == "P4D"
+        assert task3.TaskTime.LateFinish == "2022-01-08T00:00:00"
+
+    def test_calculating_start_to_start_sequences_with_a_lag(self):
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcProject")
+        schedule = ifcopenshell.api.run("sequence.add_work_schedule", self.file)
+        task1 = self.add_task(schedule, "P5D", "2022-01-03T09:00:00")
+        task2 = self.add_task(schedule, "P2D")
+        rel = ifcopenshell.api.run("sequence.assign_sequence", self.file, relating_process=task1, related_process=task2)
+        rel.SequenceType = "START_START"
+        lag_value = datetime.timedelta(days=1)
+        ifcopenshell.api.run("sequence.assign_lag_time", self.file, rel_sequence=rel, lag_value=lag_value)
+        ifcopenshell.api.run("sequence.recalculate_schedule", self.file, work_schedule=schedule)
+        assert task2.TaskTime.EarlyStart == "2022-01-04T00:00:00"
+        assert task2.TaskTime.EarlyFinish == "2022-01-06T00:00:00"
+
+    def test_failing_to_calculate_a_cyclic_schedule(self):
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcProject")
+        schedule = ifcopenshell.api.run("sequence.add_work_schedule", self.file)
+        task1 = self.add_task(schedule, "P1D", "2022-01-03T09:00:00")
+        task2 = self.add_task(schedule, "P1D")
+        ifcopenshell.api.run("sequence.assign_sequence", self.file, relating_process=task1, related_process=task2)
+        ifcopenshell.api.run("sequence.assign_sequence", self.file, relating_process=task2, related_process=task1)
+        with pytest.raises(ValueError):
+            ifcopenshell.api.run("sequence.recalculate_schedule", self.file, work_schedule=schedule)
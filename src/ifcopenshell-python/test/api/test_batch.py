@@ -0,0 +1,72 @@
+import pytest
+import test.bootstrap
+import ifcopenshell.api
+
+
+class TestBatch(test.bootstrap.IFC4):
+    def add_listener(self, notifications):
+        def listener(usecase_path, ifc_file, settings):
+            # Written for a single run, as listeners outside of a batch are
+            notifications.append((usecase_path, settings["product"].Name))
+
+        ifcopenshell.api.add_post_listener("attribute.edit_attributes", "test.batch", listener)
+
+    def add_batch_listener(self, notifications):
+        def listener(usecase_path, ifc_file, settings_list):
+            notifications.append((usecase_path, [s["product"].Name for s in settings_list]))
+
+        ifcopenshell.api.add_batch_post_listener("attribute.edit_attributes", "test.batch", listener)
+
+    def test_running_usecases_as_a_single_transaction(self):
+        with ifcopenshell.api.batch(self.file):
+            wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+            ifcopenshell.api.run("attribute.edit_attributes", self.file, product=wall, attributes={"Name": "Foo"})
+        assert len(self.file.history) == 1
+        assert self.file.transaction is None
+        self.file.undo()
+        assert not self.file.by_type("IfcWall")
+
+    def test_deferring_post_listeners_until_the_batch_finishes(self):
+        notifications = []
+        self.add_listener(notifications)
+        wall1 = self.file.createIfcWall()
+        wall2 = self.file.createIfcWall()
+        try:
+            with ifcopenshell.api.batch(self.file):
+                ifcopenshell.api.run("attribute.edit_attributes", self.file, product=wall1, attributes={"Name": "A"})
+                ifcopenshell.api.run("attribute.edit_attributes", self.file, product=wall2, attributes={"Name": "B"})
+                assert notifications == []
+        finally:
+            ifcopenshell.api.remove_post_listener("attribute.edit_attributes", "test.batch", None)
+        assert notifications == [("attribute.edit_attributes", "A"), ("attribute.edit_attributes", "B")]
+
+    def test_coalescing_batch_post_listeners_into_one_notification_per_usecase(self):
+        notifications = []
+        self.add_batch_listener(notifications)
+        wall1 = self.file.createIfcWall()
+        wall2 = self.file.createIfcWall()
+        try:
+            with ifcopenshell.api.batch(self.file):
+                ifcopenshell.api.run("attribute.edit_attributes", self.file, product=wall1, attributes={"Name": "A"})
+                ifcopenshell.api.run("attribute.edit_attributes", self.file, product=wall2, attributes={"Name": "B"})
+            ifcopenshell.api.run("attribute.edit_attributes", self.file, product=wall1, attributes={"Name": "C"})
+        finally:
+            ifcopenshell.api.remove_batch_post_listener("attribute.edit_attributes", "test.batch", None)
+        assert notifications == [("attribute.edit_attributes", ["A", "B"]), ("attribute.edit_attributes", ["C"])]
+
+    def test_discarding_the_batch_if_an_exception_is_raised(self):
+        with pytest.raises(ValueError):
+            with ifcopenshell.api.batch(self.file):
+                ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+                raise ValueError()
+        assert not self.file.by_type("IfcWall")
+        assert not self.file.history
+
+    def test_joining_an_existing_transaction(self):
+        self.file.begin_transaction()
+        with ifcopenshell.api.batch(self.file):
+            with ifcopenshell.api.batch(self.file):
+                ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        assert self.file.transaction is not None
+        self.file.end_transaction()
+        assert len(self.file.history) == 1
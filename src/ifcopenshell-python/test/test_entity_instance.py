@@ -0,0 +1,33 @@
+import pytest
+import test.bootstrap
+import ifcopenshell
+
+
+class TestEntityInstance(test.bootstrap.IFC4):
+    def test_getting_forward_attributes_by_name(self):
+        placement = self.file.createIfcLocalPlacement()
+        element = self.file.createIfcWall(Name="Foo", ObjectPlacement=placement)
+        assert element.Name == "Foo"
+        assert element.ObjectPlacement == placement
+        assert element.Description is None
+
+    def test_getting_inverse_attributes_by_name(self):
+        element = self.file.createIfcWall()
+        rel = self.file.createIfcRelAggregates(RelatedObjects=[element])
+        assert element.Decomposes == (rel,)
+
+    def test_getting_the_wrapped_value_of_a_type(self):
+        assert self.file.createIfcLabel("Foo").wrappedValue == "Foo"
+
+    def test_getting_a_missing_attribute(self):
+        element = self.file.createIfcWall()
+        with pytest.raises(AttributeError):
+            element.Foo
+        assert not hasattr(element, "Foo")
+
+    def test_setting_attributes_by_name(self):
+        element = self.file.createIfcWall()
+        element.Name = "Foo"
+        assert element[2] == "Foo"
+        with pytest.raises(Exception):
+            element.Foo = "Bar"
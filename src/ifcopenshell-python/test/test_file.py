@@ -1,8 +1,10 @@
 import pytest
+import zipfile
 import test.bootstrap
 import ifcopenshell
 import ifcopenshell.api
 import ifcopenshell.util.element
+from ifcopenshell.file import DictTransaction
 
 
 class TestTransaction(test.bootstrap.IFC4):
@@ -101,6 +103,56 @@ class TestTransaction(test.bootstrap.IFC4):
         self.file.set_history_size(1)
         assert len(self.file.history) == 1
 
+    def test_setting_the_history_max_bytes(self):
+        for i in range(3):
+            self.file.begin_transaction()
+            self.file.createIfcWall(Name="Wall")
+            self.file.end_transaction()
+        assert len(self.file.history) == 3
+        nbytes = self.file.history[-1].nbytes
+        assert self.file.get_history_nbytes() >= 3 * nbytes
+        self.file.set_history_max_bytes(2 * nbytes)
+        assert len(self.file.history) == 2
+        self.file.set_history_max_bytes(0)
+        assert len(self.file.history) == 1
+
+    def test_that_you_can_undo_and_redo_editing_typed_values(self):
+        prop = self.file.createIfcPropertySingleValue(Name="Foo")
+        prop.NominalValue = self.file.createIfcLabel("foo")
+        self.file.begin_transaction()
+        prop.NominalValue = self.file.createIfcLabel("bar")
+        self.file.end_transaction()
+        self.file.undo()
+        assert prop.NominalValue.wrappedValue == "foo"
+        self.file.redo()
+        assert prop.NominalValue.wrappedValue == "bar"
+
+    def test_that_you_can_undo_and_redo_with_a_dict_based_transaction_log(self):
+        self.file.transaction_class = DictTransaction
+        element = self.file.createIfcWall(Name="foo")
+        self.file.begin_transaction()
+        element.Name = "bar"
+        self.file.end_transaction()
+        self.file.undo()
+        assert element.Name == "foo"
+        self.file.redo()
+        assert element.Name == "bar"
+
+    def test_notifying_transaction_listeners(self):
+        events = []
+        self.file.add_transaction_listener("test", lambda f, event, transaction: events.append(event))
+        self.file.begin_transaction()
+        self.file.createIfcWall()
+        self.file.end_transaction()
+        self.file.undo()
+        self.file.redo()
+        self.file.begin_transaction()
+        self.file.discard_transaction()
+        assert events == ["end", "undo", "redo", "discard"]
+        self.file.remove_transaction_listener("test")
+        self.file.undo()
+        assert len(events) == 4
+
     def test_discarding_the_active_transaction(self):
         self.file.begin_transaction()
         self.file.discard_transaction()
@@ -167,6 +219,29 @@ class TestFile(test.bootstrap.IFC4):
         result = self.file.add(element)
         assert result.is_a() == element.is_a()
 
+    def test_caching_entity_instances_by_id(self):
+        wall = self.file.createIfcWall()
+        assert self.file.by_id(wall.id()) is not wall
+        self.file.set_instance_cache(True)
+        wall = self.file.by_id(wall.id())
+        slab = self.file.createIfcSlab()
+        assert self.file.by_id(wall.id()) is wall
+        assert self.file.by_type("IfcWall")[0] is wall
+        assert self.file.by_id(slab.id()) is slab
+        rel = self.file.createIfcRelAggregates(RelatingObject=wall)
+        assert rel.RelatingObject is wall
+        assert self.file.get_inverse(wall) == {rel}
+        self.file.set_instance_cache(False)
+        assert self.file.by_id(wall.id()) is not wall
+
+    def test_that_removed_instances_are_evicted_from_the_instance_cache(self):
+        self.file.set_instance_cache(True)
+        wall = self.file.createIfcWall()
+        step_id = wall.id()
+        self.file.remove(wall)
+        wall = self.file.createIfcSlab(id=step_id)
+        assert self.file.by_id(step_id).is_a("IfcSlab")
+
     def test_getting_elements_by_type(self):
         wall = self.file.createIfcWall()
         slab = self.file.createIfcSlab()
@@ -177,6 +252,47 @@ class TestFile(test.bootstrap.IFC4):
         assert self.file.by_type("IfcElement") == [wall]
         assert len(self.file.by_type("IfcElement", include_subtypes=False)) == 0
 
+    def test_getting_attributes_of_elements_by_type_as_columns(self):
+        placement = self.file.createIfcLocalPlacement()
+        wall = self.file.createIfcWall(GlobalId="id", Name="Foo", ObjectPlacement=placement)
+        slab = self.file.createIfcSlab(GlobalId="id2")
+        columns = self.file.get_attributes("IfcElement", ["GlobalId", "Name", "ObjectPlacement"])
+        assert columns["ObjectPlacement"].dtype.kind == "i"
+        rows = {r[0]: r[1:] for r in zip(*[columns[k] for k in ("id", "GlobalId", "Name", "ObjectPlacement")])}
+        assert rows == {wall.id(): ("id", "Foo", placement.id()), slab.id(): ("id2", None, 0)}
+
+    def test_getting_attributes_of_elements_by_id_as_columns(self):
+        wall = self.file.createIfcWall()
+        rel = self.file.createIfcRelAggregates(RelatedObjects=[wall])
+        point = self.file.createIfcCartesianPoint((1.0, 2.0, 3.0))
+        columns = self.file.get_attributes([wall.id(), point], ["Decomposes", "Coordinates", "Foo"])
+        assert list(columns["id"]) == [wall.id(), point.id()]
+        assert list(columns["Decomposes"]) == [(rel.id(),), None]
+        assert list(columns["Coordinates"]) == [None, (1.0, 2.0, 3.0)]
+        assert list(columns["Foo"]) == [None, None]
+
+    def test_getting_typed_attribute_values_as_columns(self):
+        prop = self.file.createIfcPropertySingleValue(NominalValue=self.file.createIfcLabel("Foo"))
+        columns = self.file.get_attributes("IfcPropertySingleValue", ["NominalValue"])
+        assert list(columns["NominalValue"]) == ["Foo"]
+
+    def test_getting_select_attribute_values_mixing_typed_values_and_references_as_columns(self):
+        unit = self.file.createIfcContextDependentUnit(Name="Foo")
+        self.file.createIfcPropertySingleValue(NominalValue=self.file.createIfcInteger(1))
+        self.file.createIfcPropertySingleValue(NominalValue=self.file.createIfcLabel("Foo"), Unit=unit)
+        self.file.createIfcPropertySingleValue(Unit=unit)
+        columns = self.file.get_attributes("IfcPropertySingleValue", ["NominalValue", "Unit"])
+        assert columns["NominalValue"].dtype.kind == "O"
+        assert list(columns["NominalValue"]) == [1, "Foo", None]
+        assert columns["Unit"].dtype.kind == "i"
+        assert list(columns["Unit"]) == [0, unit.id(), unit.id()]
+        point = self.file.createIfcCartesianPoint((0.0, 0.0))
+        prop = self.file.createIfcPropertySingleValue(NominalValue=self.file.createIfcInteger(1))
+        prop.NominalValue = point
+        columns = self.file.get_attributes("IfcPropertySingleValue", ["NominalValue"])
+        assert columns["NominalValue"].dtype.kind == "O"
+        assert list(columns["NominalValue"]) == [("IfcInteger", 1), ("IfcLabel", "Foo"), None, point.id()]
+
     def test_traversing_direct_attributes_of_an_element(self):
         owner = self.file.createIfcOwnerHistory()
         element = self.file.createIfcWall(OwnerHistory=owner)
@@ -247,3 +363,12 @@ class TestFile(test.bootstrap.IFC4):
         element = self.file.createIfcWall()
         g = ifcopenshell.file.from_string(self.file.wrapped_data.to_string())
         assert g.by_id(1).is_a("IfcWall")
+
+    def test_writing_and_opening_an_ifczip_archive(self, tmp_path):
+        self.file.createIfcWall(Name="Foo")
+        path = str(tmp_path / "model.ifczip")
+        self.file.write(path, compresslevel=1)
+        with zipfile.ZipFile(path) as archive:
+            assert archive.namelist() == ["model.ifc"]
+            assert archive.read("model.ifc").decode() == self.file.wrapped_data.to_string()
+        assert ifcopenshell.open(path).by_type("IfcWall")[0].Name == "Foo"
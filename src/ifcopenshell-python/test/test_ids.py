@@ -258,6 +258,51 @@ class TestIfcValidation(unittest.TestCase):
         # TODO
         pass
 
+    def test_validate_only_candidates_of_the_applicable_entity(self):
+        ifc_file = ifcopenshell.file(schema="IFC4")
+        wall = ifc_file.createIfcWall(ifcopenshell.guid.new())
+        ifc_file.createIfcSlab(ifcopenshell.guid.new())
+        ifc_file.createIfcWallType(ifcopenshell.guid.new())
+        spec = ids.specification(name="Test_Specification")
+        spec.add_applicability(ids.entity.create(name="IfcWall"))
+        self.assertEqual(spec.get_candidates(ifc_file), [wall])
+        spec = ids.specification(name="Test_Specification")
+        spec.add_applicability(ids.entity.create(name="IfcWallType"))
+        self.assertEqual(spec.get_candidates(ifc_file), [])
+
+    def test_validate_records_outcomes_and_renders_failures(self):
+        ifc_file = ifcopenshell.file(schema="IFC4")
+        wall1 = ifc_file.createIfcWall(ifcopenshell.guid.new(), Name="Foo")
+        wall2 = ifc_file.createIfcWall(ifcopenshell.guid.new(), Name="Bar")
+        ids_file = ids.ids()
+        ids_file.specifications.append(
+            ids.specification.parse(
+                {
+                    "@name": "Test_Specification",
+                    "@necessity": "required",
+                    "applicability": {"entity": {"name": {"simpleValue": "IfcWall"}}},
+                    "requirements": {
+                        "property": {
+                            "@location": "any",
+                            "propertyset": {"simpleValue": "attribute"},
+                            "name": {"simpleValue": "name"},
+                            "value": {"simpleValue": "Foo"},
+                        }
+                    },
+                }
+            )
+        )
+        logger = logging.getLogger("Test_IDS_Logger")
+        logger.setLevel(logging.CRITICAL)
+        results = ids_file.validate(ifc_file, logger)
+        self.assertEqual(list(results.elements), [wall1.id(), wall2.id()])
+        self.assertEqual(list(results.passed), [1, 0])
+        self.assertEqual(list(results.facets), [-1, 0])
+        report = results.asdict()
+        self.assertEqual(len(report), 1)
+        self.assertEqual(report[0]["guid"], wall2.GlobalId)
+        self.assertTrue(report[0]["sentence"].endswith("so is not compliant"))
+
     """ Validating IDS files with restrictions """
 
     # def test_validate_restrictions_enumeration(self):
@@ -0,0 +1,38 @@
+import test.bootstrap
+import ifcopenshell
+import ifcopenshell.guid
+import ifcopenshell.validate
+
+
+class TestValidate(test.bootstrap.IFC4):
+    def get_messages(self, **settings):
+        logger = ifcopenshell.validate.json_logger()
+        ifcopenshell.validate.validate(self.file, logger, **settings)
+        return sorted((str(s["instance"]), s["message"]) for s in logger.statements)
+
+    def test_logging_invalid_attribute_values(self):
+        self.file.createIfcWall(ifcopenshell.guid.new())
+        wall = self.file.createIfcWall()
+        point = self.file.createIfcCartesianPoint((0.0, 0.0))
+        polyline = self.file.createIfcPolyline([point])
+        messages = self.get_messages()
+        assert len(messages) == 2
+        assert messages[0][0] == str(wall)
+        assert "GlobalId" in messages[0][1] and messages[0][1].endswith("not optional")
+        assert messages[1][0] == str(polyline)
+        assert "Points" in messages[1][1]
+
+    def test_logging_invalid_select_values(self):
+        point = self.file.createIfcCartesianPoint((0.0, 0.0))
+        self.file.createIfcPropertySingleValue("Foo", None, self.file.createIfcLabel("Bar"), None)
+        prop = self.file.createIfcPropertySingleValue("Foo", None, None, None)
+        prop.NominalValue = point
+        messages = self.get_messages()
+        assert len(messages) == 1
+        assert messages[0][0] == str(prop)
+        assert messages[0][1].startswith(repr(point)) and "NominalValue" in messages[0][1]
+
+    def test_validating_in_multiple_processes(self):
+        self.file.createIfcWall()
+        self.file.createIfcPolyline([self.file.createIfcCartesianPoint((0.0, 0.0))])
+        assert self.get_messages(processes=2) == self.get_messages()
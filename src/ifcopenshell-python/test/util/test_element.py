@@ -53,6 +53,60 @@ class TestGetPsetsIFC4(test.bootstrap.IFC4):
         assert subject.get_psets(element, qtos_only=True) == {"qto": {"x": 42, "id": qto.id()}}
 
 
+class TestGetPsetIFC4(test.bootstrap.IFC4):
+    def test_getting_a_single_pset_of_a_product(self):
+        element = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        assert subject.get_pset(element, "name") is None
+        pset = ifcopenshell.api.run("pset.add_pset", self.file, product=element, name="name")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"a": "b"})
+        assert subject.get_pset(element, "name") == {"a": "b", "id": pset.id()}
+
+    def test_getting_a_single_property_of_a_product(self):
+        element = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        pset = ifcopenshell.api.run("pset.add_pset", self.file, product=element, name="name")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"a": "b", "c": "d"})
+        assert subject.get_pset(element, "name", "c") == "d"
+        assert subject.get_pset(element, "name", "id") == pset.id()
+        assert subject.get_pset(element, "name", "x") is None
+
+    def test_getting_a_single_property_of_a_product_type(self):
+        element = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWallType")
+        pset = ifcopenshell.api.run("pset.add_pset", self.file, product=element, name="name")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"x": "y"})
+        assert subject.get_pset(element, "name", "x") == "y"
+
+    def test_getting_a_single_property_of_a_material(self):
+        material = self.file.createIfcMaterial()
+        pset = ifcopenshell.api.run("pset.add_pset", self.file, product=material, name="name")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"x": "y"})
+        assert subject.get_pset(material, "name", "x") == "y"
+
+    def test_getting_a_single_quantity(self):
+        element = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        pset = ifcopenshell.api.run("pset.add_pset", self.file, product=element, name="pset")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"a": "b"})
+        qto = ifcopenshell.api.run("pset.add_qto", self.file, product=element, name="qto")
+        ifcopenshell.api.run("pset.edit_qto", self.file, qto=qto, properties={"x": 42})
+        assert subject.get_pset(element, "qto", "x") == 42
+        assert subject.get_pset(element, "qto", "x", psets_only=True) is None
+        assert subject.get_pset(element, "pset", "a", qtos_only=True) is None
+
+    def test_getting_a_single_property_of_a_predefined_pset(self):
+        element = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcDoor")
+        pset = self.file.create_entity("IfcDoorLiningProperties", ifcopenshell.guid.new(), Name="Lining")
+        pset.LiningDepth = 42
+        self.file.createIfcRelDefinesByProperties(RelatedObjects=[element], RelatingPropertyDefinition=pset)
+        assert subject.get_pset(element, "Lining", "LiningDepth") == 42
+
+    def test_getting_a_single_property_of_many_products(self):
+        elements = [ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall") for i in range(3)]
+        pset = ifcopenshell.api.run("pset.add_pset", self.file, product=elements[0], name="name")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"a": "b"})
+        pset = ifcopenshell.api.run("pset.add_pset", self.file, product=elements[2], name="name")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"a": "c"})
+        assert subject.get_pset_values(elements, "name", "a") == ["b", None, "c"]
+
+
 class TestGetPropertyDefinitionIFC4(test.bootstrap.IFC4):
     def test_getting_the_properties_of_a_pset(self):
         element = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
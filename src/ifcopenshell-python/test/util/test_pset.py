@@ -1,4 +1,7 @@
 """Run this test from src/ifcopenshell-python folder: pytest --durations=0 ifcopenshell/util/test_pset.py"""
+
+import ifcopenshell
+import ifcopenshell.guid
 from ifcopenshell.util import pset
 from ifcopenshell import util
 
@@ -15,3 +18,34 @@ class TestPsetQto:
     def test_get_applicables_names(self):
         for i in range(1000):
             assert len(self.pset_qto.get_applicable_names("IfcMaterial")) == 14
+
+    def test_get_by_name(self):
+        assert self.pset_qto.get_by_name("Pset_WallCommon").Name == "Pset_WallCommon"
+        assert self.pset_qto.get_by_name("Foo") is None
+
+    def test_get_primary_measure_types(self):
+        primary_measure_types = self.pset_qto.get_primary_measure_types("Pset_WallCommon")
+        assert primary_measure_types["IsExternal"] == "IfcBoolean"
+        assert self.pset_qto.get_primary_measure_types("Foo") is None
+
+    def test_add_templates(self):
+        pset_qto = util.pset.PsetQto("IFC4")
+        template = ifcopenshell.file(schema="IFC4")
+        template.createIfcPropertySetTemplate(ifcopenshell.guid.new(), Name="Foo_Bar", ApplicableEntity="IfcWall")
+        pset_qto.add_templates(template)
+        assert pset_qto.get_by_name("Foo_Bar").Name == "Foo_Bar"
+        assert "Foo_Bar" in pset_qto.get_applicable_names("IfcWall")
+        assert "Foo_Bar" not in pset_qto.get_applicable_names("IfcSlab")
+
+    def test_caching_the_index_of_template_paths_in_the_user_cache(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "cache"))
+        template = ifcopenshell.file(schema="IFC4")
+        template.createIfcPropertySetTemplate(ifcopenshell.guid.new(), Name="Foo_Bar", ApplicableEntity="IfcWall")
+        template_path = tmp_path / "templates" / "template.ifc"
+        template_path.parent.mkdir()
+        template.write(str(template_path))
+        pset_qto = util.pset.PsetQto("IFC4", templates=[template_path])
+        assert pset_qto.get_by_name("Foo_Bar").Name == "Foo_Bar"
+        assert list(template_path.parent.iterdir()) == [template_path]
+        assert pset.load_index(str(template_path)) == pset_qto.indexes[0]
@@ -0,0 +1,103 @@
+import pytest
+import test.bootstrap
+import ifcopenshell
+import ifcopenshell.api
+import ifcopenshell.util.selector as subject
+
+
+class TestSelector(test.bootstrap.IFC4):
+    def test_selecting_elements_by_class(self):
+        wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        slab = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcSlab")
+        assert subject.Selector().parse(self.file, ".IfcWall") == [wall]
+        assert set(subject.Selector().parse(self.file, ".IfcWall | .IfcSlab")) == {wall, slab}
+        assert subject.Selector().parse(self.file, ".IfcWall & .IfcSlab") == []
+
+    def test_selecting_elements_by_guid(self):
+        wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        assert subject.Selector().parse(self.file, "#" + wall.GlobalId) == [wall]
+
+    def test_selecting_elements_with_an_attribute_filter(self):
+        wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall", name="Foo")
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall", name="Bar")
+        assert subject.Selector().parse(self.file, '.IfcWall[Name="Foo"]') == [wall]
+        assert subject.Selector().parse(self.file, '.IfcWall[Name*="oo"]') == [wall]
+
+    def test_selecting_elements_with_a_property_filter(self):
+        wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        pset = ifcopenshell.api.run("pset.add_pset", self.file, product=wall, name="Pset_WallCommon")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"FireRating": "2HR"})
+        assert subject.Selector().parse(self.file, '.IfcWall[Pset_WallCommon.FireRating="2HR"]') == [wall]
+        assert subject.Selector().parse(self.file, ".IfcWall[Pset_WallCommon.FireRating]") == [wall]
+
+    def test_selecting_elements_by_inverse_relationships(self):
+        wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        wall_type = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWallType")
+        ifcopenshell.api.run("type.assign_type", self.file, related_object=wall, relating_type=wall_type)
+        assert subject.Selector().parse(self.file, "*.IfcWallType") == [wall]
+
+
+class TestIndexedSelector(test.bootstrap.IFC4):
+    def test_selecting_elements_with_a_property_filter(self):
+        wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        pset = ifcopenshell.api.run("pset.add_pset", self.file, product=wall, name="Pset_WallCommon")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"FireRating": "2HR"})
+        selector = subject.Selector(use_index=True)
+        assert selector.parse(self.file, '.IfcWall[Pset_WallCommon.FireRating="2HR"]') == [wall]
+
+    def test_selecting_elements_with_a_type_property_filter(self):
+        wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        wall_type = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWallType", name="Foo")
+        ifcopenshell.api.run("type.assign_type", self.file, related_object=wall, relating_type=wall_type)
+        selector = subject.Selector(use_index=True)
+        assert selector.parse(self.file, '.IfcWall[type.Name="Foo"]') == [wall]
+
+    def test_selecting_elements_with_a_container_filter(self):
+        storey = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcBuildingStorey", name="L1")
+        wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        ifcopenshell.api.run("spatial.assign_container", self.file, product=wall, relating_structure=storey)
+        selector = subject.Selector(use_index=True)
+        assert selector.parse(self.file, '.IfcWall[container.Name="L1"]') == [wall]
+        assert selector.parse(self.file, "@.IfcBuildingStorey") == [wall]
+
+    def test_selecting_elements_by_type(self):
+        wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        wall_type = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWallType")
+        ifcopenshell.api.run("type.assign_type", self.file, related_object=wall, relating_type=wall_type)
+        assert subject.Selector(use_index=True).parse(self.file, "*.IfcWallType") == [wall]
+
+    def test_invalidating_the_index_after_a_transaction(self):
+        wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall")
+        pset = ifcopenshell.api.run("pset.add_pset", self.file, product=wall, name="Foo_Bar")
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"Baz": "1"})
+        selector = subject.Selector(use_index=True)
+        assert selector.parse(self.file, '.IfcWall[Foo_Bar.Baz="2"]') == []
+        self.file.begin_transaction()
+        ifcopenshell.api.run("pset.edit_pset", self.file, pset=pset, properties={"Baz": "2"})
+        self.file.end_transaction()
+        assert selector.parse(self.file, '.IfcWall[Foo_Bar.Baz="2"]') == [wall]
+        self.file.undo()
+        assert selector.parse(self.file, '.IfcWall[Foo_Bar.Baz="2"]') == []
+
+
+class TestQueryPlan(test.bootstrap.IFC4):
+    def test_compiling_a_query_only_once(self):
+        assert subject.compile_query(".IfcWall") is subject.compile_query(".IfcWall")
+        assert subject.get_parser() is subject.get_parser()
+
+    def test_executing_a_plan_against_many_files(self):
+        plan = subject.compile_query('.IfcWall[Name="Foo"] | .IfcSlab')
+        wall = ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcWall", name="Foo")
+        assert plan.execute(self.file) == [wall]
+        ifc_file = ifcopenshell.api.run("project.create_file")
+        slab = ifcopenshell.api.run("root.create_entity", ifc_file, ifc_class="IfcSlab")
+        assert plan.execute(ifc_file) == [slab]
+
+    def test_compiling_filters(self):
+        plan = subject.compile_query('.IfcWall[Pset_WallCommon.FireRating>="2"]')
+        selector = plan.root.queries[0][1]
+        assert selector.ifc_class == "IfcWall"
+        assert selector.filter == ("Pset_WallCommon.FireRating", "morethanequalto", "2")
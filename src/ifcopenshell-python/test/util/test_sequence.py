@@ -0,0 +1,94 @@
+import gc
+import weakref
+import datetime
+import test.bootstrap
+import ifcopenshell.api
+import ifcopenshell.util.sequence as subject
+
+
+class TestWorkingDaysIFC4(test.bootstrap.IFC4):
+    def add_calendar(self):
+        ifcopenshell.api.run("root.create_entity", self.file, ifc_class="IfcProject")
+        self.calendar = ifcopenshell.api.run("sequence.add_work_calendar", self.file)
+        work_time = ifcopenshell.api.run(
+            "sequence.add_work_time", self.file, work_calendar=self.calendar, time_type="WorkingTimes"
+        )
+        pattern = ifcopenshell.api.run("sequence.assign_recurrence_pattern", self.file, parent=work_time)
+        ifcopenshell.api.run(
+            "sequence.edit_recurrence_pattern",
+            self.file,
+            recurrence_pattern=pattern,
+            attributes={"WeekdayComponent": [1, 2, 3, 4, 5]},
+        )
+        return self.calendar
+
+    def add_holiday(self, start, finish):
+        work_time = ifcopenshell.api.run(
+            "sequence.add_work_time", self.file, work_calendar=self.calendar, time_type="ExceptionTimes"
+        )
+        ifcopenshell.api.run(
+            "sequence.edit_work_time", self.file, work_time=work_time, attributes={"Start": start, "Finish": finish}
+        )
+        return work_time
+
+    def test_checking_working_days(self):
+        self.add_calendar()
+        assert subject.is_working_day(datetime.date(2022, 1, 3), self.calendar) is True
+        assert subject.is_working_day(datetime.date(2022, 1, 8), self.calendar) is False
+
+    def test_counting_working_days(self):
+        self.add_calendar()
+        assert subject.count_working_days(datetime.date(2022, 1, 3), datetime.date(2022, 1, 17), self.calendar) == 10
+        assert subject.count_working_days(datetime.date(2022, 1, 17), datetime.date(2022, 1, 3), self.calendar) == 0
+        assert subject.count_working_days(datetime.date(2022, 1, 3), datetime.date(2032, 1, 3), self.calendar) == 2610
+
+    def test_getting_finish_dates(self):
+        calendar = self.add_calendar()
+        start = datetime.date(2022, 1, 3)
+        week = datetime.timedelta(days=5)
+        assert subject.get_finish_date(start, week, "WORKTIME", calendar) == datetime.date(2022, 1, 10)
+        assert subject.get_finish_date(start, -week, "WORKTIME", calendar) == datetime.date(2021, 12, 27)
+        assert subject.get_finish_date(start, week, "ELAPSEDTIME", calendar) == datetime.date(2022, 1, 8)
+        assert subject.get_finish_date(start, week, "WORKTIME", None) == datetime.date(2022, 1, 8)
+
+    def test_getting_the_nearest_working_days(self):
+        self.add_calendar()
+        saturday = datetime.date(2022, 1, 8)
+        assert subject.get_soonest_working_day(saturday, "WORKTIME", self.calendar) == datetime.date(2022, 1, 10)
+        assert subject.get_recent_working_day(saturday, "WORKTIME", self.calendar) == datetime.date(2022, 1, 7)
+
+    def test_editing_the_calendar_invalidates_working_days(self):
+        self.add_calendar()
+        day = datetime.date(2022, 1, 5)
+        assert subject.is_working_day(day, self.calendar) is True
+        holiday = self.add_holiday(datetime.date(2022, 1, 4), datetime.date(2022, 1, 6))
+        assert subject.is_working_day(day, self.calendar) is False
+        assert subject.count_working_days(datetime.date(2022, 1, 3), datetime.date(2022, 1, 10), self.calendar) == 2
+        ifcopenshell.api.run("sequence.remove_work_time", self.file, work_time=holiday)
+        assert subject.is_working_day(day, self.calendar) is True
+
+    def test_discarding_a_calendar_edit_invalidates_working_days(self):
+        self.add_calendar()
+        day = datetime.date(2022, 1, 5)
+        holiday = self.add_holiday(datetime.date(2022, 1, 4), datetime.date(2022, 1, 6))
+        assert subject.is_working_day(day, self.calendar) is False
+        self.file.begin_transaction()
+        ifcopenshell.api.run(
+            "sequence.edit_work_time",
+            self.file,
+            work_time=holiday,
+            attributes={"Start": datetime.date(2022, 1, 10), "Finish": datetime.date(2022, 1, 11)},
+        )
+        assert subject.is_working_day(day, self.calendar) is True
+        self.file.discard_transaction()
+        assert subject.is_working_day(day, self.calendar) is False
+
+    def test_cached_working_days_do_not_keep_the_file_alive(self):
+        ifc_file = ifcopenshell.api.run("project.create_file")
+        ifcopenshell.api.run("root.create_entity", ifc_file, ifc_class="IfcProject")
+        calendar = ifcopenshell.api.run("sequence.add_work_calendar", ifc_file)
+        assert subject.is_working_day(datetime.date(2022, 1, 3), calendar) is False
+        ifc_file_ref = weakref.ref(ifc_file)
+        del ifc_file, calendar
+        gc.collect()
+        assert ifc_file_ref() is None
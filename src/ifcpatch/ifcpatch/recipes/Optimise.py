@@ -1,4 +1,3 @@
-
 # IfcPatch - IFC patching utiliy
 # Copyright (C) 2020, 2021 Dion Moult <dion@thinkmoult.com>
 #
@@ -18,9 +17,6 @@
 # along with IfcPatch.  If not, see <http://www.gnu.org/licenses/>.
 
 import ifcopenshell
-import ifcopenshell.util.element
-from toposort import toposort_flatten as toposort
-
 
 
 class Patcher:
@@ -31,55 +27,98 @@ class Patcher:
         self.args = args
         self.optimized_file = ifcopenshell.file(schema=self.file.schema)
 
-
     def patch(self):
-        def generate_instances_and_references():
-            """
-            Generator which yields an entity id and 
-            the set of all of its references contained in its attributes. 
-            """
-            for inst in self.file:
-                yield inst.id(), set(i.id() for i in self.file.traverse(inst)[1:] if i.id())
+        """Merges instances with identical attributes, including identical references
 
-        instance_mapping = {}
+        Instances are visited depth first so that every instance is added to
+        the optimised file after the instances it directly references. Each
+        instance is then keyed by its class and attribute values, where
+        references are replaced by the id of the instance they were merged
+        into. Identical subgraphs therefore produce identical keys without
+        ever walking them more than once.
+        """
+        self.instance_mapping = {}
+        self.instance_keys = {}
+        self.total_duplicates = 0
+        self.total_bytes_saved = 0
 
+        attributes = {}
+        for root in self.file:
+            if root.id() in self.instance_mapping:
+                continue
+            stack = [root]
+            while stack:
+                inst = stack[-1]
+                step_id = inst.id()
+                if step_id in self.instance_mapping:
+                    stack.pop()
+                    continue
+                values = attributes.get(step_id)
+                if values is None:
+                    values = attributes[step_id] = tuple(inst)
+                    references = []
+                    self.get_references(values, references)
+                    references = [r for r in references if r.id() not in self.instance_mapping]
+                    if references:
+                        for reference in references:
+                            if reference.id() in attributes:
+                                raise ValueError("Circular reference found between {} and {}".format(inst, reference))
+                        stack.extend(references)
+                        continue
+                stack.pop()
+                del attributes[step_id]
+                self.add_instance(inst, values)
 
-        def map_value(v):
-            """
-            Recursive function which replicates an entity instance, with 
-            its attributes, mapping references to already registered
-            instances. Indeed, because of the toposort we know that 
-            forward attribute value instances are mapped before the instances
-            that reference them.
-            """
-            if isinstance(v, (list, tuple)):
-                # lists are recursively traversed
-                return type(v)(map(map_value, v))
-            elif isinstance(v, ifcopenshell.entity_instance):
-                if v.id() == 0:
-                    # express simple types are not part of the toposort and just copied
-                    return self.optimized_file.create_entity(v.is_a(), v[0])
-          
-                
-                return instance_mapping[v]
-            else:
-                # a plain python value can just be returned
-                return v
+        total_instances = len(self.instance_mapping)
+        self.logger.info(
+            "Merged {} of {} instances, saving approximately {} bytes".format(
+                self.total_duplicates, total_instances, self.total_bytes_saved
+            )
+        )
+        self.file = self.optimized_file
 
-        info_to_id = {}
-            
-        for id in toposort(dict(generate_instances_and_references())):
-            inst = self.file[id]
-            info = inst.get_info(include_identifier=False, recursive=True, return_type=frozenset)
-            if info in info_to_id:
-                mapped = instance_mapping[inst] = instance_mapping[self.file[info_to_id[info]]]
+    def get_references(self, value, references):
+        if isinstance(value, ifcopenshell.entity_instance):
+            # Simple types such as IfcLabel have no id and cannot reference instances
+            if value.id():
+                references.append(value)
+        elif isinstance(value, tuple):
+            for item in value:
+                self.get_references(item, references)
 
-            else:
-                info_to_id[info] = id
-                instance_mapping[inst] = self.optimized_file.create_entity(
-                    inst.is_a(),
-                    *map(map_value, inst)
-                )
+    def add_instance(self, inst, values):
+        key = (inst.is_a(), self.get_key(values))
+        mapped = self.instance_keys.get(key)
+        if mapped is None:
+            mapped = self.instance_keys[key] = self.create_instance(inst, values)
+        else:
+            self.total_duplicates += 1
+            self.total_bytes_saved += len(str(inst)) + 1
+        self.instance_mapping[inst.id()] = mapped
 
-        self.file = self.optimized_file
-        
\ No newline at end of file
+    def create_instance(self, inst, values):
+        # Null and derived attributes are skipped, as derived attributes cannot be set
+        attributes = {}
+        for name, value in zip(inst.wrapped_data.get_attribute_names(), values):
+            if value is not None:
+                attributes[name] = self.map_value(value)
+        return self.optimized_file.create_entity(inst.is_a(), **attributes)
+
+    def get_key(self, value):
+        if isinstance(value, ifcopenshell.entity_instance):
+            if value.id() == 0:
+                return (value.is_a(), self.get_key(value.wrappedValue))
+            return self.instance_mapping[value.id()].id()
+        elif isinstance(value, tuple):
+            return tuple(map(self.get_key, value))
+        return value
+
+    def map_value(self, value):
+        if isinstance(value, ifcopenshell.entity_instance):
+            if value.id() == 0:
+                # Simple types are not shared between instances and are just copied
+                return self.optimized_file.create_entity(value.is_a(), value.wrappedValue)
+            return self.instance_mapping[value.id()]
+        elif isinstance(value, tuple):
+            return tuple(map(self.map_value, value))
+        return value
@@ -1,4 +1,3 @@
-
 # IfcPatch - IFC patching utiliy
 # Copyright (C) 2020, 2021 Dion Moult <dion@thinkmoult.com>
 #
@@ -17,45 +16,158 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with IfcPatch.  If not, see <http://www.gnu.org/licenses/>.
 
+import multiprocessing
+import ifcopenshell
+
+
 class Patcher:
-    def __init__(self, src, file, logger, args=None):
+    def __init__(self, src, file, logger, processes: int = 1):
+        """Split By Building Storey
+
+        Split a model into one file per building storey. Each file contains the
+        project, spatial structure, and other non-element products, along with
+        the elements contained in that storey and their relationships.
+
+        The model is only parsed once, and the files are named after the index
+        and name of their storey.
+
+        :param processes: The number of processes used to write files in parallel.
+        """
         self.src = src
         self.file = file
         self.logger = logger
-        self.args = args
+        self.processes = int(processes)
 
     def patch(self):
-        import ifcopenshell
-        from shutil import copyfile
-        storeys = self.file.by_type('IfcBuildingStorey')
-        for i, storey in enumerate(storeys):
-            dest = '{}-{}.ifc'.format(i, storey.Name)
-            copyfile(self.src, dest)
-            old_ifc = ifcopenshell.open(dest)
-            new_ifc = ifcopenshell.file(schema=self.file.schema)
-            if self.file.schema == 'IFC2X3':
-                elements = old_ifc.by_type('IfcProject') + old_ifc.by_type('IfcProduct')
-            else:
-                elements = old_ifc.by_type('IfcContext') + old_ifc.by_type('IfcProduct')
-            inverse_elements = []
-            for element in elements:
-                if element.is_a('IfcElement') \
-                        and not self.is_in_storey(element, storey):
-                    element.Representation = None
+        self.storeys = self.file.by_type("IfcBuildingStorey")
+        self.references = {}
+        self.styled_items = {}
+        for styled_item in self.file.by_type("IfcStyledItem"):
+            if styled_item.Item:
+                self.styled_items.setdefault(styled_item.Item.id(), []).append(styled_item.id())
+        self.elements = set()
+        self.storey_elements = {}
+        for storey in self.storeys:
+            self.storey_elements[storey.id()] = set()
+        for element in self.file.by_type("IfcElement"):
+            self.elements.add(element.id())
+            storey = self.get_storey(element)
+            if storey is not None:
+                self.storey_elements[storey.id()].add(element.id())
+        if self.file.schema == "IFC2X3":
+            self.shared_roots = self.file.by_type("IfcProject") + self.file.by_type("IfcProduct")
+        else:
+            self.shared_roots = self.file.by_type("IfcContext") + self.file.by_type("IfcProduct")
+        self.shared_roots = [e.id() for e in self.shared_roots if not e.is_a("IfcElement")]
+
+        if self.processes > 1 and "fork" in multiprocessing.get_all_start_methods():
+            # Forked processes share the parsed model instead of parsing it again
+            global _patcher
+            _patcher = self
+            with multiprocessing.get_context("fork").Pool(self.processes) as pool:
+                paths = pool.map(_write_storey, range(len(self.storeys)))
+            _patcher = None
+        else:
+            paths = [self.write_storey(i) for i in range(len(self.storeys))]
+        for path in paths:
+            self.logger.info("Wrote {}".format(path))
+
+    def write_storey(self, index):
+        storey = self.storeys[index]
+        dest = "{}-{}.ifc".format(index, storey.Name)
+        elements = self.storey_elements[storey.id()]
+        self.excluded_elements = self.elements - elements
+        self.new = ifcopenshell.file(schema=self.file.schema)
+        self.added = set()
+        roots = self.shared_roots + sorted(elements)
+        inverses = set()
+        for step_id in roots:
+            for inverse in self.file.get_inverse(self.file.by_id(step_id)):
+                if inverse.id() not in inverses and not self.is_orphaned(inverse):
+                    inverses.add(inverse.id())
+        for step_id in roots + sorted(inverses):
+            self.add(step_id)
+        self.new.write(dest)
+        self.new = None
+        return dest
+
+    def add(self, root):
+        """Copies an instance after everything it references, keeping its id"""
+        stack = [root]
+        visiting = set()
+        while stack:
+            step_id = stack[-1]
+            if step_id in self.added:
+                stack.pop()
+                continue
+            references = self.get_references(step_id)
+            if step_id not in visiting:
+                visiting.add(step_id)
+                pending = [r for r in references if r not in self.added and r not in self.excluded_elements]
+                if pending:
+                    stack.extend(pending)
                     continue
-                if element.is_a('IfcElement'):
-                    styled_rep_items = [i for i in old_ifc.traverse(element) if i.is_a('IfcRepresentationItem') and i.StyledByItem]
-                    [new_ifc.add(i.StyledByItem[0]) for i in styled_rep_items]
-                new_ifc.add(element)
-                inverse_elements.extend(old_ifc.get_inverse(element))
-            for inverse_element in inverse_elements:
-                new_ifc.add(inverse_element)
-            for element in new_ifc.by_type('IfcElement'):
-                if not self.is_in_storey(element, storey):
-                    new_ifc.remove(element)
-            new_ifc.write(dest)
-
-    def is_in_storey(self, element, storey):
-        return element.ContainedInStructure \
-            and element.ContainedInStructure[0].RelatingStructure.is_a('IfcBuildingStorey') \
-            and element.ContainedInStructure[0].RelatingStructure.GlobalId == storey.GlobalId
+            stack.pop()
+            inst = self.file.by_id(step_id)
+            attributes = {}
+            for name, value in zip(inst.wrapped_data.get_attribute_names(), inst):
+                value = self.map_value(value)
+                if value is not None:
+                    attributes[name] = value
+            self.new.create_entity(inst.is_a(), id=step_id, **attributes)
+            self.added.add(step_id)
+            # Styles are not referenced by the items they style, so they are copied alongside them
+            stack.extend(self.styled_items.get(step_id, ()))
+
+    def get_references(self, step_id):
+        references = self.references.get(step_id)
+        if references is None:
+            references = self.references[step_id] = []
+            self.add_references(tuple(self.file.by_id(step_id)), references)
+        return references
+
+    def add_references(self, value, references):
+        if isinstance(value, ifcopenshell.entity_instance):
+            if value.id():
+                references.append(value.id())
+        elif isinstance(value, tuple):
+            for item in value:
+                self.add_references(item, references)
+
+    def map_value(self, value):
+        if isinstance(value, ifcopenshell.entity_instance):
+            if value.id() == 0:
+                return self.new.create_entity(value.is_a(), value.wrappedValue)
+            elif value.id() in self.excluded_elements:
+                return None
+            return self.new.by_id(value.id())
+        elif isinstance(value, tuple):
+            return tuple(v for v in map(self.map_value, value) if v is not None)
+        return value
+
+    def is_orphaned(self, inverse):
+        """Whether a relationship only relates elements from other storeys"""
+        if not inverse.is_a("IfcRelationship"):
+            return False
+        for value in inverse:
+            if isinstance(value, ifcopenshell.entity_instance):
+                if value.id() in self.excluded_elements:
+                    return True
+            elif isinstance(value, tuple) and value:
+                references = []
+                self.add_references(value, references)
+                if references and all(r in self.excluded_elements for r in references):
+                    return True
+        return False
+
+    def get_storey(self, element):
+        for rel in getattr(element, "ContainedInStructure", None) or ():
+            if rel.RelatingStructure.is_a("IfcBuildingStorey"):
+                return rel.RelatingStructure
+
+
+def _write_storey(index):
+    return _patcher.write_storey(index)
+
+
+_patcher = None
@@ -253,6 +253,87 @@ struct ShapeRTTI : public boost::static_visitor<PyObject*>
 	%}
 };
 
+// Raw buffer accessors, which copy the underlying vectors into a single bytes
+// object rather than building a tuple of Python numbers. These can be wrapped
+// without further copies using numpy.frombuffer().
+%define buffer_accessor(name)
+	PyObject* name ## _buffer() const {
+		const auto& v = $self->name();
+		return PyBytes_FromStringAndSize((const char*) v.data(), v.size() * sizeof(v[0]));
+	}
+%enddef
+
+// Array interface accessors, which describe the underlying vectors in place
+// so that numpy arrays can be created over them without any copies. The
+// arrays only remain valid for as long as their owner is alive, see
+// TriangulationElement.geometry below.
+%define array_interface_accessor(name, typestr)
+	PyObject* name ## _array_interface() const {
+		const auto& v = $self->name();
+		return Py_BuildValue(
+			"{s:(K,O),s:(n),s:s,s:i}",
+			"data", (unsigned long long) v.data(), Py_True,
+			"shape", (Py_ssize_t) v.size(),
+			"typestr", typestr,
+			"version", 3
+		);
+	}
+%enddef
+
+%{
+static void destroy_triangulation_owner(PyObject* capsule) {
+	delete (boost::shared_ptr<IfcGeom::Representation::Triangulation>*) PyCapsule_GetPointer(capsule, "IfcGeom::Representation::Triangulation");
+}
+%}
+
+%pythoncode %{
+class array_view(object):
+    """Exposes a vector owned by a geometry object through the numpy array interface"""
+
+    def __init__(self, owner, array_interface):
+        self.owner = owner
+        self.__array_interface__ = array_interface
+
+    def to_numpy(self):
+        import numpy
+
+        return numpy.asarray(self)
+%}
+
+%extend IfcGeom::Representation::Triangulation {
+	buffer_accessor(verts)
+	buffer_accessor(faces)
+	buffer_accessor(edges)
+	buffer_accessor(normals)
+	buffer_accessor(material_ids)
+
+	array_interface_accessor(verts, "=f8")
+	array_interface_accessor(faces, "=i4")
+	array_interface_accessor(edges, "=i4")
+	array_interface_accessor(normals, "=f8")
+	array_interface_accessor(material_ids, "=i4")
+
+	%pythoncode %{
+        verts_buffer = property(verts_buffer)
+        faces_buffer = property(faces_buffer)
+        edges_buffer = property(edges_buffer)
+        normals_buffer = property(normals_buffer)
+        material_ids_buffer = property(material_ids_buffer)
+
+        # Read-only numpy views of the vectors, sharing their memory. The views
+        # hold on to an owner of the triangulation: a shared reference to it
+        # when taken from an element, otherwise the triangulation proxy itself.
+        def _get_array(self, get_array_interface):
+            return array_view(getattr(self, "owner", self), get_array_interface()).to_numpy()
+
+        verts_array = property(lambda self: self._get_array(self.verts_array_interface))
+        faces_array = property(lambda self: self._get_array(self.faces_array_interface))
+        edges_array = property(lambda self: self._get_array(self.edges_array_interface))
+        normals_array = property(lambda self: self._get_array(self.normals_array_interface))
+        material_ids_array = property(lambda self: self._get_array(self.material_ids_array_interface))
+	%}
+};
+
 %extend IfcGeom::Representation::Serialization {
 	%pythoncode %{
         # Hide the getters with read-only property implementations
@@ -285,9 +366,26 @@ struct ShapeRTTI : public boost::static_visitor<PyObject*>
 };
 
 %extend IfcGeom::TriangulationElement {
+	// Returns a capsule sharing ownership of the triangulation, which outlives
+	// the element, e.g. when the element is freed as an iterator advances.
+	PyObject* geometry_owner() const {
+		return PyCapsule_New(
+			new boost::shared_ptr<IfcGeom::Representation::Triangulation>($self->geometry_pointer()),
+			"IfcGeom::Representation::Triangulation",
+			destroy_triangulation_owner
+		);
+	}
+
 	%pythoncode %{
+        def _get_geometry(self, get_geometry=geometry):
+            geometry = get_geometry(self)
+            # Views over the triangulation's vectors share ownership of it, so
+            # they remain valid after the iterator moves on to the next element.
+            geometry.owner = self.geometry_owner()
+            return geometry
+
         # Hide the getters with read-only property implementations
-        geometry = property(geometry)
+        geometry = property(_get_geometry)
 	%}
 };
 
@@ -528,6 +528,7 @@ static IfcUtil::ArgumentType helper_fn_attribute_type(const IfcUtil::IfcBaseClas
 // The IfcFile* returned by open() is to be freed by SWIG/Python
 %newobject open;
 %newobject read;
+%newobject read_buffer;
 %newobject parse_ifcxml;
 
 %inline %{
@@ -543,6 +544,21 @@ static IfcUtil::ArgumentType helper_fn_attribute_type(const IfcUtil::IfcBaseClas
 		return f;
 	}
 
+	// Reads from any object supporting the buffer protocol, such as the bytes
+	// of a decompressed archive, without first converting it to a string.
+	IfcParse::IfcFile* read_buffer(PyObject* buffer) {
+		Py_buffer view;
+		if (PyObject_GetBuffer(buffer, &view, PyBUF_SIMPLE) != 0) {
+			PyErr_Clear();
+			throw std::runtime_error("Expected an object supporting the buffer protocol");
+		}
+		const size_t length = (size_t) view.len;
+		char* copiedData = new char[length];
+		memcpy(copiedData, view.buf, length);
+		PyBuffer_Release(&view);
+		return new IfcParse::IfcFile((void *)copiedData, length);
+	}
+
 	const char* version() {
 		return IFCOPENSHELL_VERSION;
 	}